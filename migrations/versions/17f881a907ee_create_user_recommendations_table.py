@@ -0,0 +1,39 @@
+"""create user_recommendations table
+
+Revision ID: 17f881a907ee
+Revises: 01aa542b192b
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '17f881a907ee'
+down_revision: Union[str, None] = '01aa542b192b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_recommendations',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('movie_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('model_version', sa.String(), nullable=False),
+        sa.Column('created_at', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'rank'),
+    )
+    op.create_index(op.f('ix_user_recommendations_model_version'), 'user_recommendations', ['model_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_recommendations_model_version'), table_name='user_recommendations')
+    op.drop_table('user_recommendations')
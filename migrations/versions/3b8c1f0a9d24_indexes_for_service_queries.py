@@ -0,0 +1,39 @@
+"""indexes for service queries
+
+Revision ID: 3b8c1f0a9d24
+Revises: d79fa997ab65
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8c1f0a9d24'
+down_revision: Union[str, None] = 'd79fa997ab65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ranked top_movies reads (fallback list, GET /movies/top) walk this in order
+    # and stop at LIMIT instead of sorting the table; movie_id is the tie-break
+    op.create_index(
+        'ix_top_movies_mean_rating_desc',
+        'top_movies',
+        [sa.text('mean_rating DESC'), 'movie_id'],
+        unique=False,
+    )
+    # uq_ratings_user_movie (user_id, movie_id) serves every user_id lookup, so
+    # the single-column index only costs writes
+    op.execute('DROP INDEX IF EXISTS ix_ratings_user_id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('CREATE INDEX IF NOT EXISTS ix_ratings_user_id ON ratings (user_id)')
+    op.drop_index('ix_top_movies_mean_rating_desc', table_name='top_movies')
@@ -0,0 +1,55 @@
+"""ratings.movie_id foreign key cascades on delete
+
+Revision ID: 8e2d4b6a1c37
+Revises: 3b8c1f0a9d24
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d4b6a1c37'
+down_revision: Union[str, None] = '3b8c1f0a9d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FK_NAME = 'fk_ratings_movie_id_movies'
+# names the ratings → movies key has had: hand-made, 5f384a597907, Postgres default
+OLD_FK_NAMES = ('fk_movie', FK_NAME, 'ratings_movie_id_fkey')
+
+
+def _drop_fk_if_exists(table, name):
+    # helper to tolerate whatever FK name exists
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1
+                FROM pg_constraint
+                WHERE conname = '{name}'
+                  AND conrelid = '{table}'::regclass
+            ) THEN
+                ALTER TABLE {table} DROP CONSTRAINT {name};
+            END IF;
+        END $$;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ratings.movie_id declares ondelete="CASCADE": make the database agree
+    # whichever name (and ON DELETE action) the key was created with
+    for name in OLD_FK_NAMES:
+        _drop_fk_if_exists('ratings', name)
+    op.create_foreign_key(FK_NAME, 'ratings', 'movies', ['movie_id'], ['movie_id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(FK_NAME, 'ratings', type_='foreignkey')
+    op.create_foreign_key(FK_NAME, 'ratings', 'movies', ['movie_id'], ['movie_id'])
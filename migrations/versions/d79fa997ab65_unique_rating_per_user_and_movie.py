@@ -0,0 +1,38 @@
+"""unique rating per user and movie
+
+Revision ID: d79fa997ab65
+Revises: 17f881a907ee
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd79fa997ab65'
+down_revision: Union[str, None] = '17f881a907ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the old check-then-insert could race; keep the latest row of any duplicates
+    op.execute(
+        """
+        DELETE FROM ratings a
+        USING ratings b
+        WHERE a.user_id = b.user_id
+          AND a.movie_id = b.movie_id
+          AND a.rating_id < b.rating_id
+        """
+    )
+    op.create_unique_constraint('uq_ratings_user_movie', 'ratings', ['user_id', 'movie_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_ratings_user_movie', 'ratings', type_='unique')
@@ -0,0 +1,172 @@
+# scripts/batch_recommend.py
+"""
+Materialise top-K recommendations for every user the model knows.
+
+    PYTHONPATH=. python scripts/batch_recommend.py --k 50 --block 256 --workers 4
+
+Users are scored in blocks with one (block × k) · (k × catalog) matrix product
+per block, spread over a process pool. Each worker memory-maps the exported
+factors (the registry champion), so the arrays are shared with the parent
+instead of copied. Results replace the contents of ``user_recommendations``
+in one transaction; the API serves from it while ``model_version`` matches
+the loaded model and falls back to live scoring otherwise.
+"""
+import argparse
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import delete, insert, select, text
+
+from src.database.session import SessionLocal
+from src.db_models.movies import Movies
+from src.db_models.user_recommendations import UserRecommendations
+from src.ml.registry import ModelRegistry
+from src.ml.artifacts import load_artifact
+from src.ml.catalog import CatalogIndex
+
+ARTIFACT_DIR = "models/svd_factors"   # used until a model is promoted in the registry
+REGISTRY_DIR = "models/registry"
+INSERT_CHUNK = 10_000
+
+_worker: dict = {}
+
+
+# ── worker side ────────────────────────────────────────────
+def _init_worker(artifact_dir: str, catalog_rows: np.ndarray) -> None:
+    scorer, _ = load_artifact(artifact_dir)
+    _worker["scorer"] = scorer
+    _worker["qi_t"] = np.ascontiguousarray(scorer.qi[catalog_rows].T)
+    _worker["bi"] = np.asarray(scorer.bi[catalog_rows])
+
+
+def _score_block(task):
+    """Top-``k`` catalog columns (and clipped scores) for users ``start:stop``."""
+    start, stop, excl_users, excl_cols, k = task
+    scorer = _worker["scorer"]
+    scores = scorer.pu[start:stop] @ _worker["qi_t"]
+    scores += _worker["bi"][None, :]
+    scores += scorer.bu[start:stop, None]
+    scores += np.float32(scorer.global_mean)
+    scores[excl_users - start, excl_cols] = -np.inf
+
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    # rank on raw scores, store clipped ones; excluded slots stay -inf
+    top_scores = np.where(np.isfinite(top_scores), np.clip(top_scores, *scorer.rating_scale), -np.inf)
+    return start, top, top_scores
+
+
+# ── driver ─────────────────────────────────────────────────
+def load_catalog(db, scorer):
+    """Movies that exist in the DB *and* in the model, as sorted (movie ids, qi rows)."""
+    catalog = CatalogIndex.build(db.execute(select(Movies.movie_id)).scalars().all(), scorer)
+    return catalog.candidates(exclude=np.empty(0, dtype=np.int64), policy="skip")
+
+
+def load_exclusions(db, scorer, catalog_ids):
+    """Already-rated (user row, catalog column) pairs, sorted by user row."""
+    pairs = db.execute(text("SELECT user_id::text, movie_id FROM ratings")).all()
+    users, cols = [], []
+    for raw_uid, movie_id in pairs:
+        user = scorer.user_index(raw_uid)
+        col = np.searchsorted(catalog_ids, movie_id)
+        if user is not None and col < len(catalog_ids) and catalog_ids[col] == movie_id:
+            users.append(user)
+            cols.append(col)
+    users = np.array(users, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    order = np.argsort(users, kind="stable")
+    return users[order], cols[order]
+
+
+def peak_rss_mb() -> tuple[float, float]:
+    """Peak RSS of this process and of the largest finished worker (Linux: KiB)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact", help="artifact directory (default: the registry champion)")
+    parser.add_argument("--k", type=int, default=50, help="recommendations stored per user")
+    parser.add_argument("--block", type=int, default=256, help="users per matrix product")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    args.artifact = args.artifact or ModelRegistry(REGISTRY_DIR).champion_path(ARTIFACT_DIR)
+
+    scorer, manifest = load_artifact(args.artifact)
+    version = manifest["version"]
+    print(f"=== Batch scoring {scorer.n_users} users with model {version} ===")
+
+    db = SessionLocal()
+    try:
+        catalog_ids, catalog_rows = load_catalog(db, scorer)
+        if not len(catalog_ids):
+            print("⚠️ No catalog movies are known to the model")
+            return
+        excl_users, excl_cols = load_exclusions(db, scorer, catalog_ids)
+        print(f"✅ Catalog: {len(catalog_ids)} scorable movies, {len(excl_users)} rated pairs to exclude")
+
+        tasks = []
+        for start in range(0, scorer.n_users, args.block):
+            stop = min(start + args.block, scorer.n_users)
+            lo, hi = np.searchsorted(excl_users, [start, stop])
+            tasks.append((start, stop, excl_users[lo:hi], excl_cols[lo:hi], args.k))
+
+        created_at = datetime.now(timezone.utc).isoformat()
+        db.execute(delete(UserRecommendations))
+        buffer, written = [], 0
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(args.artifact, catalog_rows),
+        ) as pool:
+            for start, top, top_scores in pool.map(_score_block, tasks):
+                for offset, (cols, scores) in enumerate(zip(top, top_scores)):
+                    user_id = str(scorer.user_ids[start + offset])
+                    buffer.extend(
+                        {
+                            "user_id": user_id,
+                            "rank": rank,
+                            "movie_id": int(catalog_ids[col]),
+                            "score": float(score),
+                            "model_version": version,
+                            "created_at": created_at,
+                        }
+                        for rank, (col, score) in enumerate(zip(cols, scores))
+                        if np.isfinite(score)
+                    )
+                if len(buffer) >= INSERT_CHUNK:
+                    db.execute(insert(UserRecommendations), buffer)   # executemany / insertmanyvalues
+                    written += len(buffer)
+                    buffer.clear()
+        if buffer:
+            db.execute(insert(UserRecommendations), buffer)
+            written += len(buffer)
+        db.commit()
+        elapsed = time.perf_counter() - t0
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Batch scoring failed: {e}")
+        raise
+    finally:
+        db.close()
+
+    own_mb, worker_mb = peak_rss_mb()
+    print(f"✅ Wrote {written} rows for {scorer.n_users} users in {elapsed:.2f}s "
+          f"({scorer.n_users / elapsed:,.0f} users/sec, {args.workers} workers, block={args.block})")
+    print(f"Peak RSS: driver {own_mb:.1f} MiB, largest worker {worker_mb:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# scripts/benchmark_ann.py
+"""
+Offline recall@N / latency benchmark of the IVF index against exact scoring.
+
+    PYTHONPATH=. python scripts/benchmark_ann.py --n 10 --nprobe 1 2 4 8 16 32
+
+Queries are the users of data/processed/test.csv that the exported model
+knows. For every ``nprobe`` it reports recall@N (overlap with the exact top-N
+over the whole catalog), mean items scored and per-query latency, so
+``ANN_NPROBE`` can be picked from data rather than guessed.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ml.registry import ModelRegistry
+from src.ml.artifacts import load_artifact
+from src.ml.ivf import IVFIndex
+from src.ml.scoring import top_n
+
+TEST_PATH = "data/processed/test.csv"
+ARTIFACT_DIR = "models/svd_factors"   # used until a model is promoted in the registry
+REGISTRY_DIR = "models/registry"
+
+
+def load_test_users(scorer, path=TEST_PATH, limit=500, seed=42):
+    test_df = pd.read_csv(path)
+    # same raw-id convention as train_model.py
+    raw_ids = test_df["userId"].astype(str).unique()
+    rows = [u for u in (scorer.user_index(r) for r in raw_ids) if u is not None]
+    rng = np.random.default_rng(seed)
+    if len(rows) > limit:
+        rows = rng.choice(rows, size=limit, replace=False).tolist()
+    return rows
+
+
+def exact_top_n(scorer, user, n):
+    return top_n(scorer.bi + scorer.qi @ scorer.pu[user], n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact", help="artifact directory (default: the registry champion)")
+    parser.add_argument("--test", default=TEST_PATH)
+    parser.add_argument("--n", type=int, default=10, help="N in recall@N")
+    parser.add_argument("--users", type=int, default=500, help="max number of query users")
+    parser.add_argument("--lists", type=int, default=None, help="rebuild the index with this many lists")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+    args.artifact = args.artifact or ModelRegistry(REGISTRY_DIR).champion_path(ARTIFACT_DIR)
+
+    scorer, manifest = load_artifact(args.artifact, mmap=False)
+    index = None if args.lists else IVFIndex.load(args.artifact, mmap=False)
+    if index is None:
+        t0 = time.perf_counter()
+        index = IVFIndex.build(scorer, n_lists=args.lists)
+        print(f"Built IVF index with {index.n_lists} lists in {time.perf_counter() - t0:.2f}s")
+
+    users = load_test_users(scorer, args.test, args.users)
+    if not users:
+        print("⚠️ No test users are known to the model")
+        return
+    print(f"Model {manifest['version']}: {scorer.n_items} items × {manifest['n_factors']} factors, "
+          f"{index.n_lists} lists, {len(users)} query users, N={args.n}")
+
+    t0 = time.perf_counter()
+    truth = [exact_top_n(scorer, u, args.n) for u in users]
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(users)
+    print(f"\n{'nprobe':>7} {'recall@N':>9} {'scanned':>9} {'ms/query':>9} {'speedup':>8}")
+    print(f"{'exact':>7} {1.0:>9.3f} {scorer.n_items:>9d} {exact_ms:>9.3f} {1.0:>8.2f}")
+
+    for nprobe in args.nprobe:
+        scanned = 0
+        hits = 0
+        t0 = time.perf_counter()
+        found = [index.search(scorer, scorer.pu[u], args.n, nprobe) for u in users]
+        ms = (time.perf_counter() - t0) * 1000 / len(users)
+        for u, approx, exact in zip(users, found, truth):
+            hits += len(np.intersect1d(approx, exact))
+            scanned += len(index.candidates(scorer.pu[u], nprobe))
+        recall = hits / sum(len(t) for t in truth)
+        print(f"{nprobe:>7d} {recall:>9.3f} {scanned // len(users):>9d} {ms:>9.3f} {exact_ms / ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
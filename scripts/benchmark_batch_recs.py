@@ -0,0 +1,60 @@
+# scripts/benchmark_batch_recs.py
+"""
+Users/sec of batch recommendations vs one call per user.
+
+    PYTHONPATH=. python scripts/benchmark_batch_recs.py --users 500 --n 10
+
+Runs against the configured database and the exported model, at the service
+layer (no HTTP / token decode, which would only widen the gap). Caches are
+cleared before every run so both sides do the full scoring work.
+"""
+import argparse
+import asyncio
+import time
+
+from src.database.session import AsyncSessionLocal, dispose_engines
+from src.services.movies import MovieService
+
+
+async def timed(coro_fn) -> float:
+    MovieService._recs_cache.clear()
+    t0 = time.perf_counter()
+    await coro_fn()
+    return time.perf_counter() - t0
+
+
+async def run(args):
+    MovieService.preload_model()
+    async with AsyncSessionLocal() as db:
+        await MovieService.preload_ratings(db)
+        ratings = MovieService._ratings
+        user_ids = [u for u in ratings._rows if ratings.count(u) >= 5][: args.users]
+        if not user_ids:
+            print("⚠️ No users with 5+ ratings in the database")
+            return
+        service = MovieService(db)
+        # warm the catalog mapping / fold-in caches so both sides measure scoring
+        await service.recommend_for_users(user_ids, top_n=args.n)
+
+        async def one_by_one():
+            for u in user_ids:
+                await service.recommend_for_user(u, top_n=args.n)
+
+        single = await timed(one_by_one)
+        batch = await timed(lambda: service.recommend_for_users(user_ids, top_n=args.n))
+    await dispose_engines()
+
+    print(f"{len(user_ids)} users, n={args.n}")
+    print(f"{'single':>8}: {single:.3f}s  {len(user_ids) / single:>10,.0f} users/sec")
+    print(f"{'batch':>8}: {batch:.3f}s  {len(user_ids) / batch:>10,.0f} users/sec  ({single / batch:.1f}×)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--n", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/benchmark_foldin.py
+"""
+Latency of folding a new user into the exported model.
+
+    PYTHONPATH=. python scripts/benchmark_foldin.py --sizes 5 50 500
+
+For each history size it times ``fold_in`` (the regularised least-squares
+solve done on the request path for users newer than the model) over random
+item sets and reports mean / p50 / p99 in milliseconds. Without an exported
+artifact it falls back to random 100-factor item vectors.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.ml.registry import ModelRegistry
+from src.ml.artifacts import artifact_exists, load_artifact
+from src.ml.foldin import fold_in
+from src.ml.scoring import FactorScorer
+
+ARTIFACT_DIR = "models/svd_factors"   # used until a model is promoted in the registry
+REGISTRY_DIR = "models/registry"
+
+
+def synthetic_scorer(n_items=50_000, n_factors=100, seed=42) -> FactorScorer:
+    rng = np.random.default_rng(seed)
+    return FactorScorer(
+        global_mean=3.5,
+        pu=np.empty((0, n_factors), dtype=np.float32),
+        qi=rng.normal(0, 0.1, (n_items, n_factors)).astype(np.float32),
+        bu=np.empty(0, dtype=np.float32),
+        bi=rng.normal(0, 0.3, n_items).astype(np.float32),
+        user_ids=np.empty(0, dtype=str),
+        item_ids=np.arange(n_items, dtype=np.int64),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact", help="artifact directory (default: the registry champion)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--repeats", type=int, default=500)
+    args = parser.parse_args()
+    args.artifact = args.artifact or ModelRegistry(REGISTRY_DIR).champion_path(ARTIFACT_DIR)
+
+    if artifact_exists(args.artifact):
+        scorer, manifest = load_artifact(args.artifact, mmap=False)
+        print(f"Model {manifest['version']}: {scorer.n_items} items × {manifest['n_factors']} factors")
+    else:
+        scorer = synthetic_scorer()
+        print(f"⚠️ No artifact at {args.artifact}; using {scorer.n_items} random items × {scorer.qi.shape[1]} factors")
+
+    rng = np.random.default_rng(0)
+    print(f"\n{'ratings':>8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for size in args.sizes:
+        size = min(size, scorer.n_items)
+        timings = np.empty(args.repeats)
+        for i in range(args.repeats):
+            items = rng.choice(scorer.n_items, size=size, replace=False)
+            ratings = rng.integers(1, 11, size=size) / 2.0
+            t0 = time.perf_counter()
+            fold_in(scorer, items, ratings)
+            timings[i] = (time.perf_counter() - t0) * 1000
+        print(f"{size:>8d} {timings.mean():>9.3f} {np.percentile(timings, 50):>9.3f} {np.percentile(timings, 99):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# scripts/benchmark_load.py
+"""
+HTTP load test: p50 / p99 latency and requests/sec at several concurrency levels.
+
+    PYTHONPATH=. python scripts/benchmark_load.py --url http://localhost:8000 \
+        --email bench@example.com --password secret --clients 50 200 1000
+
+Each of ``--clients`` coroutines sends ``GET --path`` back to back for
+``--seconds`` over one shared connection pool, using a bearer token fetched
+once from /auth/token. Non-2xx responses and transport errors are counted,
+not timed.
+
+To compare the sync and async stacks, start the same workload twice — the
+current tree, and the last sync revision checked out next to it:
+
+    git worktree add ../recs-sync <last-sync-commit>
+    (cd ../recs-sync && uvicorn src.main:app --port 8001)
+    uvicorn src.main:app --port 8000
+
+then run this script against :8001 and :8000 with identical flags. Use the
+same worker count for both; a single worker shows the difference most clearly.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+
+async def fetch_token(client: httpx.AsyncClient, email: str, password: str) -> str:
+    res = await client.post("/auth/token", data={"username": email, "password": password})
+    res.raise_for_status()
+    return res.json()["access_token"]
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list, errors: list) -> None:
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            res = await client.get(path)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+            continue
+        if res.is_success:
+            latencies.append(time.perf_counter() - t0)
+        else:
+            errors.append(res.status_code)
+
+
+async def run_level(args, headers: dict, clients: int) -> tuple[np.ndarray, list, float]:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        latencies: list[float] = []
+        errors: list = []
+        t0 = time.perf_counter()
+        deadline = t0 + args.seconds
+        await asyncio.gather(*(worker(client, args.path, deadline, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - t0
+    return np.array(latencies) * 1000, errors, elapsed
+
+
+async def run(args):
+    headers = {}
+    if args.email:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            headers["Authorization"] = f"Bearer {await fetch_token(client, args.email, args.password)}"
+
+    print(f"GET {args.url}{args.path} for {args.seconds:.0f}s per level")
+    print(f"\n{'clients':>8} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for clients in args.clients:
+        latencies, errors, elapsed = await run_level(args, headers, clients)
+        if len(latencies) == 0:
+            print(f"{clients:>8d} {0:>9d} {0:>9.0f} {'-':>9} {'-':>9} {len(errors):>7d}")
+            continue
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{clients:>8d} {len(latencies):>9d} {len(latencies) / elapsed:>9.0f} {p50:>9.1f} {p99:>9.1f} {len(errors):>7d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/movies/recommendations?n=10")
+    parser.add_argument("--email", help="account used to get a bearer token (omit for public paths)")
+    parser.add_argument("--password")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# scripts/benchmark_online.py
+"""
+Latency and drift of incremental model updates against full retrains.
+
+    PYTHONPATH=. python scripts/benchmark_online.py --base 0.8 --batch 1000
+
+Replays a ratings file (default: ml-latest-small) in time order: the first
+``--base`` share trains the starting model (the native SGD trainer with
+train_model.py's parameters), the rest arrives in batches of ``--batch``
+ratings. Every batch is applied with ``incremental_update`` (what
+services/online_updater.py does per run); a random 10% of each batch is
+held out and never trained on. At every ``--every``-th batch it prints the
+update latency per 1000 ratings and the holdout RMSE so far of
+
+    base      the starting model, never updated
+    online    the chain of incremental updates
+    retrain   a full retrain on everything but the holdout so far
+
+"online − retrain" is the drift the updater's guard compares with
+``ONLINE_DRIFT_TOLERANCE``.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.core.config import settings
+from src.ml.mf import MatrixFactorization, rmse
+from src.ml.online import timed_update
+
+DATA_PATH = "data/raw/ml-latest-small/ratings.csv"
+PARAMS = {"n_factors": 100, "reg_all": 0.05, "lr_all": 0.007, "random_state": 42, "solver": "sgd"}   # train_model.py's
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DATA_PATH, help="ratings CSV with userId, movieId, rating, timestamp")
+    parser.add_argument("--base", type=float, default=0.8, help="share of the ratings (oldest first) in the starting model")
+    parser.add_argument("--batch", type=int, default=1000, help="ratings per incremental update")
+    parser.add_argument("--every", type=int, default=4, help="compare with a full retrain every this many batches")
+    parser.add_argument("--epochs", type=int, default=settings.ONLINE_EPOCHS)
+    parser.add_argument("--lr", type=float, default=settings.ONLINE_LR)
+    parser.add_argument("--reg", type=float, default=settings.ONLINE_REG)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data).sort_values("timestamp", kind="stable").reset_index(drop=True)
+    df["userId"] = df["userId"].astype(str)
+    df["holdout"] = np.random.default_rng(0).random(len(df)) < 0.1
+    n_base = int(len(df) * args.base)
+    base_df, stream = df.iloc[:n_base], df.iloc[n_base:]
+
+    base = MatrixFactorization(**PARAMS).fit(base_df.userId, base_df.movieId, base_df.rating).to_scorer()
+    online = base
+    update = {"lr": args.lr, "reg": args.reg, "n_epochs": args.epochs, "random_state": 42}
+    print(f"{len(base_df)} ratings in the base model, {len(stream)} streamed in batches of {args.batch}")
+    print(f"incremental: {update}\n")
+    print(f"{'batches':>7} {'ratings':>8} {'new users':>9} {'ms/1k':>7} {'base':>7} {'online':>7} {'retrain':>7} "
+          f"{'online−retrain':>14}")
+
+    latencies = []
+    batches = range(0, len(stream), args.batch)
+    for n, start in enumerate(batches, 1):
+        batch = stream.iloc[start:start + args.batch]
+        train = batch[~batch.holdout]
+        new_users = len(np.setdiff1d(train.userId.unique(), online.user_ids))
+        online, ms = timed_update(online, train.userId, train.movieId, train.rating, **update)
+        latencies.append(ms)
+        if n % args.every and n != len(batches):
+            continue
+        streamed = stream.iloc[:start + len(batch)]
+        test = streamed[streamed.holdout]
+        trained = pd.concat([base_df, streamed[~streamed.holdout]])
+        retrain = MatrixFactorization(**PARAMS).fit(trained.userId, trained.movieId, trained.rating)
+        scores = [rmse(model, test.userId, test.movieId, test.rating) for model in (base, online, retrain)]
+        print(f"{n:>7} {len(streamed):>8} {new_users:>9} {ms:>7.1f} {scores[0]:>7.4f} {scores[1]:>7.4f} "
+              f"{scores[2]:>7.4f} {scores[1] - scores[2]:>+14.4f}")
+
+    latencies = np.array(latencies)
+    print(f"\nupdate latency per 1000 ratings: median {np.median(latencies):.1f} ms, "
+          f"p95 {np.percentile(latencies, 95):.1f} ms, max {latencies.max():.1f} ms "
+          f"(last full retrain: {retrain.fit_seconds:.1f}s for {len(trained)} ratings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# scripts/benchmark_quantized.py
+"""
+Memory / speed / accuracy trade-off of the quantized item factors.
+
+    PYTHONPATH=. python scripts/benchmark_quantized.py --n 10 --rerank 2 4 8 --items 500000
+
+For every precision it reports the bytes of ``qi`` the catalog scan reads,
+the per-query latency of a full-catalog top-N (quantized scan + float32
+re-rank of ``rerank × N`` candidates) against the exact float32 scan,
+recall@N against the exact top-N for the users of data/processed/test.csv,
+and the RMSE on data/processed/test.csv if ratings were predicted from the
+quantized factors alone (served scores are re-computed in float32, so this
+is an upper bound on the damage).
+
+"float32 blocked" is the same blocked scan without quantization; it shows
+how much of the speed-up comes from the smaller type rather than from
+scanning in cache-sized blocks. ``--items`` tiles the catalog (with a little
+noise) to that many items for the timings, since a few thousand movies fit
+in cache and don't show the bandwidth effect; recall and RMSE are always
+measured on the real catalog.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ml.artifacts import load_artifact
+from src.ml.quantize import PRECISIONS, QuantizedFactors, affinity, quantized_top_n
+from src.ml.registry import ModelRegistry
+from src.ml.scoring import FactorScorer, top_n
+
+TEST_PATH = "data/processed/test.csv"
+ARTIFACT_DIR = "models/svd_factors"   # used until a model is promoted in the registry
+REGISTRY_DIR = "models/registry"
+
+
+def load_test(scorer, path=TEST_PATH):
+    test_df = pd.read_csv(path)
+    # same raw-id convention as train_model.py
+    users = np.array([-1 if u is None else u for u in map(scorer.user_index, test_df["userId"].astype(str))])
+    items = scorer.item_index(test_df["movieId"].to_numpy())
+    return users, items, test_df["rating"].to_numpy(dtype=np.float64)
+
+
+def rmse(scorer, qi, users, items, ratings):
+    """Test RMSE of ``scorer`` with ``qi`` swapped in, term for term like ``FactorScorer.score``."""
+    est = np.full(len(ratings), scorer.global_mean, dtype=np.float64)
+    known_u, known_i = users >= 0, items >= 0
+    both = known_u & known_i
+    dots = np.einsum("ij,ij->i", scorer.pu[users[both]], qi[items[both]])
+    if scorer.biased:
+        est[known_u] += scorer.bu[users[known_u]]
+        est[known_i] += scorer.bi[items[known_i]]
+        est[both] += dots
+    else:
+        est[both] = dots
+    np.clip(est, *scorer.rating_scale, out=est)
+    return float(np.sqrt(np.mean((est - ratings) ** 2)))
+
+
+def tile(scorer, n_items, seed=42):
+    """A scorer whose catalog is the real one repeated (plus noise) up to ``n_items``."""
+    rng = np.random.default_rng(seed)
+    rows = np.arange(n_items) % scorer.n_items
+    noise = rng.normal(scale=0.01, size=(n_items, scorer.qi.shape[1])).astype(np.float32)
+    return FactorScorer(
+        global_mean=scorer.global_mean,
+        pu=scorer.pu, bu=scorer.bu,
+        qi=np.ascontiguousarray(scorer.qi[rows] + noise), bi=np.ascontiguousarray(scorer.bi[rows]),
+        user_ids=scorer.user_ids, item_ids=np.arange(n_items, dtype=np.int64),
+        rating_scale=scorer.rating_scale, biased=scorer.biased,
+    )
+
+
+def timed(fn, users):
+    fn(users[0])
+    t0 = time.perf_counter()
+    for u in users:
+        fn(u)
+    return (time.perf_counter() - t0) * 1000 / len(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact", help="artifact directory (default: the registry champion)")
+    parser.add_argument("--test", default=TEST_PATH)
+    parser.add_argument("--n", type=int, default=10, help="N in recall@N")
+    parser.add_argument("--users", type=int, default=200, help="max number of query users")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 2, 4, 8], help="shortlist = rerank × N")
+    parser.add_argument("--items", type=int, default=0, help="tile the catalog to this many items for the timings")
+    args = parser.parse_args()
+    args.artifact = args.artifact or ModelRegistry(REGISTRY_DIR).champion_path(ARTIFACT_DIR)
+
+    scorer, manifest = load_artifact(args.artifact, mmap=False)
+    test_users, test_items, ratings = load_test(scorer, args.test)
+    rng = np.random.default_rng(42)
+    users = np.unique(test_users[test_users >= 0])
+    if len(users) == 0:
+        print("⚠️ No test users are known to the model")
+        return
+    users = rng.choice(users, size=min(args.users, len(users)), replace=False)
+
+    bench = tile(scorer, args.items) if args.items > scorer.n_items else scorer
+    rows = np.arange(bench.n_items)
+    print(f"Model {manifest['version']}: {scorer.n_items} items × {manifest['n_factors']} factors, "
+          f"timed on {bench.n_items} items, {len(users)} query users, N={args.n}")
+
+    truth = [top_n(affinity(scorer, np.arange(scorer.n_items), scorer.pu[u], lambda idx, pu: scorer.qi[idx] @ pu), args.n)
+             for u in users]
+    exact_ms = timed(lambda u: top_n(bench.score_with(bench.pu[u], bench.bu[u], rows, clip=False), args.n), users)
+    base_bytes = bench.qi.nbytes
+    base_rmse = rmse(scorer, scorer.qi, test_users, test_items, ratings)
+
+    print(f"\n{'precision':<16} {'rerank':>6} {'qi MiB':>8} {'saved':>6} {'ms/query':>9} {'speedup':>8} "
+          f"{'recall@N':>9} {'RMSE':>7} {'ΔRMSE':>8}")
+    print(f"{'float32 exact':<16} {'-':>6} {base_bytes / 2**20:>8.1f} {0:>6.0%} {exact_ms:>9.3f} {1:>8.2f} "
+          f"{1:>9.3f} {base_rmse:>7.4f} {0:>8.5f}")
+
+    variants = [("float32 blocked", QuantizedFactors("float32", scorer.qi), QuantizedFactors("float32", bench.qi))]
+    variants += [(p, QuantizedFactors.quantize(scorer.qi, p), QuantizedFactors.quantize(bench.qi, p)) for p in PRECISIONS]
+    for name, small, timed_q in variants:
+        error = rmse(scorer, small.dequantize(), test_users, test_items, ratings)
+        for rerank in args.rerank:
+            ms = timed(lambda u: quantized_top_n(bench, timed_q, bench.pu[u], rows, args.n, rerank), users)
+            hits = sum(
+                len(np.intersect1d(quantized_top_n(scorer, small, scorer.pu[u], np.arange(scorer.n_items), args.n, rerank), t))
+                for u, t in zip(users, truth)
+            )
+            recall = hits / sum(len(t) for t in truth)
+            print(f"{name:<16} {rerank:>6d} {timed_q.nbytes / 2**20:>8.1f} {1 - timed_q.nbytes / base_bytes:>6.0%} "
+                  f"{ms:>9.3f} {exact_ms / ms:>8.2f} {recall:>9.3f} {error:>7.4f} {error - base_rmse:>+8.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# scripts/benchmark_rating_writes.py
+"""
+Rating write throughput: one transaction per request vs the write-behind buffer.
+
+    PYTHONPATH=. python scripts/benchmark_rating_writes.py --ratings 20000 --clients 64
+
+Run it against a local database (``DATABASE_URI``). It creates throw-away
+users, has ``--clients`` coroutines submit single ratings the way
+``POST /movies/ratings`` does (one session per request), and deletes the
+users and their ratings again at the end.
+
+* per-request: ``add_rating`` — one upsert + commit per rating
+* buffered:    ``queue_ratings`` — queued and flushed in batches (COPY on
+  asyncpg, multi-row INSERT elsewhere); ``--log-dir`` adds the fsync'd log
+
+For the buffered mode it reports both the rate at which requests were
+answered and the rate until every rating was committed.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from src.database.session import AsyncSessionLocal, async_engine, dispose_engines
+from src.db_models.movies import Movies
+from src.db_models.ratings import Ratings
+from src.db_models.users import User
+from src.schemas.movies import RatingCreate
+from src.services.movies import MovieService, rating_buffer
+
+
+async def create_users(n: int) -> list[uuid.UUID]:
+    now = datetime.now(timezone.utc).isoformat()
+    ids = [uuid.uuid4() for _ in range(n)]
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {
+                "id": user_id, "username": f"bench-{user_id.hex}", "email": f"bench-{user_id.hex}@example.invalid",
+                "first_name": "Bench", "last_name": "User", "password_hash": "-", "created_at": now, "is_active": "active",
+            }
+            for user_id in ids
+        ])
+    return ids
+
+
+async def drop_users(ids: list[uuid.UUID]) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(delete(Ratings).where(Ratings.user_id.in_(ids)))
+        await conn.execute(delete(User).where(User.id.in_(ids)))
+
+
+async def submit(work: list[tuple], clients: int, buffered: bool) -> np.ndarray:
+    """Send every (user_id, movie_id, rating) as its own request; returns latencies in ms."""
+    queue = list(reversed(work))
+    latencies: list[float] = []
+
+    async def client():
+        while queue:
+            user_id, movie_id, rating = queue.pop()
+            t0 = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                service = MovieService(db)
+                data = RatingCreate(movie_id=movie_id, rating=rating)
+                if buffered:
+                    await service.queue_ratings(user_id=user_id, ratings=[data])
+                else:
+                    await service.add_rating(user_id=user_id, data=data)
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return np.array(latencies) * 1000
+
+
+def workload(users: list[uuid.UUID], movie_ids: list[int], n: int, rng: random.Random) -> list[tuple]:
+    per_user = -(-n // len(users))
+    pairs = [(u, m) for u in users for m in rng.sample(movie_ids, min(per_user, len(movie_ids)))][:n]
+    rng.shuffle(pairs)
+    return [(u, m, rng.randint(1, 10) / 2) for u, m in pairs]
+
+
+def report(label: str, n: int, seconds: float, latencies: np.ndarray) -> None:
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label:>32} {n:>8d} {seconds:>8.2f} {n / seconds:>10,.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+async def run(args):
+    async with AsyncSessionLocal() as db:
+        movie_ids = list(await db.scalars(select(Movies.movie_id).limit(args.movies)))
+    if not movie_ids:
+        print("⚠️ No movies in the database")
+        return
+    rng = random.Random(0)
+    users = await create_users(2 * args.users)
+    try:
+        direct = workload(users[:args.users], movie_ids, args.ratings, rng)
+        buffered = workload(users[args.users:], movie_ids, args.ratings, rng)
+        print(f"{args.ratings} single-rating requests, {args.clients} clients, {len(movie_ids)} movies "
+              f"({async_engine.dialect.name}+{async_engine.dialect.driver})")
+        print(f"\n{'mode':>32} {'ratings':>8} {'secs':>8} {'ratings/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+
+        t0 = time.perf_counter()
+        latencies = await submit(direct, args.clients, buffered=False)
+        report("per-request", len(direct), time.perf_counter() - t0, latencies)
+
+        rating_buffer.flush_rows = args.flush_rows
+        rating_buffer.flush_seconds = args.flush_seconds
+        rating_buffer.max_rows = max(rating_buffer.max_rows, args.ratings)
+        rating_buffer.log_dir = Path(args.log_dir) if args.log_dir else None
+        await rating_buffer.start()
+        t0 = time.perf_counter()
+        latencies = await submit(buffered, args.clients, buffered=True)
+        answered = time.perf_counter() - t0
+        await rating_buffer.stop()   # flushes the remainder
+        committed = time.perf_counter() - t0
+        label = "buffered" + (" + fsync log" if args.log_dir else "")
+        report(f"{label} (answered)", len(buffered), answered, latencies)
+        report(f"{label} (committed)", len(buffered), committed, latencies)
+
+        async with AsyncSessionLocal() as db:
+            stored = len((await db.scalars(select(Ratings.rating_id).where(Ratings.user_id.in_(users)))).all())
+        print(f"\nrows stored: {stored} (expected {len(direct) + len(buffered)})")
+    finally:
+        await drop_users(users)
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, default=20_000, help="ratings per mode")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--users", type=int, default=200, help="throw-away users per mode")
+    parser.add_argument("--movies", type=int, default=5000, help="movies the ratings are spread over")
+    parser.add_argument("--flush-rows", type=int, default=1000)
+    parser.add_argument("--flush-seconds", type=float, default=0.5)
+    parser.add_argument("--log-dir", help="enable the fsync'd append log in this directory")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
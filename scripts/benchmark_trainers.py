@@ -0,0 +1,110 @@
+# scripts/benchmark_trainers.py
+"""
+Wall time, peak memory and RMSE of the NumPy trainers against scikit-surprise.
+
+    PYTHONPATH=. python scripts/benchmark_trainers.py --sizes 100000 1000000 10000000 --threads 4
+
+Each size is a synthetic MovieLens-shaped dataset (long-tailed item
+popularity and user activity, ratings from a planted low-rank model plus
+noise, rounded to half stars) split 90/10; ``--data`` adds a row for a real
+ratings file (default: ml-latest-small). Every trainer runs in a fresh
+process, so "peak MiB" is that process' high-water RSS and "fit Δ MiB" what
+training added on top of the loaded data. Wall time covers everything from
+the raw id/rating arrays to a fitted model, including building surprise's
+``Trainset``. ``--surprise-max`` skips surprise above that many ratings
+(its dict-based ``Trainset`` needs several GB at 10M).
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ml.mf import MatrixFactorization, rmse
+
+DATA_PATH = "data/raw/ml-latest-small/ratings.csv"
+PARAMS = {"n_factors": 100, "reg_all": 0.05, "lr_all": 0.007, "random_state": 42}   # train_model.py's
+
+
+def synthetic(n_ratings: int, seed: int = 42, rank: int = 8) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_users = max(n_ratings // 140, 100)
+    n_items = max(int(2000 * np.sqrt(n_ratings / 100_000)), 500)
+    user_p = rng.lognormal(0, 1, n_users)
+    item_p = 1 / np.arange(10, n_items + 10) ** 0.9
+    users = rng.choice(n_users, n_ratings, p=user_p / user_p.sum())
+    items = rng.permutation(n_items)[rng.choice(n_items, n_ratings, p=item_p / item_p.sum())]
+    pu = rng.normal(0, 0.3, (n_users, rank))
+    qi = rng.normal(0, 0.3, (n_items, rank))
+    est = 3.5 + rng.normal(0, 0.4, n_users)[users] + rng.normal(0, 0.4, n_items)[items]
+    est += np.einsum("ij,ij->i", pu[users], qi[items]) + rng.normal(0, 0.8, n_ratings)
+    return pd.DataFrame({"userId": users, "movieId": items + 1, "rating": np.clip(np.round(est * 2) / 2, 0.5, 5.0)})
+
+
+def load(source: str | int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    df = synthetic(source) if isinstance(source, int) else pd.read_csv(source, usecols=["userId", "movieId", "rating"])
+    test = np.random.default_rng(0).random(len(df)) < 0.1
+    return df[~test].reset_index(drop=True), df[test].reset_index(drop=True)
+
+
+def max_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+def run(source, trainer: str, threads: int, out) -> None:
+    """One trainer on one dataset, in its own process; puts (seconds, peak MiB, fit Δ MiB, RMSE) on ``out``."""
+    train, test = load(source)
+    base = max_rss_mib()
+    if trainer == "surprise":
+        from surprise import SVD, Dataset, Reader
+
+        t0 = time.perf_counter()
+        frame = train.astype({"userId": str, "movieId": str})
+        data = Dataset.load_from_df(frame[["userId", "movieId", "rating"]], Reader(rating_scale=(0.5, 5.0)))
+        model = SVD(**PARAMS).fit(data.build_full_trainset())
+        seconds = time.perf_counter() - t0
+        est = np.array([model.predict(str(u), str(i)).est for u, i in zip(test.userId, test.movieId)])
+        error = float(np.sqrt(np.mean((est - test.rating.to_numpy()) ** 2)))
+    else:
+        t0 = time.perf_counter()
+        model = MatrixFactorization(solver=trainer, n_threads=threads, **PARAMS).fit(train.userId, train.movieId, train.rating)
+        seconds = time.perf_counter() - t0
+        error = rmse(model, test.userId.astype(str), test.movieId, test.rating)
+    out.put((seconds, max_rss_mib(), max_rss_mib() - base, error))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--data", default=DATA_PATH, help="real ratings CSV to add (empty to skip)")
+    parser.add_argument("--trainers", nargs="+", default=["surprise", "sgd", "als"])
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="ALS thread pool size")
+    parser.add_argument("--surprise-max", type=int, default=10_000_000, help="skip surprise above this many ratings")
+    args = parser.parse_args()
+
+    sources = ([args.data] if args.data and os.path.exists(args.data) else []) + args.sizes
+    ctx = mp.get_context("spawn")
+    print(f"{len(sources)} datasets, {PARAMS}, ALS on {args.threads} threads\n")
+    print(f"{'dataset':<22} {'trainer':<9} {'seconds':>9} {'peak MiB':>9} {'fit Δ MiB':>10} {'RMSE':>7}")
+    for source in sources:
+        name = os.path.basename(os.path.dirname(source)) if isinstance(source, str) else f"synthetic {source:,}"
+        for trainer in args.trainers:
+            if trainer == "surprise" and isinstance(source, int) and source > args.surprise_max:
+                print(f"{name:<22} {trainer:<9} {'skipped (--surprise-max)':>39}")
+                continue
+            out = ctx.Queue()
+            proc = ctx.Process(target=run, args=(source, trainer, args.threads, out))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0:
+                print(f"{name:<22} {trainer:<9} {f'❌ failed (exit code {proc.exitcode})':>39}")
+                continue
+            seconds, peak, delta, error = out.get()
+            print(f"{name:<22} {trainer:<9} {seconds:>9.1f} {peak:>9.0f} {delta:>10.0f} {error:>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
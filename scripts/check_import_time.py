@@ -0,0 +1,76 @@
+# scripts/check_import_time.py
+"""
+Import-time budget for the API entry point.
+
+    PYTHONPATH=. python scripts/check_import_time.py --budget-ms 1250
+
+Imports ``src.main`` in a fresh interpreter under ``python -X importtime``
+(best of ``--runs``), prints the slowest imports and exits 1 when the total
+is over ``--budget-ms`` or a module the API must not load at import time
+(``--forbid``) shows up. The forbidden list is the reliable part on a noisy
+machine: pandas or scikit-surprise sneaking back into the import graph
+costs far more than the budget's slack.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+FORBIDDEN = ("pandas", "surprise", "sklearn", "matplotlib")
+
+
+def measure(module: str) -> dict[str, tuple[int, int]]:
+    """``{module: (self_us, cumulative_us)}`` for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.environ.get("PYTHONPATH", ".")},
+    )
+    if proc.returncode != 0:
+        sys.exit(f"❌ import {module} failed:\n{proc.stderr[-2000:]}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--budget-ms", type=float, default=1250.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    parser.add_argument("--forbid", nargs="*", default=list(FORBIDDEN))
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    times = min(runs, key=lambda t: t[args.module][1])
+    total_ms = times[args.module][1] / 1000
+
+    # first-level packages: cumulative time of each root module imported
+    roots: dict[str, int] = {}
+    for name, (_, cumulative) in times.items():
+        root = name.split(".")[0]
+        if name == root:
+            roots[root] = max(roots.get(root, 0), cumulative)
+    print(f"import {args.module}: {total_ms:.0f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms\n")
+    print(f"{'package':<28} {'cumulative ms':>14}")
+    for root, cumulative in sorted(roots.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"{root:<28} {cumulative / 1000:>14.1f}")
+
+    failures = []
+    loaded = sorted({name.split(".")[0] for name in times} & set(args.forbid))
+    if loaded:
+        failures.append(f"imports {', '.join(loaded)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if failures:
+        print(f"\n❌ {args.module} " + "; ".join(failures))
+        sys.exit(1)
+    print(f"\n✅ {args.module} is within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# scripts/check_query_plans.py
+"""
+Query-plan regression check for the per-request service queries (Postgres).
+
+    PYTHONPATH=. python scripts/check_query_plans.py --movies 50000 --users 20000
+
+Run it against a scratch database migrated with ``alembic upgrade head``.
+Inside one transaction, rolled back at the end, it seeds a synthetic
+dataset large enough that the planner stops preferring sequential scans,
+ANALYZEs the tables and EXPLAINs every statement the services issue per
+request, built with the services' own query helpers. A check fails when
+its plan
+
+* sequentially scans a table other than those it allows,
+* doesn't use the index that exists for it, or
+* costs more than its budget (planner units; ``--budget name=cost``).
+
+Exits 1 on any failure. Full-table loads done once per worker (rating index,
+catalog mapping) scan by design and are not checked. The same checks run
+under pytest (tests/test_query_plans.py) when ``TEST_POSTGRES_URI`` is set.
+"""
+import argparse
+import sys
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import select, text
+
+from src.core.config import settings
+from src.database.session import engine
+from src.db_models.top_movies import TopMovies
+from src.db_models.users import User
+from src.services.movies import (
+    _catalog_query,
+    _existing_movies_query,
+    _precomputed_query,
+    _top_movie_rows_query,
+    _top_movies_query,
+    _upsert_ratings,
+    _user_ratings_query,
+)
+
+BASE_ID = 900_000_000  # synthetic movie ids start above any real one
+MODEL_VERSION = "plan-check"
+
+SEED = [
+    """
+    INSERT INTO movies (movie_id, title, created_at, average_rating)
+    SELECT :base + g, 'synthetic ' || g, now()::text, random() * 5
+    FROM generate_series(1, :movies) g
+    """,
+    """
+    INSERT INTO top_movies (movie_id, mean_rating, rating_count)
+    SELECT :base + g, random() * 5, (random() * 1000)::int
+    FROM generate_series(1, :movies) g
+    """,
+    "CREATE TEMP TABLE plan_users ON COMMIT DROP AS SELECT gen_random_uuid() AS id FROM generate_series(1, :users)",
+    """
+    INSERT INTO users (id, username, email, first_name, last_name, password_hash, created_at, is_active)
+    SELECT id, 'plan-' || id, 'plan-' || id || '@example.invalid', 'Plan', 'Check', '-', now()::text, 'active'
+    FROM plan_users
+    """,
+    """
+    INSERT INTO ratings (user_id, movie_id, rating, rating_date)
+    SELECT u.id, :base + 1 + floor(random() * :movies)::int, ceil(random() * 10) / 2.0, now()::text
+    FROM plan_users u CROSS JOIN generate_series(1, :per_user)
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO user_recommendations (user_id, rank, movie_id, score, model_version, created_at)
+    SELECT u.id::text, r, :base + 1 + floor(random() * :movies)::int, random(), :version, now()::text
+    FROM plan_users u CROSS JOIN generate_series(0, :recs - 1) r
+    """,
+]
+ANALYZE = ["movies", "top_movies", "users", "ratings", "user_recommendations"]
+
+
+class Check(NamedTuple):
+    name: str
+    statement: object
+    budget: float                          # max total cost
+    allow_seq: tuple[str, ...] = ()        # tables a sequential scan is fine on
+    expect_index: str | None = None        # index the plan must use
+
+
+def checks(user_id: UUID, email: str) -> list[Check]:
+    top = settings.TOP_MOVIES_CACHE_SIZE
+    movie_ids = [BASE_ID + i for i in range(1, 21)]
+    rows = [{"user_id": user_id, "movie_id": m, "rating": 4.0, "rating_date": "now"} for m in movie_ids]
+    return [
+        # cold-start fallback and GET /movies/top (once per top_movies version)
+        Check("top_movie_ids", _top_movies_query(select(TopMovies.movie_id)).limit(top), 5_000,
+              expect_index="ix_top_movies_mean_rating_desc"),
+        # a hash join over `movies` is a fair plan for 1000 of the top rows
+        Check("top_movie_rows", _top_movie_rows_query().limit(top), 15_000, allow_seq=("movies",),
+              expect_index="ix_top_movies_mean_rating_desc"),
+        Check("catalog_page", _catalog_query(BASE_ID + 1000).limit(settings.MOVIES_PAGE_SIZE + 1), 500),
+        Check("precomputed_recs", _precomputed_query(user_id, MODEL_VERSION, 60), 500),
+        Check("fold_in_ratings", _user_ratings_query(user_id), 1_000, expect_index="uq_ratings_user_movie"),
+        Check("existing_movies", _existing_movies_query(movie_ids), 200),
+        Check("rating_upsert", _upsert_ratings("postgresql", rows), 100),
+        Check("user_by_id", select(User).where(User.id == user_id), 50),
+        Check("user_by_email", select(User).where(User.email == email), 50),
+        Check("signup_unique", select(User.id).where((User.email == email) | (User.username == email)).limit(1), 100),
+    ]
+
+
+def seed(conn, movies: int, users: int, ratings_per_user: int, recs_per_user: int) -> tuple[UUID, str]:
+    """Insert and ANALYZE the synthetic dataset (caller's transaction); returns one seeded user's id and email."""
+    params = {
+        "base": BASE_ID, "movies": movies, "users": users,
+        "per_user": ratings_per_user, "recs": recs_per_user, "version": MODEL_VERSION,
+    }
+    for sql in SEED:
+        conn.execute(text(sql), params)
+    for table in ANALYZE:
+        conn.exec_driver_sql(f"ANALYZE {table}")
+    return tuple(conn.execute(text("SELECT u.id, u.email FROM users u JOIN plan_users p USING (id) LIMIT 1")).one())
+
+
+def explain(conn, statement) -> dict:
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    # driver-level call: pass UUIDs as text, the compiled SQL casts them back
+    params = {k: str(v) if isinstance(v, UUID) else v for k, v in compiled.params.items()}
+    return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()[0]["Plan"]
+
+
+def nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from nodes(child)
+
+
+def problems(check: Check, plan: dict, budget: float) -> list[str]:
+    found = []
+    for node in nodes(plan):
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") not in check.allow_seq:
+            found.append(f"seq scan on {node.get('Relation Name')}")
+    if check.expect_index and not any(node.get("Index Name") == check.expect_index for node in nodes(plan)):
+        found.append(f"{check.expect_index} not used")
+    if plan["Total Cost"] > budget:
+        found.append(f"cost {plan['Total Cost']:.0f} > {budget:.0f}")
+    return found
+
+
+def run(args) -> bool:
+    if engine.dialect.name != "postgresql":
+        print(f"❌ Plans are only checked on Postgres, not {engine.dialect.name}")
+        return False
+    budgets = dict(b.split("=", 1) for b in args.budget)
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            user_id, email = seed(conn, args.movies, args.users, args.ratings_per_user, args.recs_per_user)
+            print(f"Seeded {args.movies} movies, {args.users} users × {args.ratings_per_user} ratings "
+                  f"(rolled back afterwards)\n")
+            print(f"{'query':<18} {'cost':>9} {'budget':>9}  {'plan root':<22} result")
+            ok = True
+            for check in checks(user_id, email):
+                budget = float(budgets.get(check.name, check.budget))
+                plan = explain(conn, check.statement)
+                found = problems(check, plan, budget)
+                ok &= not found
+                verdict = "✅" if not found else "❌ " + "; ".join(found)
+                print(f"{check.name:<18} {plan['Total Cost']:>9.1f} {budget:>9.0f}  {plan['Node Type']:<22} {verdict}")
+                if found and args.verbose:
+                    for node in nodes(plan):
+                        print(f"    {node['Node Type']:<20} {node.get('Relation Name', ''):<22} "
+                              f"{node.get('Index Name', ''):<32} cost={node['Total Cost']:.1f} rows={node['Plan Rows']}")
+        finally:
+            trans.rollback()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--ratings-per-user", type=int, default=100)
+    parser.add_argument("--recs-per-user", type=int, default=50)
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=COST", help="override a check's cost budget")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the plan nodes of failing checks")
+    sys.exit(0 if run(parser.parse_args()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# scripts/model_registry.py
+"""
+Inspect and steer the local model registry (``MODEL_REGISTRY_DIR``).
+
+    PYTHONPATH=. python scripts/model_registry.py list
+    PYTHONPATH=. python scripts/model_registry.py ab <version> --share 0.1
+    PYTHONPATH=. python scripts/model_registry.py promote <version>
+    PYTHONPATH=. python scripts/model_registry.py rollback
+
+The training scripts publish every model here and promote it. ``ab`` serves
+a second version to a fixed share of users (by user-id hash) next to the
+champion; compare the two with the per-version ``recs_latency_seconds`` and
+``recs_predicted_rating`` metrics before promoting it. Every change only
+rewrites ``serving.json``; running workers swap models within
+``MODEL_WATCH_SECONDS``.
+"""
+import argparse
+import sys
+
+from src.core.config import settings
+from src.ml.registry import ModelRegistry
+
+
+def show(registry: ModelRegistry) -> None:
+    serving = registry.serving()
+    roles = {serving["champion"]: "champion", serving["challenger"]: f"challenger {serving['challenger_share']:.0%}"}
+    print(f"{'version':<28} {'role':<16} {'cv rmse':>8} {'ratings':>10} {'users':>8} {'items':>8}  params")
+    for manifest in registry.versions():
+        training = manifest.get("training", {})
+        rmse = training.get("cv", {}).get("rmse")
+        data = training.get("data", {})
+        print(
+            f"{manifest['version']:<28} {roles.get(manifest['version'], ''):<16} "
+            f"{'-' if rmse is None else f'{rmse:.4f}':>8} {data.get('n_ratings', ''):>10} "
+            f"{manifest['n_users']:>8} {manifest['n_items']:>8}  {training.get('params', '')}"
+        )
+    if serving["history"]:
+        print(f"\nrollback history (newest last): {', '.join(serving['history'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registry", default=settings.MODEL_REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="stored versions with their training metrics")
+    commands.add_parser("promote", help="serve a version to everyone").add_argument("version")
+    commands.add_parser("rollback", help="serve the previous champion again")
+    ab = commands.add_parser("ab", help="serve a challenger to a share of users")
+    ab.add_argument("version")
+    ab.add_argument("--share", type=float, default=0.1)
+    commands.add_parser("stop-ab", help="send every user back to the champion")
+    prune = commands.add_parser("prune", help="delete old versions (served / rollback ones are kept)")
+    prune.add_argument("--keep", type=int, default=5)
+    add = commands.add_parser("import", help="add an exported artifact directory (e.g. models/svd_factors)")
+    add.add_argument("path")
+    add.add_argument("--promote", action="store_true")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    try:
+        if args.command == "promote":
+            registry.promote(args.version)
+        elif args.command == "rollback":
+            registry.rollback()
+        elif args.command == "ab":
+            registry.start_ab(args.version, args.share)
+        elif args.command == "stop-ab":
+            registry.stop_ab()
+        elif args.command == "prune":
+            removed = registry.prune(args.keep)
+            print(f"✅ Removed {len(removed)} version(s): {', '.join(removed) or '-'}\n")
+        elif args.command == "import":
+            manifest = registry.add_artifact(args.path)
+            print(f"✅ Imported {manifest['version']} from {args.path}\n")
+            if args.promote:
+                registry.promote(manifest["version"])
+    except ValueError as exc:
+        sys.exit(f"❌ {exc}")
+    show(registry)
+
+
+if __name__ == "__main__":
+    main()
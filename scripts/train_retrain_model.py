@@ -1,25 +1,31 @@
 # scripts/retrain_model.py
 import pandas as pd
-import pickle
 from sqlalchemy.orm import Session
 from src.database.session import SessionLocal
 from src.db_models.ratings import Ratings
 from src.db_models.top_movies import TopMovies  # Add this
-from surprise import SVD, Dataset, Reader
-from surprise.model_selection import GridSearchCV
+from src.core.config import settings
+from src.core.version_marker import bump_version
+from src.ml.artifacts import save_pickle
+from src.ml.mf import MatrixFactorization, cross_validate
+from src.ml.quantize import PRECISIONS
+from src.ml.registry import ModelRegistry, fit_record, training_record
+from src.ml.scoring import FactorScorer
 import os  # Add this for path handling
 
 def export_ratings_from_db():
     db: Session = SessionLocal()
     try:
+        # movies keyed by movie_id like the API looks them up; rating_id is the
+        # watermark incremental updates (scripts/update_model.py) continue from.
+        # Quoted aliases: Postgres folds bare identifiers to lowercase
         query = """
             SELECT 
-                r.user_id::text AS userId,
-                m.movielens_id::text AS movieId,
-                r.rating
+                r.user_id::text AS "userId",
+                r.movie_id::text AS "movieId",
+                r.rating,
+                r.rating_id
             FROM ratings r
-            JOIN movies m ON r.movie_id = m.movie_id
-            WHERE m.movielens_id IS NOT NULL
         """
         df = pd.read_sql_query(query, db.connection())
         return df
@@ -45,28 +51,17 @@ def store_popularity_in_db(popularity_df):
             db.add(record)
         db.commit()
         print("✅ Popularity fallback stored in database")
+        # running API workers reload their cached top list on the next check
+        bump_version(settings.TOP_MOVIES_VERSION_FILE)
     except Exception as e:
         db.rollback()
         print(f"❌ Error storing popularity: {str(e)}")
     finally:
         db.close()
 
-def train_model():
-    print("=== Starting model training ===")
-    # 1) Export ratings from DB
-    df = export_ratings_from_db()
-    
-    if df.empty:
-        print("⚠️ No ratings found. Using fallback initialization")
-        # Initialize empty model
-        model = SVD(n_factors=100, reg_all=0.05, lr_all=0.007, random_state=42)
-        with open("models/svd_model.pkl", "wb") as f:
-            pickle.dump(model, f)
-        print("✅ Created empty model for cold start")
-        return
-    
-    print(f"✅ Exported {len(df)} ratings")
-    print(f"Sample data:\n{df.head(2)}")
+def train_surprise_model(df):
+    from surprise import SVD, Dataset, Reader
+    from surprise.model_selection import GridSearchCV
 
     # 2) Prepare dataset
     print("\nPreparing dataset...")
@@ -114,9 +109,61 @@ def train_model():
     # 6) Save model
     print("\nSaving model...")
     os.makedirs("models", exist_ok=True)
-    with open("models/svd_model.pkl", "wb") as f:
-        pickle.dump(model, f)
+    save_pickle(model, "models/svd_model.pkl")
     print("✅ Model saved to models/svd_model.pkl")
+    registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+    training = training_record(gs, full_trainset, source="ratings table", watermark=int(df["rating_id"].max()))
+    manifest = registry.publish(FactorScorer.from_svd(model), training=training, quantize=PRECISIONS)
+    registry.promote(manifest["version"])
+    print(f"✅ Model {manifest['version']} published to {settings.MODEL_REGISTRY_DIR} and promoted")
+
+
+def train_native_model(df):
+    """Same hyperparameters as train_surprise_model, trained by src/ml/mf.py (MODEL_TRAINER = sgd / als)."""
+    params = {"n_factors": 100, "reg_all": 0.05, "lr_all": 0.007, "random_state": 42, "solver": settings.MODEL_TRAINER}
+    print(f"\nCross-validating {settings.MODEL_TRAINER}...")
+    cv = cross_validate(params, df["userId"], df["movieId"], df["rating"], folds=3)
+    print(f"✅ CV RMSE: {cv['rmse']:.4f}")
+
+    print("\nTraining model...")
+    model = MatrixFactorization(**params).fit(df["userId"], df["movieId"], df["rating"])
+    print(f"✅ Model trained in {model.fit_seconds:.1f}s")
+    print(f"- Users: {len(model.user_ids)}")
+    print(f"- Movies: {len(model.item_ids)}")
+    print(f"- Ratings: {model.n_ratings}")
+    pred = model.predict(df["userId"].iloc[0], df["movieId"].iloc[0])
+    print(f"Test prediction: User {pred.uid}, Movie {pred.iid} → {pred.est:.2f}")
+
+    # no pickle: that is scikit-surprise's format, the registry artifact is all the API needs
+    registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+    training = fit_record(model, cv, source="ratings table", watermark=int(df["rating_id"].max()))
+    manifest = registry.publish(model.to_scorer(), training=training, quantize=PRECISIONS)
+    registry.promote(manifest["version"])
+    print(f"✅ Model {manifest['version']} published to {settings.MODEL_REGISTRY_DIR} and promoted")
+
+
+def train_model():
+    print("=== Starting model training ===")
+    # 1) Export ratings from DB
+    df = export_ratings_from_db()
+    
+    if df.empty:
+        print("⚠️ No ratings found. Using fallback initialization")
+        if settings.MODEL_TRAINER == "surprise":
+            from surprise import SVD
+            # Initialize empty model
+            model = SVD(n_factors=100, reg_all=0.05, lr_all=0.007, random_state=42)
+            save_pickle(model, "models/svd_model.pkl")
+            print("✅ Created empty model for cold start")
+        return
+    
+    print(f"✅ Exported {len(df)} ratings")
+    print(f"Sample data:\n{df.head(2)}")
+
+    if settings.MODEL_TRAINER == "surprise":
+        train_surprise_model(df)
+    else:
+        train_native_model(df)
 
     # 7) Compute popularity fallback
     print("\nComputing popularity rankings...")
@@ -0,0 +1,67 @@
+# scripts/update_model.py
+"""
+Teach the champion the ratings submitted since it was trained, as a new model version.
+
+    PYTHONPATH=. python scripts/update_model.py                 # once, e.g. from cron
+    PYTHONPATH=. python scripts/update_model.py --every 300     # periodic job
+    PYTHONPATH=. python scripts/update_model.py --guard         # also compare with a full retrain
+
+Reads the ratings above the champion's rating_id watermark, applies a few
+SGD epochs to the users and movies they touch (src/ml/online.py), publishes
+the result to the registry and promotes it unless it does worse on a
+holdout of the new ratings than the champion or, with ``--guard``, a full
+retrain (see src/services/online_updater.py). The API can run the same job
+itself with ONLINE_UPDATE_SECONDS.
+"""
+import argparse
+import asyncio
+import sys
+
+from src.core.config import settings
+from src.database.session import AsyncSessionLocal, dispose_engines
+from src.ml.registry import ModelRegistry
+from src.services.online_updater import OnlineUpdater, describe
+
+
+async def run(updater: OnlineUpdater, guard: bool, every: float) -> None:
+    try:
+        while True:
+            async with AsyncSessionLocal() as db:
+                done = await updater.update(db, guard=guard)
+            if done is None:
+                print(f"✅ Fewer than {updater.min_ratings} new ratings (or another update is running), nothing to do")
+            else:
+                print(describe(done))
+            if every <= 0:
+                return
+            await asyncio.sleep(every)
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registry", default=settings.MODEL_REGISTRY_DIR)
+    parser.add_argument("--guard", action="store_true", help="compare with a full retrain on the holdout (slow)")
+    parser.add_argument("--every", type=float, default=0, help="repeat every this many seconds (0 = run once)")
+    parser.add_argument("--min-ratings", type=int, default=settings.ONLINE_MIN_RATINGS)
+    args = parser.parse_args()
+
+    updater = OnlineUpdater(
+        ModelRegistry(args.registry),
+        min_ratings=args.min_ratings,
+        max_ratings=settings.ONLINE_MAX_RATINGS,
+        n_epochs=settings.ONLINE_EPOCHS,
+        lr=settings.ONLINE_LR,
+        reg=settings.ONLINE_REG,
+        holdout=settings.ONLINE_HOLDOUT,
+        tolerance=settings.ONLINE_DRIFT_TOLERANCE,
+    )
+    try:
+        asyncio.run(run(updater, args.guard, args.every))
+    except ValueError as exc:
+        sys.exit(f"❌ {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``group`` optionally maps a key to a group (e.g. the user id of a
+    ``(user_id, model_version, n)`` key) so every entry of that group can be
+    dropped at once with :meth:`invalidate_group`.
+
+    The cache lives in one process: with several workers an invalidation only
+    reaches the worker that saw the write, so ``ttl`` is also the upper bound
+    on staleness everywhere else.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        group: Callable[[Hashable], Hashable] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._group = group
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._groups: dict[Hashable, set] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # ── lookups ────────────────────────────────────────────
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            elif self._group is not None:
+                self._groups.setdefault(self._group(key), set()).add(key)
+            self._data[key] = (self._clock() + self.ttl, value)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    # ── invalidation ───────────────────────────────────────
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_group(self, group: Hashable) -> None:
+        with self._lock:
+            for key in self._groups.pop(group, ()):
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+            self._groups.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    # caller holds the lock
+    def _remove(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        if self._group is not None:
+            group = self._group(key)
+            keys = self._groups.get(group)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._groups[group]
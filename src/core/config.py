@@ -5,9 +5,114 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Movie Recommender"
     JWT_ALGORITHM: str = "HS256"
     DATABASE_URI: str
+    # Async driver URI for the request path; derived from DATABASE_URI when unset
+    ASYNC_DATABASE_URI: str | None = None
+    # Optional read replica (same URI style as DATABASE_URI) for @read_only service methods
+    READ_REPLICA_URI: str | None = None
+    # Request-path connection pools, per engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = False
+    REPLICA_POOL_SIZE: int = 10
+    REPLICA_MAX_OVERFLOW: int = 20
+    REPLICA_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: float = 30.0
+    # Run Base.metadata.create_all at start-up (dev / test without alembic)
+    CREATE_TABLES: bool = False
+    # Build the fallback list and catalog mapping before /readyz reports ready
+    WARM_UP: bool = True
+    # /readyz gives up on a database ping after this long
+    READYZ_DB_TIMEOUT_SECONDS: float = 2.0
     JWT_SECRET_KEY: str
     TMDB_API_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Password hashing: bcrypt cost, worker processes, jobs allowed to wait before
+    # sign-ups / logins get 503 + Retry-After
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 2
+    BCRYPT_QUEUE_SIZE: int = 32
+    BCRYPT_RETRY_AFTER_SECONDS: int = 1
+    # Users behind valid tokens cached per worker; a deactivation elsewhere is
+    # seen after at most the TTL
+    AUTH_USER_CACHE_SIZE: int = 10_000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    # Trainer of scripts/train_model.py and train_retrain_model.py: "surprise"
+    # (scikit-surprise SVD) or the built-in NumPy "sgd" / "als" (src/ml/mf.py)
+    MODEL_TRAINER: str = "surprise"
+    # Versioned models (scripts/model_registry.py); its serving.json picks the
+    # champion and an optional A/B challenger. Without it: models/svd_factors
+    MODEL_REGISTRY_DIR: str = "models/registry"
+    # Workers check the model files this often and swap in a new model without a
+    # restart; 0 = only on POST /admin/model/reload
+    MODEL_WATCH_SECONDS: float = 10.0
+    # Incremental updates between full retrains (services/online_updater.py): ratings
+    # with a rating_id above the champion's watermark get ONLINE_EPOCHS of SGD and
+    # become a new, promoted registry version. API workers run it every
+    # ONLINE_UPDATE_SECONDS (0 = off; run scripts/update_model.py from cron instead)
+    # once at least ONLINE_MIN_RATINGS are new, at most ONLINE_MAX_RATINGS per run
+    ONLINE_UPDATE_SECONDS: float = 0.0
+    ONLINE_MIN_RATINGS: int = 100
+    ONLINE_MAX_RATINGS: int = 100_000
+    ONLINE_EPOCHS: int = 5
+    ONLINE_LR: float = 0.007
+    ONLINE_REG: float = 0.05
+    # Share of the new ratings held out to check an update: it is published but not
+    # promoted when its holdout RMSE is worse than the champion's (or, with
+    # scripts/update_model.py --guard, a full retrain's) by more than the tolerance
+    ONLINE_HOLDOUT: float = 0.1
+    ONLINE_DRIFT_TOLERANCE: float = 0.01
+    # Shared secret for /admin/* (X-Admin-Token header); unset disables those routes
+    ADMIN_TOKEN: str | None = None
+    # Lists probed in the IVF index per recommendation; 0 = exact full scan.
+    # Pick it with scripts/benchmark_ann.py.
+    ANN_NPROBE: int = 0
+    # Item factors the full-catalog scan reads: "float32" (exact), "float16" or "int8".
+    # Reduced precision ranks with the smaller copy and re-ranks the best
+    # QUANTIZED_RERANK × N candidates in float32; pick it with scripts/benchmark_quantized.py.
+    SCORING_PRECISION: str = "float32"
+    QUANTIZED_RERANK: int = 4
+    # Per-user top-N cache (LRU + TTL); size 0 disables it
+    RECS_CACHE_SIZE: int = 10_000
+    RECS_CACHE_TTL_SECONDS: float = 300.0
+    # Serve user_recommendations rows (scripts/batch_recommend.py) when they match the loaded model
+    SERVE_PRECOMPUTED_RECS: bool = True
+    # Catalog movies the model never saw: "skip" them or score them with biases only ("bias")
+    UNKNOWN_ITEM_POLICY: str = "skip"
+    # The movies ↔ model mapping is rebuilt on model load and after this many seconds
+    CATALOG_REFRESH_SECONDS: float = 600.0
+    # In-memory user → rated-movies index is re-seeded from `ratings` this often by a
+    # background task (each worker only sees its own writes in between; 0 = never)
+    RATING_INDEX_REFRESH_SECONDS: float = 300.0
+    # Users missing from the model get a vector solved from their ratings (see ml/foldin.py)
+    FOLD_IN_MIN_RATINGS: int = 5
+    FOLD_IN_REG: float = 0.05
+    FOLD_IN_CACHE_SIZE: int = 10_000
+    # POST /admin/recommendations/batch: max user ids per call, users per matrix product
+    RECS_BATCH_MAX_USERS: int = 500
+    RECS_BATCH_BLOCK: int = 64
+    # POST /movies/ratings/bulk: max ratings per call (one INSERT statement)
+    RATINGS_BULK_MAX: int = 500
+    # Write-behind ratings: POST /movies/ratings[/bulk] answer 202 once queued and a
+    # background task upserts the queue every RATINGS_FLUSH_ROWS rows or
+    # RATINGS_FLUSH_SECONDS. More than RATINGS_BUFFER_MAX queued → 503. Set
+    # RATINGS_LOG_DIR for an fsync'd per-worker log replayed at start-up
+    # (without it a crash loses what is still queued)
+    RATINGS_WRITE_BEHIND: bool = False
+    RATINGS_BUFFER_MAX: int = 50_000
+    RATINGS_FLUSH_ROWS: int = 1000
+    RATINGS_FLUSH_SECONDS: float = 0.5
+    RATINGS_LOG_DIR: str | None = None
+    # GET /movies/: default and max page size, rows fetched per round trip when streaming
+    MOVIES_PAGE_SIZE: int = 100
+    MOVIES_PAGE_MAX: int = 1000
+    MOVIES_STREAM_CHUNK: int = 1000
+    # Ranked top_movies list cached in-process; reloaded when the training scripts
+    # bump the marker file (checked at most every TOP_MOVIES_CHECK_SECONDS)
+    TOP_MOVIES_VERSION_FILE: str = "models/top_movies.version"
+    TOP_MOVIES_CACHE_SIZE: int = 1000
+    TOP_MOVIES_CHECK_SECONDS: float = 5.0
+    # Threads that run NumPy scoring / fold-in off the event loop
+    SCORING_THREADS: int = 4
 
     class Config:
         env_file = ".env"  # Tells Pydantic to load from .env
@@ -1,13 +1,17 @@
 # utils/security.py
+import asyncio
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 import jwt
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta, timezone
 from fastapi.security import OAuth2PasswordBearer
 from .config import  settings
+from .metrics import REGISTRY
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -15,6 +19,67 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+# ── bcrypt worker pool ────────────────────────────────────
+BCRYPT_JOBS = REGISTRY.gauge("bcrypt_jobs", "bcrypt jobs accepted and not finished", ("state",))
+BCRYPT_REJECTED = REGISTRY.counter("bcrypt_rejected_total", "bcrypt jobs refused with 503 because the queue was full")
+
+
+class BcryptPool:
+    """
+    bcrypt in a few worker processes, with a bounded backlog.
+
+    Each hash costs hundreds of ms of pure CPU; in the request threadpool a
+    login spike would occupy every slot and stall unrelated requests. Here
+    at most ``workers`` hashes run at once and ``queue_size`` more wait;
+    anything beyond that is answered with 503 + ``Retry-After`` at once.
+    The processes are spawned on first use (not at import, and not forked
+    from a process that already runs threads).
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0   # accepted, not finished; touched only from the event loop
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self._pending >= self.workers + self.queue_size:
+            BCRYPT_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-ins in progress, retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._pending += 1
+        self._update_metrics()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self._update_metrics()
+
+    def _update_metrics(self) -> None:
+        BCRYPT_JOBS.set(min(self._pending, self.workers), state="running")
+        BCRYPT_JOBS.set(max(self._pending - self.workers, 0), state="queued")
+
+
+bcrypt_pool = BcryptPool(settings.BCRYPT_WORKERS, settings.BCRYPT_QUEUE_SIZE, settings.BCRYPT_RETRY_AFTER_SECONDS)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     """Generate a JWT access token with optional expiration."""
     to_encode = data.copy()
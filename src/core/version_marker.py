@@ -0,0 +1,28 @@
+import os
+import time
+import uuid
+from pathlib import Path
+
+
+def bump_version(path: str | os.PathLike) -> str:
+    """Write a fresh version token to ``path`` (atomically) and return it.
+
+    Called by whatever rewrites the data the marker stands for (e.g. the
+    training scripts after refilling ``top_movies``); readers compare tokens
+    with :func:`read_version` to know when their in-process copy is stale.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(version + "\n")
+    os.replace(tmp, path)
+    return version
+
+
+def read_version(path: str | os.PathLike) -> str | None:
+    """Current token in ``path``, or None if the marker was never written."""
+    try:
+        return Path(path).read_text().strip() or None
+    except FileNotFoundError:
+        return None
@@ -1,17 +1,15 @@
 from typing import Annotated
 
 from fastapi import Depends
-from .session import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from .session import AsyncSessionLocal
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
-def get_db():
-     
-    db = SessionLocal()
-    try:
+async def get_db():
+    # scripts keep using the blocking SessionLocal; requests get an AsyncSession
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-DbSession = Annotated[SessionLocal, Depends(get_db)]
+DbSession = Annotated[AsyncSession, Depends(get_db)]
@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import functools
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from ..core.config import settings
+from ..core.metrics import REGISTRY
 
 # Create the engine for PostgreSQL using the URI from settings
 engine = create_engine(
@@ -15,3 +22,165 @@ SessionLocal = sessionmaker(
     autoflush=False,
     bind=engine
 )
+
+
+# ── async engine (request path) ───────────────────────────
+# Same database, async driver: postgresql → asyncpg, sqlite → aiosqlite.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_uri(uri: str) -> str:
+    url = make_url(uri)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()!r}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+# ── pools ─────────────────────────────────────────────────
+POOL_CHECKOUT = REGISTRY.histogram(
+    "db_pool_checkout_seconds", "Time to get a connection from the pool (waiting + connecting)", ("engine",)
+)
+POOL_CONNECTIONS = REGISTRY.gauge("db_pool_connections", "Connections per pool", ("engine", "state"))
+
+
+def _timed_pool(label: str):
+    """AsyncAdaptedQueuePool that reports how long each checkout took."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return AsyncAdaptedQueuePool._do_get(self)
+        finally:
+            POOL_CHECKOUT.observe(time.perf_counter() - t0, engine=label)
+
+    # label lives on the class: Pool.recreate() only copies constructor arguments
+    return type(f"TimedPool_{label}", (AsyncAdaptedQueuePool,), {"_do_get": _do_get})
+
+
+def _create_async_engine(uri: str, label: str, pool_size: int, max_overflow: int, pre_ping: bool):
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # in-memory SQLite gets a StaticPool; queue settings don't apply
+        return create_async_engine(url)
+    return create_async_engine(
+        url,
+        poolclass=_timed_pool(label),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=pre_ping,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+
+async_engine = _create_async_engine(
+    settings.ASYNC_DATABASE_URI or async_database_uri(settings.DATABASE_URI),
+    "primary",
+    settings.DB_POOL_SIZE,
+    settings.DB_MAX_OVERFLOW,
+    settings.DB_POOL_PRE_PING,
+)
+# Reads go to the replica when one is configured, else to the primary
+async_read_engine = (
+    _create_async_engine(
+        async_database_uri(settings.READ_REPLICA_URI),
+        "replica",
+        settings.REPLICA_POOL_SIZE,
+        settings.REPLICA_MAX_OVERFLOW,
+        settings.REPLICA_POOL_PRE_PING,
+    )
+    if settings.READ_REPLICA_URI
+    else async_engine
+)
+
+
+# ── SQLite foreign keys ───────────────────────────────────
+# SQLite ignores REFERENCES unless each connection turns enforcement on;
+# without it a rating of an unknown movie is stored instead of a 404
+def _enforce_foreign_keys(dbapi_connection, _record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+for _engine in (engine, async_engine.sync_engine, async_read_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _enforce_foreign_keys)
+
+
+@REGISTRY.collector
+def _collect_pool_metrics() -> None:
+    engines = {"primary": async_engine}
+    if async_read_engine is not async_engine:
+        engines["replica"] = async_read_engine
+    for label, eng in engines.items():
+        pool = eng.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        POOL_CONNECTIONS.set(pool.checkedout(), engine=label, state="in_use")
+        POOL_CONNECTIONS.set(pool.checkedin(), engine=label, state="idle")
+        # connections opened beyond pool_size (bounded by max_overflow)
+        POOL_CONNECTIONS.set(max(pool.overflow(), 0), engine=label, state="overflow")
+
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
+# ── read / write routing ──────────────────────────────────
+class RoutingSession(Session):
+    """
+    Sends reads to the replica and everything else to the primary.
+
+    A session routes to the replica only while ``info["read_only"]`` is set
+    (see :func:`read_only`) and it is not flushing, so an unmarked code path
+    can never write to — or read stale data from — the replica by accident.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("read_only") and not self._flushing:
+            return async_read_engine.sync_engine
+        return async_engine.sync_engine
+
+
+def read_only(method):
+    """Run an async service method's queries (``self.db``) against the read replica.
+
+    Replicas lag: don't use it on paths that must see the caller's own
+    just-committed writes (mark those :func:`primary`).
+    """
+    return _routed(method, read_only=True)
+
+
+def primary(method):
+    """Run a method's queries against the primary, even when called from a :func:`read_only` one.
+
+    For reads that must see writes just committed, such as a user's own
+    ratings right after they rate.
+    """
+    return _routed(method, read_only=False)
+
+
+def _routed(method, read_only: bool):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        info = self.db.info
+        previous = info.get("read_only", False)
+        info["read_only"] = read_only
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            info["read_only"] = previous
+
+    return wrapper
+
+
+# expire_on_commit=False: ORM rows returned from a route must stay readable
+# after commit without an implicit (and, under asyncio, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
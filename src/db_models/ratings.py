@@ -1,11 +1,17 @@
-from sqlalchemy import Column, ForeignKey, Integer, Float, String
+from sqlalchemy import Column, ForeignKey, Integer, Float, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
 from ..database.base import Base
 
 class Ratings(Base):
     __tablename__ = "ratings"
+    __table_args__ = (
+        # one rating per user and movie; target of the ON CONFLICT upsert
+        UniqueConstraint("user_id", "movie_id", name="uq_ratings_user_movie"),
+    )
     rating_id = Column(Integer, primary_key=True, index=True)
-    movie_id = Column(Integer,  ForeignKey("users.id"), nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("movies.movie_id"), nullable=False, index=True)
+    movie_id = Column(Integer, ForeignKey("movies.movie_id", ondelete="CASCADE"), nullable=False, index=True)
+    # no index of its own: uq_ratings_user_movie leads with user_id
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     rating = Column(Float, nullable=False)
     rating_date = Column(String, nullable=False)
 
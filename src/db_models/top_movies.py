@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float
+from sqlalchemy import Column, Index, Integer, Float
 from ..database.base import Base
 
 class TopMovies(Base):
@@ -8,5 +8,10 @@ class TopMovies(Base):
     mean_rating = Column(Float, nullable=False)
     rating_count = Column(Integer, nullable=False)
 
+    __table_args__ = (
+        # ORDER BY mean_rating DESC, movie_id ... LIMIT n reads the first n entries
+        Index("ix_top_movies_mean_rating_desc", mean_rating.desc(), movie_id),
+    )
+
     def __repr__(self):
         return f"TopMovies(movie_id={self.movie_id}, mean_rating={self.mean_rating}, rating_count={self.rating_count})"
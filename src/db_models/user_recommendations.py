@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, Integer, String
+from ..database.base import Base
+
+class UserRecommendations(Base):
+    """Top-K lists materialised offline by scripts/batch_recommend.py."""
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(String, primary_key=True)          # raw model user id (str of users.id)
+    rank = Column(Integer, primary_key=True)            # 0 = best
+    movie_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    model_version = Column(String, nullable=False, index=True)
+    created_at = Column(String, nullable=False)
+
+    def __repr__(self):
+        return f"UserRecommendations(user_id={self.user_id}, rank={self.rank}, movie_id={self.movie_id}, score={self.score}, model_version={self.model_version})"
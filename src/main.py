@@ -1,33 +1,75 @@
-from datetime import datetime, timezone
-import os
-from fastapi import FastAPI, HTTPException
-import pickle
-import pandas as pd
-from sqlalchemy import DateTime
-
- 
-from .services.movies import  MovieService
-from .routers import auth, movies
-from .database.session import engine
-from .database.base import Base, DbSession, get_db
-from .schemas.user import UserCreate,  UserResponse
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
+from sqlalchemy import text
+
+from .services.movies import  MovieService, model_manager, online_updater, rating_buffer
+from .core.config import settings
+from .core.metrics import CONTENT_TYPE, REGISTRY
+from .core.security import bcrypt_pool
+from .routers import admin, auth, movies
+from .database.session import AsyncSessionLocal, async_engine, async_read_engine, dispose_engines
+from .database.base import Base
+# registered on Base.metadata for CREATE_TABLES
 from .db_models.users import User
 from .db_models.ratings import Ratings
 from .db_models.movies import Movies
 
 
-# Create all tables if not using migrations (for dev/test)
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Movie Recommender")
-
-@app.on_event("startup")
-def preload():
-   MovieService.preload_model()  # <── load SVD into memory
-
+# ── start-up / shutdown ───────────────────────────────────
+async def load_and_warm_up() -> None:
+   """Everything /readyz waits for; runs after the app already answers /healthz."""
+   try:
+      await asyncio.to_thread(MovieService.preload_model)  # <── load SVD into memory
+      async with AsyncSessionLocal() as db:
+         await MovieService.preload_ratings(db)  # <── user → rated movies for exclusion / cold start
+         if settings.WARM_UP:
+            await MovieService(db).warm_up()  # <── fallback list + catalog mapping before the first request
+   except Exception as exc:
+      print(f"❌ Start-up failed, /readyz stays 503: {exc!r}")
+      raise
+   print("✅  Ready to serve recommendations")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+   if settings.CREATE_TABLES:
+      # dev / test only; real databases are migrated with alembic
+      async with async_engine.begin() as conn:
+         await conn.run_sync(Base.metadata.create_all)
+   if settings.RATINGS_WRITE_BEHIND:
+      await rating_buffer.start()  # <── replays ratings logged by a crashed worker first
+   app.state.startup = asyncio.create_task(load_and_warm_up(), name="startup")
+   tasks = [app.state.startup]
+   if settings.MODEL_WATCH_SECONDS > 0:
+      # swaps in models written after start-up (train_model / train_retrain_model) without a restart
+      tasks.append(asyncio.create_task(model_manager.watch(settings.MODEL_WATCH_SECONDS), name="model-watch"))
+   if settings.RATING_INDEX_REFRESH_SECONDS > 0:
+      # picks up other workers' ratings; requests keep the current index while it rebuilds
+      tasks.append(asyncio.create_task(
+         MovieService.watch_ratings(settings.RATING_INDEX_REFRESH_SECONDS, AsyncSessionLocal), name="rating-index"
+      ))
+   if settings.ONLINE_UPDATE_SECONDS > 0:
+      # learns from new ratings between full retrains; one worker at a time, the rest skip
+      tasks.append(asyncio.create_task(
+         online_updater.watch(settings.ONLINE_UPDATE_SECONDS, AsyncSessionLocal), name="online-update"
+      ))
+   try:
+      yield
+   finally:
+      for task in tasks:
+         task.cancel()
+      await rating_buffer.stop()  # flushes what is still queued
+      await dispose_engines()
+      bcrypt_pool.shutdown()
+
+
+app = FastAPI(title="Movie Recommender", lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(movies.router)
+app.include_router(admin.router)
  
 # Include the auth router
 # app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -37,6 +79,60 @@ def read_root():
     return {"message": "Welcome to My Netflix Clone!"}
 
 
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and its event loop answers."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz(response: Response):
+    """Readiness: model loaded, caches warm and the database reachable; 503 until then."""
+    startup = app.state.startup
+    checks = {
+        "startup": _task_state(startup),
+        "model": model_manager.current.version is not None,
+        "rating_index": MovieService._ratings is not None,
+        "database": await _databases_reachable(),
+    }
+    if settings.WARM_UP:
+        checks["top_movies"] = MovieService._top is not None
+    ready = all(value is True for value in checks.values())
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ready else "starting", "checks": checks}
+
+
+def _task_state(task: asyncio.Task) -> bool | str:
+    if not task.done():
+        return "running"
+    if task.cancelled():
+        return "cancelled"
+    return True if task.exception() is None else f"failed: {task.exception()!r}"
+
+
+async def _databases_reachable() -> bool:
+    async def ping(engine) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    engines = {async_engine, async_read_engine}
+    try:
+        await asyncio.wait_for(asyncio.gather(*(ping(e) for e in engines)), settings.READYZ_DB_TIMEOUT_SECONDS)
+    except Exception:
+        return False
+    return True
+
+
+# cache / rating-index gauges are read at scrape time
+REGISTRY.collector(MovieService.collect_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of this worker's counters and histograms."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 # @app.post("/users", response_model=UserResponse)
 # def create_user(payload: UserCreate, db: DbSession):  # type: ignore
 #     # Check if email already exists
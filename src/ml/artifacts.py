@@ -0,0 +1,221 @@
+"""
+Compact on-disk format for the serving factors.
+
+    models/svd_factors/
+        manifest.json        global mean, rating scale, shapes, version
+        pu.npy  bu.npy       user factors / biases   (float32, rows = user_ids)
+        qi.npy  bi.npy       item factors / biases   (float32, rows = item_ids)
+        user_ids.npy         sorted raw user ids     (fixed-width unicode)
+        item_ids.npy         sorted movie ids        (int64)
+        ivf_*.npy            optional approximate top-N index (see ivf.py)
+        qi_float16.npy ...   optional reduced-precision qi for the scan (see quantize.py)
+
+Every array is a plain ``.npy`` so the server can ``np.load(mmap_mode="r")``
+them: start-up does no parsing and all uvicorn workers on a host share the
+same page-cache pages instead of each unpickling a private ``SVD``/``Trainset``.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, TypeVar
+
+import numpy as np
+
+from .ivf import IVFIndex
+from .quantize import QuantizedFactors
+from .scoring import FactorScorer
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+ARRAYS = ("pu", "qi", "bu", "bi", "user_ids", "item_ids")
+
+T = TypeVar("T")
+
+
+def save_artifact(
+    scorer: FactorScorer,
+    path: str | os.PathLike,
+    dtype=np.float32,
+    ivf_lists: int | None = 0,
+    training: dict | None = None,
+    quantize: tuple[str, ...] = (),
+) -> dict:
+    """Write ``scorer`` to ``path`` and return its manifest.
+
+    ``ivf_lists`` also builds an :class:`IVFIndex` with that many lists
+    (``None`` = √n_items, ``0`` = no index). ``training`` (params, CV
+    metrics, data size) is stored in the manifest as-is. ``quantize`` adds a
+    float16 and/or int8 copy of ``qi`` for the scoring scan.
+
+    The directory is written next to the target and moved into place in one
+    step (see :func:`_swap_into_place`), so a reader never sees a half-written
+    artifact or a missing one.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    arrays = {
+        "pu": np.ascontiguousarray(scorer.pu, dtype=dtype),
+        "qi": np.ascontiguousarray(scorer.qi, dtype=dtype),
+        "bu": np.ascontiguousarray(scorer.bu, dtype=dtype),
+        "bi": np.ascontiguousarray(scorer.bi, dtype=dtype),
+        "user_ids": np.asarray(scorer.user_ids, dtype=str),
+        "item_ids": np.asarray(scorer.item_ids, dtype=np.int64),
+    }
+    digest = hashlib.sha1()
+    for name in ARRAYS:
+        np.save(tmp / f"{name}.npy", arrays[name], allow_pickle=False)
+        digest.update(arrays[name].tobytes())
+
+    index = None
+    if ivf_lists != 0 and scorer.n_items:
+        index = IVFIndex.build(scorer, n_lists=ivf_lists)
+        index.save(tmp)
+    for precision in quantize:
+        QuantizedFactors.quantize(arrays["qi"], precision).save(tmp)
+
+    created_at = datetime.now(timezone.utc)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": f"{created_at:%Y%m%dT%H%M%SZ}-{digest.hexdigest()[:8]}",
+        "created_at": created_at.isoformat(),
+        "global_mean": scorer.global_mean,
+        "rating_scale": list(scorer.rating_scale),
+        "biased": scorer.biased,
+        "n_users": scorer.n_users,
+        "n_items": scorer.n_items,
+        "n_factors": int(arrays["qi"].shape[1]) if arrays["qi"].ndim == 2 else 0,
+        "dtype": np.dtype(dtype).name,
+        "ivf_lists": index.n_lists if index is not None else 0,
+        "quantized": list(quantize),
+        "training": training or {},
+    }
+    (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+    _swap_into_place(tmp, path, manifest["version"])
+    return manifest
+
+
+def _swap_into_place(tmp: Path, path: Path, version: str) -> None:
+    """
+    Make the finished directory ``tmp`` appear at ``path``.
+
+    A new ``path`` is a single rename. An existing one becomes a symlink into
+    ``.<name>.versions/`` and is switched with ``os.replace`` of a new link,
+    so it always resolves to a complete artifact, even after a crash. The
+    previous target is kept until the next export, so a load that resolved
+    the link just before the switch can still finish (see
+    :func:`load_artifact`); older ones are deleted (memory maps of them stay
+    valid). An artifact left as a plain directory by an older export is moved
+    into ``.<name>.versions/`` first, the one time that leaves ``path``
+    missing between two renames.
+    """
+    if not path.exists() and not path.is_symlink():
+        os.rename(tmp, path)
+        return
+    versions = path.with_name(f".{path.name}.versions")
+    versions.mkdir(exist_ok=True)
+    # unique even for the same model exported twice: the served target must never be reused
+    target = versions / f"{version}-{os.urandom(4).hex()}"
+    os.rename(tmp, target)
+
+    if path.is_symlink():
+        previous = path.parent / os.readlink(path)
+    else:
+        previous = versions / f"legacy-{os.getpid()}"
+        os.rename(path, previous)
+    link = path.with_name(f".{path.name}.link-{os.getpid()}")
+    if link.is_symlink():
+        link.unlink()
+    os.symlink(os.path.relpath(target, path.parent), link)
+    os.replace(link, path)
+
+    keep = {target.name, previous.resolve().name}
+    for old in versions.iterdir():
+        if old.name not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def export_model(
+    model,
+    path: str | os.PathLike,
+    dtype=np.float32,
+    ivf_lists: int | None = None,
+    training: dict | None = None,
+    quantize: tuple[str, ...] = (),
+) -> dict:
+    """Export a fitted ``surprise.SVD`` as a factor artifact (with an IVF index by default)."""
+    return save_artifact(
+        FactorScorer.from_svd(model), path, dtype=dtype, ivf_lists=ivf_lists, training=training, quantize=quantize
+    )
+
+
+def save_pickle(obj, path: str | os.PathLike) -> None:
+    """Pickle ``obj`` to ``path`` through a temp file and a rename, so the
+    model watcher never loads a half-written file."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with tmp.open("wb") as f:
+        pickle.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def read_manifest(path: str | os.PathLike) -> dict:
+    return json.loads((Path(path) / MANIFEST).read_text())
+
+
+def artifact_exists(path: str | os.PathLike) -> bool:
+    return (Path(path) / MANIFEST).is_file()
+
+
+def load_artifact(path: str | os.PathLike, mmap: bool = True) -> tuple[FactorScorer, dict]:
+    """Open an artifact written by :func:`save_artifact`.
+
+    With ``mmap=True`` (the default) the arrays are read-only memory maps, so
+    loading is O(1) and the pages are shared between processes. All files
+    come from the one version ``path`` resolves to (see :func:`load_resolved`).
+    """
+    return load_resolved(path, lambda real: _load_arrays(real, mmap))
+
+
+def load_resolved(path: str | os.PathLike, load: Callable[[Path], T], attempts: int = 3) -> T:
+    """
+    ``load(real)`` with ``real`` the version directory ``path`` points at now.
+
+    Reading every file through ``real`` instead of the symlink keeps an export
+    that switches it meanwhile from mixing two versions; if the export also
+    deleted ``real`` before the load finished, the load is repeated on the
+    new version.
+    """
+    path = Path(path)
+    for attempt in range(attempts):
+        real = path.resolve()
+        try:
+            return load(real)
+        except FileNotFoundError:
+            if attempt == attempts - 1 or path.resolve() == real:
+                raise
+    raise AssertionError("unreachable")
+
+
+def _load_arrays(path: Path, mmap: bool) -> tuple[FactorScorer, dict]:
+    manifest = read_manifest(path)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format_version')} in {path}")
+
+    mode = "r" if mmap else None
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in ARRAYS}
+    scorer = FactorScorer(
+        global_mean=manifest["global_mean"],
+        rating_scale=tuple(manifest["rating_scale"]),
+        biased=manifest["biased"],
+        **arrays,
+    )
+    return scorer, manifest
@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+
+from .scoring import FactorScorer
+
+UNKNOWN_ITEM_POLICIES = ("skip", "bias")
+
+
+class CatalogIndex:
+    """
+    The ``movies`` catalog aligned with the model: ``rows[i]`` is the ``qi`` row
+    of ``movie_ids[i]``, or -1 when the model was trained without that movie.
+
+    Built once per model load (and refreshed when it gets old, since
+    fetch_movies.py keeps adding movies), so candidate generation is plain
+    array work on inner indices instead of a str() + dict lookup per movie.
+    """
+
+    def __init__(self, movie_ids: np.ndarray, rows: np.ndarray):
+        self.movie_ids = movie_ids
+        self.rows = rows
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, movie_ids, scorer: FactorScorer) -> "CatalogIndex":
+        movie_ids = np.unique(np.asarray(movie_ids, dtype=np.int64))
+        return cls(movie_ids, scorer.item_index(movie_ids))
+
+    def __len__(self) -> int:
+        return len(self.movie_ids)
+
+    @property
+    def n_known(self) -> int:
+        return int((self.rows >= 0).sum())
+
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def contains(self, movie_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask: which of ``movie_ids`` are in the catalog."""
+        return np.isin(movie_ids, self.movie_ids, assume_unique=False)
+
+    def candidates(self, exclude: np.ndarray, policy: str = "skip") -> tuple[np.ndarray, np.ndarray]:
+        """
+        ``(movie_ids, qi rows)`` of the catalog minus ``exclude``.
+
+        ``policy`` decides what happens to movies the model doesn't know:
+        ``"skip"`` drops them, ``"bias"`` keeps them with row -1 so the scorer
+        gives them the bias-only estimate (what ``predict`` would have done).
+        """
+        if policy not in UNKNOWN_ITEM_POLICIES:
+            raise ValueError(f"Unknown item policy {policy!r}; expected one of {UNKNOWN_ITEM_POLICIES}")
+        mask = self.rows >= 0 if policy == "skip" else np.ones(len(self.rows), dtype=bool)
+        if len(exclude):
+            mask &= ~np.isin(self.movie_ids, exclude)
+        return self.movie_ids[mask], self.rows[mask]
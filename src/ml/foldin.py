@@ -0,0 +1,49 @@
+"""
+Fold-in of users the trained model has never seen.
+
+With the item factors fixed, a new user's ``(pu, bu)`` is the solution of a
+small ridge regression over the items they rated:
+
+    minimise  Σ (r_ui − μ − b_i − b_u − q_i·p_u)²  +  λ·n_u·(b_u² + ‖p_u‖²)
+
+i.e. one (k+1) × (k+1) linear solve — the same step ALS takes for every user,
+and the same per-rating regularisation SVD's SGD applies (``reg_all``).
+"""
+import numpy as np
+
+from .scoring import FactorScorer
+
+DEFAULT_REG = 0.05   # reg_all used by the training scripts
+
+
+def fold_in(
+    scorer: FactorScorer,
+    items: np.ndarray,
+    ratings: np.ndarray,
+    reg: float = DEFAULT_REG,
+) -> tuple[np.ndarray, float]:
+    """User vector and bias for ``ratings`` of ``items`` (``qi`` rows, unknown = -1 ignored)."""
+    items = np.asarray(items, dtype=np.int64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    known = items >= 0
+    items, ratings = items[known], ratings[known]
+    n_factors = scorer.qi.shape[1]
+    if len(items) == 0:
+        return np.zeros(n_factors), 0.0
+
+    # A = [q_i, 1]  →  x = [p_u, b_u]
+    a = np.empty((len(items), n_factors + 1), dtype=np.float64)
+    a[:, :n_factors] = scorer.qi[items]
+    a[:, n_factors] = 1.0
+    if scorer.biased:
+        y = ratings - scorer.global_mean - scorer.bi[items]
+    else:
+        # unbiased SVD predicts q_i·p_u alone
+        a, y = a[:, :n_factors], ratings
+
+    gram = a.T @ a
+    gram[np.diag_indices_from(gram)] += reg * len(items)
+    x = np.linalg.solve(gram, a.T @ y)
+    if not scorer.biased:
+        return x, 0.0
+    return x[:n_factors], float(x[n_factors])
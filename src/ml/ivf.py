@@ -0,0 +1,127 @@
+"""
+Approximate maximum-inner-product search over the item factors.
+
+A user's ranking only depends on ``bi + qi · pu`` (the global mean and user
+bias are constant per request), i.e. on the inner product of the augmented
+vectors ``[qi, bi]`` and ``[pu, 1]``. The index clusters the augmented item
+vectors with k-means (an "inverted file"); a query scores the centroids, keeps
+the ``nprobe`` best lists and scores exactly only the items in them.
+
+``nprobe`` is the recall/latency knob: ``nprobe == n_lists`` is an exact scan.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .scoring import FactorScorer, top_n
+
+FILES = ("ivf_centroids", "ivf_offsets", "ivf_items")
+
+
+def _augment(scorer: FactorScorer) -> np.ndarray:
+    qi = np.asarray(scorer.qi, dtype=np.float32)
+    bi = np.asarray(scorer.bi, dtype=np.float32)
+    return np.hstack([qi, bi[:, None]])
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+    """Nearest centroid (L2) for every row of ``x``, in bounded-memory blocks."""
+    c_norm = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), block):
+        xb = x[start:start + block]
+        out[start:start + block] = np.argmin(c_norm - 2.0 * (xb @ centroids.T), axis=1)
+    return out
+
+
+def kmeans(x: np.ndarray, k: int, n_iter: int = 20, seed: int = 42) -> np.ndarray:
+    """Plain Lloyd's k-means; returns ``(k, d)`` float32 centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(x, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=x[:, j], minlength=k) for j in range(x.shape[1])], axis=1)
+        empty = counts == 0
+        centroids[~empty] = (sums[~empty] / counts[~empty, None]).astype(centroids.dtype)
+        # re-seed empty lists from random points so every list stays useful
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """Inverted lists over the ``qi`` rows of a :class:`FactorScorer`.
+
+    ``items[offsets[l]:offsets[l + 1]]`` are the item rows assigned to list
+    ``l`` (CSR layout, so the whole index is three flat arrays).
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, items: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.items = items
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    # ── build / persist ────────────────────────────────────
+    @classmethod
+    def build(
+        cls,
+        scorer: FactorScorer,
+        n_lists: int | None = None,
+        n_iter: int = 20,
+        max_train_points: int = 256,
+        seed: int = 42,
+    ) -> "IVFIndex":
+        """Cluster the item factors. ``n_lists`` defaults to √n_items."""
+        x = _augment(scorer)
+        n_lists = n_lists or max(1, int(round(np.sqrt(len(x)))))
+        n_lists = min(n_lists, len(x))
+
+        # like faiss, train the centroids on a sample and then assign everything
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(x), n_lists * max_train_points)
+        sample = x[rng.choice(len(x), size=sample_size, replace=False)]
+        centroids = kmeans(sample, n_lists, n_iter=n_iter, seed=seed)
+
+        labels = _assign(x, centroids)
+        items = np.argsort(labels, kind="stable").astype(np.int64)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+        return cls(centroids.astype(np.float32), offsets, items)
+
+    def save(self, path: str | os.PathLike) -> None:
+        path = Path(path)
+        for name, arr in zip(FILES, (self.centroids, self.offsets, self.items)):
+            np.save(path / f"{name}.npy", arr, allow_pickle=False)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, mmap: bool = True) -> "IVFIndex | None":
+        """Open the index stored in an artifact directory, or None if it has none."""
+        path = Path(path)
+        if not all((path / f"{name}.npy").is_file() for name in FILES):
+            return None
+        mode = "r" if mmap else None
+        return cls(*(np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in FILES))
+
+    # ── query ──────────────────────────────────────────────
+    def candidates(self, pu: np.ndarray, nprobe: int) -> np.ndarray:
+        """Item rows in the ``nprobe`` lists whose centroids score best for user vector ``pu``."""
+        nprobe = min(max(nprobe, 1), self.n_lists)
+        query = np.append(np.asarray(pu, dtype=np.float32), np.float32(1.0))
+        lists = top_n(self.centroids @ query, nprobe)
+        return np.concatenate([self.items[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+    def search(self, scorer: FactorScorer, pu: np.ndarray, k: int, nprobe: int) -> np.ndarray:
+        """Approximate top-``k`` item rows for user vector ``pu``, best first.
+
+        Candidates are ranked by the unclipped ``bi + qi · pu``, i.e. the same
+        order as the exact scan before scores are clipped to the rating scale.
+        """
+        rows = self.candidates(pu, nprobe)
+        scores = scorer.bi[rows] + scorer.qi[rows] @ pu
+        return rows[top_n(scores, k)]
@@ -0,0 +1,310 @@
+"""
+Matrix factorization trained on plain NumPy arrays, without scikit-surprise.
+
+The model is ``surprise.SVD``'s:
+
+    r̂_ui = μ + b_u + b_i + q_i · p_u        (just q_i · p_u when biased=False)
+
+fitted on integer-indexed arrays (``np.unique`` of the raw ids, which is the
+sorted order :class:`FactorScorer` wants) instead of surprise's dict-of-lists
+``Trainset``, with one of two solvers:
+
+sgd  mini-batch SGD. Each step computes the errors of ``batch_size``
+     shuffled ratings at once and applies surprise's update rules to every
+     row they touch; updates to the same row within a batch are summed.
+als  alternating least squares. With the items fixed, every user's
+     ``[p_u, b_u]`` is an independent (k+1)-dimensional ridge regression —
+     the same solve as :func:`~.foldin.fold_in` — and vice versa. Rows are
+     solved in blocks on a thread pool (NumPy releases the GIL inside BLAS
+     and LAPACK). ``reg_all`` is scaled by the row's rating count, the
+     objective SGD's per-rating regularisation implies, so both solvers
+     take the same hyperparameters.
+
+:meth:`MatrixFactorization.predict` follows ``AlgoBase.predict`` (raw ids in,
+``est`` clipped to the rating scale, unknown users / items drop their terms),
+and :meth:`MatrixFactorization.to_scorer` hands the factors to the serving
+code like ``FactorScorer.from_svd`` does for a surprise model.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+from scipy import sparse
+
+from .scoring import RATING_SCALE, FactorScorer
+
+SOLVERS = ("sgd", "als")
+ALS_BLOCK = 256               # max rows per least-squares task on the thread pool
+ALS_BLOCK_RATINGS = 32_768    # max padded (rows × ratings) cells per task
+
+
+class Prediction(NamedTuple):
+    """Same fields as ``surprise.Prediction``."""
+    uid: object
+    iid: object
+    r_ui: float | None
+    est: float
+    details: dict
+
+
+def raw_item_ids(items) -> np.ndarray:
+    """Movie ids as int64; training data may hold them as floats or strings ("544.0")."""
+    return np.asarray(items, dtype=np.float64).astype(np.int64)
+
+
+class MatrixFactorization:
+    """Biased (or unbiased) SVD with surprise's hyperparameter names."""
+
+    def __init__(
+        self,
+        n_factors: int = 100,
+        n_epochs: int = 20,
+        biased: bool = True,
+        init_mean: float = 0.0,
+        init_std_dev: float = 0.1,
+        lr_all: float = 0.005,
+        reg_all: float = 0.02,
+        random_state: int | None = None,
+        solver: str = "sgd",
+        batch_size: int = 1024,
+        n_threads: int | None = None,
+    ):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}; expected one of {SOLVERS}")
+        self.n_factors = n_factors
+        self.n_epochs = n_epochs
+        self.biased = biased
+        self.init_mean = init_mean
+        self.init_std_dev = init_std_dev
+        self.lr_all = lr_all
+        self.reg_all = reg_all
+        self.random_state = random_state
+        self.solver = solver
+        self.batch_size = batch_size
+        self.n_threads = n_threads or os.cpu_count() or 1
+
+    def get_params(self) -> dict:
+        return {
+            "solver": self.solver, "n_factors": self.n_factors, "n_epochs": self.n_epochs, "biased": self.biased,
+            "lr_all": self.lr_all, "reg_all": self.reg_all, "init_std_dev": self.init_std_dev,
+            "batch_size": self.batch_size, "random_state": self.random_state,
+        }
+
+    # ── training ───────────────────────────────────────────
+    def fit(self, users, items, ratings, rating_scale: tuple[float, float] = RATING_SCALE) -> "MatrixFactorization":
+        """Fit on parallel arrays of raw user ids, movie ids and ratings."""
+        self.user_ids, u = np.unique(np.asarray(users).astype(str), return_inverse=True)
+        self.item_ids, i = np.unique(raw_item_ids(items), return_inverse=True)
+        r = np.asarray(ratings, dtype=np.float32)
+        self.rating_scale = (float(rating_scale[0]), float(rating_scale[1]))
+        self.n_ratings = len(r)
+        self.global_mean = float(r.mean()) if len(r) else 0.0
+
+        rng = np.random.default_rng(self.random_state)
+        k = self.n_factors
+        self.pu = rng.normal(self.init_mean, self.init_std_dev, (len(self.user_ids), k)).astype(np.float32)
+        self.qi = rng.normal(self.init_mean, self.init_std_dev, (len(self.item_ids), k)).astype(np.float32)
+        self.bu = np.zeros(len(self.user_ids), dtype=np.float32)
+        self.bi = np.zeros(len(self.item_ids), dtype=np.float32)
+
+        t0 = time.perf_counter()
+        if self.solver == "sgd":
+            self._sgd(u.astype(np.int64), i.astype(np.int64), r, rng)
+        else:
+            self._als(u.astype(np.int64), i.astype(np.int64), r)
+        self.fit_seconds = time.perf_counter() - t0
+        return self
+
+    def _sgd(self, u: np.ndarray, i: np.ndarray, r: np.ndarray, rng: np.random.Generator) -> None:
+        self.pu, self.bu, self.qi, self.bi = sgd_epochs(
+            self.pu, self.bu, self.qi, self.bi, u, i, r,
+            global_mean=self.global_mean, biased=self.biased, lr=self.lr_all, reg=self.reg_all,
+            n_epochs=self.n_epochs, batch_size=self.batch_size, rng=rng,
+        )
+
+    def _als(self, u: np.ndarray, i: np.ndarray, r: np.ndarray) -> None:
+        by_user = _Rows(u, i, r, len(self.user_ids))
+        by_item = _Rows(i, u, r, len(self.item_ids))
+        with ThreadPoolExecutor(self.n_threads) as pool:
+            for _ in range(self.n_epochs):
+                self._solve(pool, by_user, self.pu, self.bu, self.qi, self.bi)
+                self._solve(pool, by_item, self.qi, self.bi, self.pu, self.bu)
+
+    def _solve(self, pool, rows: "_Rows", x: np.ndarray, bx: np.ndarray, other: np.ndarray, b_other: np.ndarray) -> None:
+        """Every row of ``x`` / ``bx`` by ridge regression against the fixed ``other`` side."""
+        k = self.n_factors
+        # [q_i, 1] design rows, plus an all-zero row that pads short rows in a block
+        design = np.zeros((len(other) + 1, k + self.biased))
+        design[:-1, :k] = other
+        if self.biased:
+            design[:-1, k] = 1.0
+        target = np.append(rows.ratings - (self.global_mean + b_other[rows.cols] if self.biased else 0), 0.0)
+        pad = np.array([len(other), len(target) - 1])
+
+        def block(members: np.ndarray) -> None:
+            counts = rows.counts[members]
+            width = int(counts.max())
+            offsets = np.arange(width)
+            valid = offsets < counts[:, None]
+            at = np.where(valid, rows.indptr[members, None] + offsets, -1)
+            a = design[np.where(valid, rows.cols[at], pad[0])]            # (rows × width × d)
+            y = target[np.where(valid, at, pad[1])]                        # (rows × width)
+            ridge = self.reg_all * counts[:, None, None]
+            if width < a.shape[2]:
+                # fewer ratings than factors: solve the (width × width) dual system
+                gram = a @ a.transpose(0, 2, 1) + ridge * np.eye(width)
+                solved = np.einsum("rwd,rw->rd", a, np.linalg.solve(gram, y[..., None])[..., 0])
+            else:
+                gram = a.transpose(0, 2, 1) @ a + ridge * np.eye(a.shape[2])
+                solved = np.linalg.solve(gram, np.einsum("rwd,rw->rd", a, y)[..., None])[..., 0]
+            x[members] = solved[:, :k]
+            if self.biased:
+                bx[members] = solved[:, k]
+
+        list(pool.map(block, rows.blocks))
+
+    # ── prediction ─────────────────────────────────────────
+    def to_scorer(self) -> FactorScorer:
+        return FactorScorer(
+            global_mean=self.global_mean,
+            pu=self.pu, qi=self.qi, bu=self.bu, bi=self.bi,
+            user_ids=self.user_ids, item_ids=self.item_ids,
+            rating_scale=self.rating_scale, biased=self.biased,
+        )
+
+    def predict(self, uid, iid, r_ui: float | None = None, clip: bool = True, verbose: bool = False) -> Prediction:
+        """Rating estimate for raw ids, like ``AlgoBase.predict``."""
+        scorer = self.to_scorer()
+        user = scorer.user_index(uid)
+        try:
+            item = int(scorer.item_index(raw_item_ids([iid]))[0])
+        except ValueError:
+            item = -1
+        details = {"was_impossible": False}
+        if not self.biased and (user is None or item < 0):
+            details = {"was_impossible": True, "reason": "User and item are unknown."}
+        est = float(scorer.score(user, np.array([item]))[0]) if clip else self._unclipped(user, item)
+        prediction = Prediction(uid, iid, r_ui, est, details)
+        if verbose:
+            print(prediction)
+        return prediction
+
+    def _unclipped(self, user: int | None, item: int) -> float:
+        known_u, known_i = user is not None, item >= 0
+        if not self.biased:
+            return float(self.qi[item] @ self.pu[user]) if known_u and known_i else self.global_mean
+        est = self.global_mean + (self.bu[user] if known_u else 0) + (self.bi[item] if known_i else 0)
+        if known_u and known_i:
+            est += self.qi[item] @ self.pu[user]
+        return float(est)
+
+    def estimate(self, users, items) -> np.ndarray:
+        """Clipped estimates for parallel arrays of raw ids; ``predict`` without the per-call overhead."""
+        return self.to_scorer().estimate(users, raw_item_ids(items))
+
+def rmse(model: MatrixFactorization | FactorScorer, users, items, ratings) -> float:
+    ratings = np.asarray(ratings, dtype=np.float64)
+    return float(np.sqrt(np.mean((model.estimate(users, items) - ratings) ** 2)))
+
+
+def cross_validate(params: dict, users, items, ratings, folds: int = 3, seed: int = 42, **fit_kwargs) -> dict:
+    """K-fold RMSE of ``MatrixFactorization(**params)``, as the ``cv`` section of a manifest."""
+    users, items, ratings = np.asarray(users), np.asarray(items), np.asarray(ratings)
+    fold = np.random.default_rng(seed).permutation(len(ratings)) % folds
+    scores, seconds = [], []
+    for f in range(folds):
+        train, test = fold != f, fold == f
+        model = MatrixFactorization(**params).fit(users[train], items[train], ratings[train], **fit_kwargs)
+        scores.append(rmse(model, users[test], items[test], ratings[test]))
+        seconds.append(model.fit_seconds)
+    return {"folds": folds, "rmse": float(np.mean(scores)), "rmse_std": float(np.std(scores)), "fit_seconds": float(np.mean(seconds))}
+
+
+def sgd_epochs(
+    pu: np.ndarray, bu: np.ndarray, qi: np.ndarray, bi: np.ndarray,
+    u: np.ndarray, i: np.ndarray, r: np.ndarray,
+    *, global_mean: float, biased: bool, lr: float, reg: float, n_epochs: int, batch_size: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """``n_epochs`` of mini-batch SGD over ratings ``r`` of rows ``u`` × ``i``; returns new ``pu, bu, qi, bi``."""
+    k, lr = pu.shape[1], np.float32(lr)
+    # [p_u, b_u, 1] · [q_i, 1, b_i] = q_i · p_u + b_u + b_i: one gather, dot and
+    # scatter per side
+    users = _augment(pu, bu, biased, bias_first=False)
+    items = _augment(qi, bi, biased, bias_first=True)
+    # the columns holding the constant 1 get no update
+    fixed_user, fixed_item = (k + 1, k) if biased else (slice(0), slice(0))
+    mu = np.float32(global_mean if biased else 0)
+    shrink = np.float32(lr * reg)
+    for _ in range(n_epochs):
+        order = rng.permutation(len(r))
+        u_epoch, i_epoch, r_epoch = u[order], i[order], r[order]
+        for start in range(0, len(r), batch_size):
+            ub = u_epoch[start:start + batch_size]
+            ib = i_epoch[start:start + batch_size]
+            x, y = users[ub], items[ib]
+            err = r_epoch[start:start + batch_size] - mu - np.einsum("ij,ij->i", x, y)
+            err *= lr
+            # x += lr·(err·y − reg·x) and vice versa, both from the factors
+            # before the step, like surprise
+            step_x = y * err[:, None]
+            step_x -= shrink * x
+            step_x[:, fixed_user] = 0
+            step_y = x * err[:, None]
+            step_y -= shrink * y
+            step_y[:, fixed_item] = 0
+            _scatter_add(users, ub, step_x)
+            _scatter_add(items, ib, step_y)
+    if not biased:
+        return users.copy(), bu, items.copy(), bi
+    return users[:, :k].copy(), users[:, k].copy(), items[:, :k].copy(), items[:, k + 1].copy()
+
+
+class _Rows:
+    """Ratings grouped by row (CSR): ``cols[indptr[j]:indptr[j] + counts[j]]`` are row ``j``'s partners.
+
+    ``blocks`` splits the rows into solver tasks of similar rating counts, each
+    padded to at most ``ALS_BLOCK_RATINGS`` cells.
+    """
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, ratings: np.ndarray, n_rows: int):
+        order = np.argsort(rows, kind="stable")
+        self.cols = cols[order]
+        self.ratings = ratings[order].astype(np.float64)
+        self.counts = np.bincount(rows, minlength=n_rows)
+        self.indptr = np.zeros(n_rows, dtype=np.int64)
+        np.cumsum(self.counts[:-1], out=self.indptr[1:])
+        self.blocks = []
+        by_count = np.argsort(self.counts, kind="stable")
+        widths = self.counts[by_count]
+        start = 0
+        while start < n_rows:
+            # sorted by count, so a block is as wide as its last row
+            stop = start + 1
+            while stop - start < ALS_BLOCK and stop < n_rows and (stop - start + 1) * widths[stop] <= ALS_BLOCK_RATINGS:
+                stop += 1
+            self.blocks.append(by_count[start:stop])
+            start = stop
+
+
+def _augment(factors: np.ndarray, biases: np.ndarray, biased: bool, bias_first: bool, dtype=np.float32) -> np.ndarray:
+    """``[factors, bias, 1]`` (or ``[factors, 1, bias]``) rows; just the factors when unbiased."""
+    if not biased:
+        return factors.astype(dtype)
+    ones = np.ones(len(factors))
+    tail = (ones, biases) if bias_first else (biases, ones)
+    return np.column_stack((factors, *tail)).astype(dtype)
+
+
+def _scatter_add(target: np.ndarray, rows: np.ndarray, values: np.ndarray) -> None:
+    """``target[rows] += values`` with repeated rows summed (``np.add.at``, but fast)."""
+    order = np.argsort(rows, kind="stable")
+    rows = rows[order]
+    last = np.flatnonzero(np.r_[rows[1:] != rows[:-1], True])
+    indptr = np.r_[0, last + 1]
+    onehot = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=values.dtype), order, indptr), shape=(len(last), len(rows))
+    )
+    target[rows[last]] += onehot @ values
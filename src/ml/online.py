@@ -0,0 +1,91 @@
+"""
+Incremental updates of a trained model from ratings submitted after it.
+
+A full retrain refits every factor on every rating. Between two, an
+incremental update learns from just the new ratings:
+
+1. users and movies the model has never seen get rows: a new user is folded
+   in from their ratings of known movies (:func:`~.foldin.fold_in`), a new
+   movie starts with ``b_i = 0`` and small random ``q_i``, as in training
+2. a few epochs of the trainer's SGD (:func:`~.mf.sgd_epochs`) run over the
+   new ratings alone, on the rows they touch; every other row is copied as is
+
+``μ`` stays the one of the last full retrain, and a new rating only pulls on
+its own user and movie, so a chain of updates drifts from what a retrain on
+the same data would give. ``services/online_updater.py`` measures that on a
+holdout before promoting an update.
+"""
+import time
+
+import numpy as np
+
+from .foldin import fold_in
+from .mf import raw_item_ids, sgd_epochs
+from .scoring import FactorScorer
+
+
+def incremental_update(
+    scorer: FactorScorer,
+    users,
+    items,
+    ratings,
+    *,
+    lr: float = 0.007,
+    reg: float = 0.05,
+    n_epochs: int = 5,
+    batch_size: int = 256,
+    init_std_dev: float = 0.1,
+    random_state: int | None = None,
+) -> FactorScorer:
+    """A new scorer: ``scorer`` plus what the ratings of raw ``users`` × ``items`` teach it."""
+    users = np.asarray(users).astype(str)
+    items = raw_item_ids(items)
+    r = np.asarray(ratings, dtype=np.float32)
+    rng = np.random.default_rng(random_state)
+    k = scorer.qi.shape[1]
+
+    # ── rows for unseen users / movies (ids stay sorted) ──
+    user_ids = np.union1d(scorer.user_ids, users)
+    item_ids = np.union1d(scorer.item_ids, items)
+    old_users = np.searchsorted(user_ids, scorer.user_ids)
+    old_items = np.searchsorted(item_ids, scorer.item_ids)
+    pu = np.zeros((len(user_ids), k), dtype=np.float32)
+    bu = np.zeros(len(user_ids), dtype=np.float32)
+    qi = rng.normal(0, init_std_dev, (len(item_ids), k)).astype(np.float32)
+    bi = np.zeros(len(item_ids), dtype=np.float32)
+    pu[old_users], bu[old_users] = scorer.pu, scorer.bu
+    qi[old_items], bi[old_items] = scorer.qi, scorer.bi
+
+    u = np.searchsorted(user_ids, users)
+    i = np.searchsorted(item_ids, items)
+    known_items = scorer.item_index(items)
+    is_new = np.ones(len(user_ids), dtype=bool)
+    is_new[old_users] = False
+    rows = np.flatnonzero(is_new[u])
+    rows = rows[np.argsort(u[rows], kind="stable")]
+    if len(rows):
+        starts = np.flatnonzero(np.r_[True, u[rows][1:] != u[rows][:-1]])
+        for group in np.split(rows, starts[1:]):
+            pu[u[group[0]]], bu[u[group[0]]] = fold_in(scorer, known_items[group], r[group], reg)
+
+    # ── SGD on the touched rows only ──
+    touched_u, local_u = np.unique(u, return_inverse=True)
+    touched_i, local_i = np.unique(i, return_inverse=True)
+    pu[touched_u], bu[touched_u], qi[touched_i], bi[touched_i] = sgd_epochs(
+        pu[touched_u], bu[touched_u], qi[touched_i], bi[touched_i], local_u, local_i, r,
+        global_mean=scorer.global_mean, biased=scorer.biased, lr=lr, reg=reg,
+        n_epochs=n_epochs, batch_size=batch_size, rng=rng,
+    )
+    return FactorScorer(
+        global_mean=scorer.global_mean,
+        pu=pu, qi=qi, bu=bu, bi=bi,
+        user_ids=user_ids, item_ids=item_ids,
+        rating_scale=scorer.rating_scale, biased=scorer.biased,
+    )
+
+
+def timed_update(scorer: FactorScorer, users, items, ratings, **kwargs) -> tuple[FactorScorer, float]:
+    """:func:`incremental_update` and its latency in milliseconds per 1000 ratings."""
+    t0 = time.perf_counter()
+    updated = incremental_update(scorer, users, items, ratings, **kwargs)
+    return updated, (time.perf_counter() - t0) * 1e6 / max(len(ratings), 1)
@@ -0,0 +1,115 @@
+"""
+Reduced-precision copies of the item factors for the scoring scan.
+
+Ranking the catalog for one user is a single pass over ``qi``; once the
+catalog reaches hundreds of thousands of items that pass is bound by memory
+bandwidth, not arithmetic. ``save_artifact(quantize=...)`` therefore stores
+``qi`` a second time as
+
+    float16   qi_float16.npy                 2 bytes per value
+    int8      qi_int8.npy + qi_int8_scale.npy  1 byte per value + a float32
+                                             scale per item (symmetric,
+                                             ``qi[j] ≈ codes[j] * scale[j]``)
+
+The scan reads the small copy in cache-sized blocks, keeps the
+``rerank × n`` best candidates and re-ranks only those against the float32
+``qi``, so the scores served are exact and only which items make the top-N
+can differ. ``scripts/benchmark_quantized.py`` reports the memory, speed
+and recall@N / RMSE cost of each precision.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .scoring import FactorScorer, top_n
+
+PRECISIONS = ("float16", "int8")
+FILES = {"float16": ("qi_float16",), "int8": ("qi_int8", "qi_int8_scale")}
+BLOCK_ROWS = 4096  # rows gathered and widened to float32 at a time (stays in L2)
+
+
+class QuantizedFactors:
+    """``qi`` at reduced precision: ``codes`` (``n_items × k``) and, for int8, a per-item ``scale``."""
+
+    def __init__(self, precision: str, codes: np.ndarray, scale: np.ndarray | None = None):
+        self.precision = precision
+        self.codes = codes
+        self.scale = scale
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    # ── build / persist ────────────────────────────────────
+    @classmethod
+    def quantize(cls, qi: np.ndarray, precision: str) -> "QuantizedFactors":
+        qi = np.asarray(qi, dtype=np.float32)
+        if precision == "float16":
+            return cls(precision, qi.astype(np.float16))
+        if precision == "int8":
+            peak = np.abs(qi).max(axis=1) if qi.shape[1] else np.zeros(len(qi), dtype=np.float32)
+            scale = np.where(peak > 0, peak / 127, 1).astype(np.float32)
+            return cls(precision, np.rint(qi / scale[:, None]).astype(np.int8), scale)
+        raise ValueError(f"Unknown precision {precision!r}; expected one of {PRECISIONS}")
+
+    def save(self, path: str | os.PathLike) -> None:
+        path = Path(path)
+        arrays = (self.codes, self.scale) if self.scale is not None else (self.codes,)
+        for name, arr in zip(FILES[self.precision], arrays):
+            np.save(path / f"{name}.npy", arr, allow_pickle=False)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, precision: str, mmap: bool = True) -> "QuantizedFactors | None":
+        """Open the ``precision`` copy stored in an artifact directory, or None if it has none."""
+        path = Path(path)
+        names = FILES[precision]
+        if not all((path / f"{name}.npy").is_file() for name in names):
+            return None
+        mode = "r" if mmap else None
+        return cls(precision, *(np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in names))
+
+    # ── scoring ────────────────────────────────────────────
+    def dequantize(self) -> np.ndarray:
+        qi = self.codes.astype(np.float32)
+        return qi * self.scale[:, None] if self.scale is not None else qi
+
+    def dot(self, rows: np.ndarray, pu: np.ndarray) -> np.ndarray:
+        """Approximate ``qi[rows] · pu`` (float32, rows must be known items)."""
+        pu = np.asarray(pu, dtype=np.float32)
+        out = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            out[start:start + BLOCK_ROWS] = self.codes[block].astype(np.float32, copy=False) @ pu
+        if self.scale is not None:
+            out *= self.scale[rows]
+        return out
+
+
+def affinity(scorer: FactorScorer, rows: np.ndarray, pu: np.ndarray, dot) -> np.ndarray:
+    """The part of the predicted rating that differs between items, before clipping.
+
+    ``bi + qi · pu`` for known rows (just ``qi · pu`` for an unbiased model);
+    unknown rows (-1) get what :meth:`FactorScorer.score_with` gives them
+    relative to that, so ordering by it matches ordering by the score.
+    """
+    known = rows >= 0
+    out = np.full(len(rows), 0.0 if scorer.biased else scorer.global_mean, dtype=np.float32)
+    idx = rows[known]
+    out[known] = dot(idx, pu)
+    if scorer.biased:
+        out[known] += scorer.bi[idx]
+    return out
+
+
+def quantized_top_n(
+    scorer: FactorScorer, quantized: QuantizedFactors, pu: np.ndarray, rows: np.ndarray, n: int, rerank: int
+) -> np.ndarray:
+    """Positions in ``rows`` of the ``n`` best items for user vector ``pu``, best first.
+
+    Every row is ranked with the quantized factors; the ``rerank * n`` best are
+    ranked again with the float32 factors.
+    """
+    shortlist = top_n(affinity(scorer, rows, pu, quantized.dot), max(n, rerank * n))
+    exact = affinity(scorer, rows[shortlist], pu, lambda idx, pu: scorer.qi[idx] @ pu)
+    return shortlist[top_n(exact, n)]
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+
+
+class RatingIndex:
+    """
+    In-memory user → rated-movies structure (CSR) for exclusion and cold-start checks.
+
+    ``indices[indptr[r]:indptr[r + 1]]`` are the movie ids rated by user row
+    ``r``. New ratings go to a small append buffer that is merged into the CSR
+    arrays every ``compact_every`` writes, so ``add`` stays O(1) amortised and
+    no per-user Python containers are kept (just one dict slot per user for
+    key → row). Movie ids are int32 and counts are kept in their own array so
+    :meth:`count` is O(1).
+    """
+
+    def __init__(self, compact_every: int = 4096):
+        self.compact_every = compact_every
+        self._rows: dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.empty(0, dtype=np.int32)
+        self._counts = np.empty(0, dtype=np.int32)
+        self._pending_users = np.empty(compact_every, dtype=np.int32)
+        self._pending_items = np.empty(compact_every, dtype=np.int32)
+        self._n_pending = 0
+        self._lock = threading.Lock()
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple], compact_every: int = 4096) -> "RatingIndex":
+        """Build from ``(user_id, movie_id)`` rows, e.g. ``SELECT user_id, movie_id FROM ratings``."""
+        index = cls(compact_every)
+        users, items = [], []
+        for user_id, movie_id in pairs:
+            users.append(index._row(str(user_id)))
+            items.append(movie_id)
+        users = np.array(users, dtype=np.int64)
+        order = np.argsort(users, kind="stable")
+        index._indices = np.array(items, dtype=np.int32)[order]
+        index._counts = np.bincount(users, minlength=len(index._rows)).astype(np.int32)
+        index._indptr = np.zeros(len(index._rows) + 1, dtype=np.int64)
+        np.cumsum(index._counts, out=index._indptr[1:])
+        return index
+
+    # ── reads ──────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._indices) + self._n_pending
+
+    @property
+    def n_users(self) -> int:
+        return len(self._rows)
+
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def count(self, user_id) -> int:
+        row = self._rows.get(str(user_id))
+        return 0 if row is None else int(self._counts[row])
+
+    def rated(self, user_id) -> np.ndarray:
+        """Movie ids rated by ``user_id`` (int32, unordered)."""
+        with self._lock:
+            row = self._rows.get(str(user_id))
+            if row is None:
+                return np.empty(0, dtype=np.int32)
+            base = self._indices[self._indptr[row]:self._indptr[row + 1]] if row + 1 < len(self._indptr) else self._indices[:0]
+            n = self._n_pending
+            pending = self._pending_items[:n][self._pending_users[:n] == row]
+            return np.concatenate([base, pending]) if len(pending) else base.copy()
+
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (the user-key dict is reported separately by ``n_users``)."""
+        return sum(a.nbytes for a in (self._indptr, self._indices, self._counts, self._pending_users, self._pending_items))
+
+    # ── writes ─────────────────────────────────────────────
+    def add(self, user_id, movie_id: int) -> None:
+        with self._lock:
+            row = self._row(str(user_id))
+            if row >= len(self._counts):
+                self._counts = np.concatenate([self._counts, np.zeros(max(1024, len(self._counts) // 2), dtype=np.int32)])
+            self._pending_users[self._n_pending] = row
+            self._pending_items[self._n_pending] = movie_id
+            self._n_pending += 1
+            self._counts[row] += 1
+            if self._n_pending == self.compact_every:
+                self._compact()
+
+    # caller holds the lock (or owns the instance)
+    def _row(self, key: str) -> int:
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._rows)
+        return row
+
+    def _compact(self) -> None:
+        n_users = len(self._rows)
+        n = self._n_pending
+        users = np.concatenate([
+            np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int32), np.diff(self._indptr)),
+            self._pending_users[:n],
+        ])
+        order = np.argsort(users, kind="stable")
+        self._indices = np.concatenate([self._indices, self._pending_items[:n]])[order]
+        self._indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(np.bincount(users, minlength=n_users), out=self._indptr[1:])
+        self._n_pending = 0
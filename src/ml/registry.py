@@ -0,0 +1,230 @@
+"""
+Local model registry: every trained model kept as its own versioned artifact.
+
+    models/registry/
+        20250101T120000Z-1a2b3c4d/   factor artifact (see artifacts.py); its
+                                     manifest also records the training run
+        ...
+        serving.json                 champion, optional challenger and its
+                                     traffic share, promotion history
+
+The API serves what ``serving.json`` points at and notices changes within
+``MODEL_WATCH_SECONDS``, so promoting, rolling back or starting an A/B test
+only rewrites that one file (atomically). Manage it with
+``scripts/model_registry.py``.
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .artifacts import artifact_exists, read_manifest, save_artifact
+from .scoring import FactorScorer
+
+SERVING = "serving.json"
+
+
+def training_record(
+    gs, trainset, measure: str = "rmse", source: str | None = None, watermark: int | None = None
+) -> dict:
+    """The ``training`` section of a manifest, from a fitted surprise ``GridSearchCV`` and the final trainset.
+
+    ``watermark`` is the highest ``ratings.rating_id`` trained on, where
+    incremental updates (``services/online_updater.py``) continue from.
+    """
+    best = gs.best_index[measure]
+    results = gs.cv_results
+    return {
+        "algorithm": gs.algo_class.__name__,
+        "params": {k: getattr(v, "item", lambda: v)() for k, v in gs.best_params[measure].items()},
+        "cv": {
+            "folds": sum(key.startswith("split") and key.endswith(f"_test_{measure}") for key in results),
+            **{m: float(score) for m, score in gs.best_score.items()},
+            **{f"{m}_std": float(results[f"std_test_{m}"][gs.best_index[m]]) for m in gs.best_score},
+            "fit_seconds": float(results["mean_fit_time"][best]),
+        },
+        "data": {
+            "source": source,
+            "n_ratings": trainset.n_ratings,
+            "n_users": trainset.n_users,
+            "n_items": trainset.n_items,
+            "watermark": watermark,
+        },
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def fit_record(model, cv: dict, source: str | None = None, watermark: int | None = None) -> dict:
+    """The ``training`` section of a manifest, from a fitted :class:`~.mf.MatrixFactorization` and its ``cross_validate``."""
+    return {
+        "algorithm": type(model).__name__,
+        "params": model.get_params(),
+        "cv": cv,
+        "data": {
+            "source": source,
+            "n_ratings": model.n_ratings,
+            "n_users": len(model.user_ids),
+            "n_items": len(model.item_ids),
+            "watermark": watermark,
+        },
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def update_record(base: dict, scorer: FactorScorer, params: dict, check: dict, n_ratings: int, watermark: int) -> dict:
+    """The ``training`` section of a manifest, for an incremental update of the version with manifest ``base``."""
+    return {
+        "algorithm": "incremental",
+        "base": base["version"],
+        "params": params,
+        "cv": check,
+        "data": {
+            "source": "ratings table",
+            "n_ratings": n_ratings,
+            "n_users": scorer.n_users,
+            "n_items": scorer.n_items,
+            "watermark": watermark,
+        },
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class ModelRegistry:
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+
+    def path(self, version: str) -> Path:
+        return self.root / version
+
+    def versions(self) -> list[dict]:
+        """Manifests of every stored model, oldest first."""
+        if not self.root.is_dir():
+            return []
+        manifests = [
+            read_manifest(path) for path in self.root.iterdir()
+            if not path.name.startswith(".") and artifact_exists(path)
+        ]
+        # names start with the second they were created in; created_at breaks ties
+        return sorted(manifests, key=lambda m: (m["version"].split("-")[0], m.get("created_at", ""), m["version"]))
+
+    def champion_path(self, fallback: str | os.PathLike) -> Path:
+        """Directory of the served champion, or ``fallback`` when nothing was promoted yet."""
+        champion = self.serving()["champion"]
+        return self.path(champion) if champion else Path(fallback)
+
+    def serving(self) -> dict:
+        """Contents of ``serving.json``; no champion when nothing was promoted yet."""
+        try:
+            serving = json.loads((self.root / SERVING).read_text())
+        except FileNotFoundError:
+            serving = {}
+        return {"champion": None, "challenger": None, "challenger_share": 0.0, "history": [], **serving}
+
+    # ── writes ─────────────────────────────────────────────
+    def publish(
+        self,
+        scorer: FactorScorer,
+        training: dict | None = None,
+        ivf_lists: int | None = None,
+        dtype=np.float32,
+        quantize: tuple[str, ...] = (),
+    ) -> dict:
+        """Store ``scorer`` as a new version and return its manifest (it is not served until promoted)."""
+        incoming = self._incoming()
+        try:
+            manifest = save_artifact(scorer, incoming, dtype=dtype, ivf_lists=ivf_lists, training=training, quantize=quantize)
+            return self._move_in(incoming, manifest)
+        finally:
+            shutil.rmtree(incoming, ignore_errors=True)
+
+    def add_artifact(self, path: str | os.PathLike) -> dict:
+        """Copy an artifact exported elsewhere (e.g. ``models/svd_factors``) in under its own version."""
+        manifest = read_manifest(path)
+        if artifact_exists(self.path(manifest["version"])):
+            return manifest
+        incoming = self._incoming()
+        try:
+            shutil.copytree(path, incoming)
+            return self._move_in(incoming, manifest)
+        finally:
+            shutil.rmtree(incoming, ignore_errors=True)
+
+    def promote(self, version: str) -> dict:
+        """Serve ``version`` to everyone; the previous champion goes on the rollback history."""
+        self._require(version)
+        serving = self.serving()
+        if serving["champion"] not in (None, version):
+            serving["history"].append(serving["champion"])
+        serving["champion"] = version
+        if serving["challenger"] == version:
+            serving["challenger"], serving["challenger_share"] = None, 0.0
+        return self._write(serving)
+
+    def rollback(self) -> dict:
+        """Serve the champion before the current one again."""
+        serving = self.serving()
+        if not serving["history"]:
+            raise ValueError("No earlier champion to roll back to")
+        serving["champion"] = serving["history"].pop()
+        return self._write(serving)
+
+    def start_ab(self, version: str, share: float) -> dict:
+        """Route ``share`` of users (by user-id hash) to ``version`` next to the champion."""
+        self._require(version)
+        serving = self.serving()
+        if serving["champion"] is None or serving["champion"] == version:
+            raise ValueError("A challenger needs a different champion to run against")
+        if not 0.0 < share < 1.0:
+            raise ValueError(f"Challenger share must be between 0 and 1, got {share}")
+        serving["challenger"], serving["challenger_share"] = version, share
+        return self._write(serving)
+
+    def stop_ab(self) -> dict:
+        serving = self.serving()
+        serving["challenger"], serving["challenger_share"] = None, 0.0
+        return self._write(serving)
+
+    def prune(self, keep: int) -> list[str]:
+        """Delete all but the newest ``keep`` versions; served ones and the last ``keep`` rollback targets stay."""
+        serving = self.serving()
+        pinned = {serving["champion"], serving["challenger"], *serving["history"][-keep:]}
+        versions = [m["version"] for m in self.versions()]
+        removed = [v for v in versions[:max(len(versions) - keep, 0)] if v not in pinned]
+        for version in removed:
+            shutil.rmtree(self.path(version))
+        serving["history"] = [v for v in serving["history"] if v not in removed]
+        self._write(serving)
+        return removed
+
+    # ── internal helpers ──────────────────────────────────
+    def _incoming(self) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        incoming = self.root / f".incoming-{os.getpid()}"
+        shutil.rmtree(incoming, ignore_errors=True)   # left by a crashed publish
+        return incoming
+
+    def _move_in(self, incoming: Path, manifest: dict) -> dict:
+        """Rename ``incoming`` to its version; returns the stored manifest."""
+        target = self.path(manifest["version"])
+        try:
+            os.rename(incoming, target)
+        except OSError:
+            # the version name is the second and the factors' hash: the same
+            # model was published twice within a second, keep the first copy
+            if not artifact_exists(target):
+                raise
+            return read_manifest(target)
+        return manifest
+
+    def _require(self, version: str) -> None:
+        if not artifact_exists(self.path(version)):
+            raise ValueError(f"No model {version} in {self.root}")
+
+    def _write(self, serving: dict) -> dict:
+        tmp = self.root / f".{SERVING}.tmp-{os.getpid()}"
+        tmp.write_text(json.dumps(serving, indent=2))
+        os.replace(tmp, self.root / SERVING)
+        return serving
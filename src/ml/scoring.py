@@ -0,0 +1,201 @@
+import numpy as np
+
+RATING_SCALE = (0.5, 5.0)
+
+
+class FactorScorer:
+    """
+    Vectorised replacement for ``SVD.predict``.
+
+    The factors and biases are pulled out of the trained model once; scoring a
+    user against N items is then a single (N × k) · (k,) matrix-vector product
+    instead of N Python-level ``predict`` calls.
+
+    Row ``i`` of ``pu``/``bu`` belongs to ``user_ids[i]`` and row ``j`` of
+    ``qi``/``bi`` to ``item_ids[j]``; both id arrays are sorted so raw ids are
+    resolved with a binary search (``np.searchsorted``) rather than a dict.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_mean: float,
+        pu: np.ndarray,
+        qi: np.ndarray,
+        bu: np.ndarray,
+        bi: np.ndarray,
+        user_ids: np.ndarray,
+        item_ids: np.ndarray,
+        rating_scale: tuple[float, float] = RATING_SCALE,
+        biased: bool = True,
+    ):
+        self.global_mean = float(global_mean)
+        self.pu, self.qi, self.bu, self.bi = pu, qi, bu, bi
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.rating_scale = (float(rating_scale[0]), float(rating_scale[1]))
+        self.biased = biased
+
+    # ── construction ───────────────────────────────────────
+    @classmethod
+    def from_svd(cls, model) -> "FactorScorer":
+        """Build a scorer from a fitted ``surprise.SVD``."""
+        trainset = model.trainset
+
+        raw_users = list(trainset._raw2inner_id_users.keys())
+        inner_users = np.fromiter(trainset._raw2inner_id_users.values(), dtype=np.int64, count=len(raw_users))
+        user_ids = np.array([str(u) for u in raw_users])
+        u_order = np.argsort(user_ids, kind="stable")
+
+        raw_items = list(trainset._raw2inner_id_items.keys())
+        inner_items = np.fromiter(trainset._raw2inner_id_items.values(), dtype=np.int64, count=len(raw_items))
+        # Items are keyed by str(movie_id) in training; keep them as integers here
+        item_ids = np.array([int(float(i)) for i in raw_items], dtype=np.int64)
+        i_order = np.argsort(item_ids, kind="stable")
+
+        return cls(
+            global_mean=trainset.global_mean,
+            pu=np.ascontiguousarray(model.pu[inner_users[u_order]]),
+            qi=np.ascontiguousarray(model.qi[inner_items[i_order]]),
+            bu=np.ascontiguousarray(model.bu[inner_users[u_order]]),
+            bi=np.ascontiguousarray(model.bi[inner_items[i_order]]),
+            user_ids=user_ids[u_order],
+            item_ids=item_ids[i_order],
+            rating_scale=trainset.rating_scale,
+            biased=getattr(model, "biased", True),
+        )
+
+    @property
+    def n_users(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def n_items(self) -> int:
+        return len(self.item_ids)
+
+    # ── id lookup ──────────────────────────────────────────
+    def user_index(self, raw_uid) -> int | None:
+        """Row of ``pu`` for a raw user id, or None if the model never saw it."""
+        if self.n_users == 0:
+            return None
+        key = str(raw_uid)
+        pos = int(np.searchsorted(self.user_ids, key))
+        if pos < self.n_users and self.user_ids[pos] == key:
+            return pos
+        return None
+
+    def item_index(self, movie_ids: np.ndarray) -> np.ndarray:
+        """Rows of ``qi`` for an array of movie ids; -1 marks unknown items."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        if self.n_items == 0:
+            return np.full(movie_ids.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.item_ids, movie_ids)
+        pos[pos == self.n_items] = 0
+        return np.where(self.item_ids[pos] == movie_ids, pos, -1)
+
+    # ── scoring ────────────────────────────────────────────
+    def score(self, user: int | None, items: np.ndarray) -> np.ndarray:
+        """
+        Predicted ratings for ``items`` (``qi`` rows, -1 = unknown).
+
+        Mirrors ``SVD.estimate`` + ``AlgoBase.predict`` term for term, in the
+        same order: global mean, user bias, item bias, dot product, then clip
+        to the rating scale, so results agree with ``predict().est`` up to the
+        BLAS summation order of the dot product (≤ 1 ulp). Unknown users/items
+        simply drop their terms, exactly as surprise does.
+        """
+        if user is None:
+            return self.score_with(None, 0.0, items)
+        return self.score_with(self.pu[user], self.bu[user], items)
+
+    def score_with(self, pu: np.ndarray | None, bu: float, items: np.ndarray, clip: bool = True) -> np.ndarray:
+        """Like :meth:`score` for a user vector that isn't in ``pu`` (e.g. folded in).
+
+        ``clip=False`` returns the raw estimates: rank on those, since every
+        item above the top of the rating scale ties once clipped.
+        """
+        items = np.asarray(items, dtype=np.int64)
+        known = items >= 0
+        idx = items[known]
+        est = np.full(items.shape, self.global_mean, dtype=np.float64)
+
+        if self.biased:
+            if pu is not None:
+                est += bu
+            est[known] += self.bi[idx]
+            if pu is not None:
+                est[known] += self.qi[idx] @ pu
+        elif pu is not None:
+            # unbiased SVD raises PredictionImpossible → global mean
+            est[known] = self.qi[idx] @ pu
+
+        return np.clip(est, *self.rating_scale, out=est) if clip else est
+
+    def score_block(self, pu: np.ndarray, bu: np.ndarray, items: np.ndarray, clip: bool = True) -> np.ndarray:
+        """
+        ``(users × items)`` predicted ratings for a block of user vectors.
+
+        The known items are scored with one ``(B × k) · (k × N)`` matrix
+        product; unknown items (-1) get the bias-only estimate, as in
+        :meth:`score_with` (``clip`` likewise).
+        """
+        items = np.asarray(items, dtype=np.int64)
+        known = items >= 0
+        idx = items[known]
+        est = np.full((len(pu), len(items)), self.global_mean, dtype=np.float64)
+        if self.biased:
+            est += np.asarray(bu, dtype=np.float64)[:, None]
+            est[:, known] += self.bi[idx][None, :] + pu @ self.qi[idx].T
+        else:
+            est[:, known] = pu @ self.qi[idx].T
+        return np.clip(est, *self.rating_scale, out=est) if clip else est
+
+    def score_all(self, user: int | None) -> np.ndarray:
+        """Predicted ratings for every item the model knows, in ``qi`` order."""
+        est = np.full(self.n_items, self.global_mean, dtype=np.float64)
+        if self.biased:
+            if user is not None:
+                est += self.bu[user]
+            est += self.bi
+            if user is not None:
+                est += self.qi @ self.pu[user]
+        elif user is not None:
+            est[:] = self.qi @ self.pu[user]
+        return np.clip(est, *self.rating_scale, out=est)
+
+    def estimate(self, users, items) -> np.ndarray:
+        """Predicted ratings for parallel arrays of raw user ids and movie ids (one per pair)."""
+        user_rows = np.array([-1 if u is None else u for u in map(self.user_index, users)], dtype=np.int64)
+        item_rows = self.item_index(items)
+        est = np.full(len(user_rows), self.global_mean, dtype=np.float64)
+        known_u, known_i = user_rows >= 0, item_rows >= 0
+        both = known_u & known_i
+        dots = np.einsum("ij,ij->i", self.pu[user_rows[both]], self.qi[item_rows[both]])
+        if self.biased:
+            est[known_u] += self.bu[user_rows[known_u]]
+            est[known_i] += self.bi[item_rows[known_i]]
+            est[both] += dots
+        else:
+            est[both] = dots
+        return np.clip(est, *self.rating_scale, out=est)
+
+
+def top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the ``n`` highest scores, best first (O(N) selection)."""
+    if n <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if n < len(scores):
+        part = np.argpartition(-scores, n - 1)[:n]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def top_n_rows(scores: np.ndarray, n: int) -> np.ndarray:
+    """Row-wise :func:`top_n` for a ``(users × items)`` score matrix."""
+    n = min(n, scores.shape[1])
+    if n <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
@@ -0,0 +1,75 @@
+import asyncio
+import hmac
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..database.base import get_db
+from ..schemas.admin import ModelReloadResponse, ServedModels
+from ..schemas.movies import BatchRecommendationRequest, BatchRecommendations, Recommendations
+from ..services.auth import AuthService
+from ..services.movies import MovieService, model_manager
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API disabled (ADMIN_TOKEN unset)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/model", response_model=ServedModels, status_code=status.HTTP_200_OK)
+async def served_models():
+    """Champion and A/B challenger this worker serves."""
+    return _served()
+
+
+@router.post("/model/reload", response_model=ModelReloadResponse, status_code=status.HTTP_200_OK)
+async def reload_model(force: bool = Query(False, description="Reload even if the files on disk are unchanged")):
+    """
+    Load the models on disk and swap them in on this worker; in-flight requests finish on the old ones.
+
+    Other workers pick it up within ``MODEL_WATCH_SECONDS``. A model that
+    fails validation answers 409 and the current one keeps serving.
+    """
+    try:
+        result = await asyncio.to_thread(model_manager.reload, force)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Model not swapped, still serving {model_manager.current.version}: {exc}",
+        )
+    if result is None:
+        return ModelReloadResponse(reloaded=False, **_served().model_dump())
+    return ModelReloadResponse(reloaded=True, **result._asdict())
+
+
+@router.post("/recommendations/batch", response_model=BatchRecommendations, status_code=status.HTTP_200_OK)
+async def batch_recommendations(payload: BatchRecommendationRequest, db: AsyncSession = Depends(get_db)):
+    """Top-N for many users in one call (digests, homepage prewarming)."""
+    service = MovieService(db)
+    results = {}
+    # champion and A/B challenger users are ranked as separate blocks
+    for model, user_ids in model_manager.split(payload.user_ids):
+        ranked = await service.recommend_for_users(user_ids, top_n=payload.n, model=model)
+        for user_id, movie_ids in ranked.items():
+            results[user_id] = Recommendations(user_id=user_id, movie_ids=movie_ids, model_version=model.version)
+    return BatchRecommendations(results=[results[user_id] for user_id in dict.fromkeys(payload.user_ids)])
+
+
+@router.post("/users/{user_id}/deactivate", status_code=status.HTTP_204_NO_CONTENT)
+async def deactivate_user(user_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Lock an account out: its tokens stop working (on other workers within ``AUTH_USER_CACHE_TTL_SECONDS``) and it can't log in."""
+    await AuthService(db).deactivate(user_id)
+
+
+def _served() -> ServedModels:
+    state = model_manager.state
+    challenger = state.challenger.version if state.challenger is not None else None
+    return ServedModels(version=state.champion.version, challenger=challenger, challenger_share=state.challenger_share)
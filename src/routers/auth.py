@@ -1,30 +1,38 @@
 from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from requests import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..services.user import get_current_user,  get_users_service
 
-from ..schemas.user import UserCreate, LoginResponse, LoginRequest, Token
+from ..schemas.user import UserCreate, LoginResponse, LoginRequest, PasswordChange, Token
 from ..database.base import get_db
-from ..services.auth import AuthService
+from ..services.auth import AuthService, AuthenticatedUser
  
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/signup", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
-def signup(payload: UserCreate, db=Depends(get_db)):
-    return AuthService(db).signup(payload)
+async def signup(payload: UserCreate, db=Depends(get_db)):
+    return await AuthService(db).signup(payload)
 
 @router.post("/login", response_model=LoginResponse, status_code=status.HTTP_200_OK)
-def login(payload: LoginRequest, db=Depends(get_db)):
-    return AuthService(db).login(payload.email, payload.password)
+async def login(payload: LoginRequest, db=Depends(get_db)):
+    return await AuthService(db).login(payload.email, payload.password)
 
 @router.post("/token", response_model=Token, status_code=status.HTTP_200_OK)    
-def login(form: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
-    res = AuthService(db).login(form.username, form.password)
+async def login(form: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+    res = await AuthService(db).login(form.username, form.password)
     return {"access_token": res.access_token, "token_type":  'bearer'}
 
+@router.post("/password", status_code=status.HTTP_204_NO_CONTENT)
+async def change_password(
+    payload: PasswordChange,
+    current_user: AuthenticatedUser = Depends(get_current_user),  # 🔒
+    db: AsyncSession = Depends(get_db),
+):
+    await AuthService(db).change_password(current_user.id, payload.current_password, payload.new_password)
+
 @router.get("/users", status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_user)])
-def get_users(db: Session = Depends(get_db)):
-    return  get_users_service(db)
+async def get_users(db: AsyncSession = Depends(get_db)):
+    return  await get_users_service(db)
 
  
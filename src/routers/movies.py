@@ -1,42 +1,110 @@
-from typing import List
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
 from ..database.base import get_db
-from ..schemas.movies import Movie, RatingCreate, RatingResponse, Recommendations
-from ..services.movies import MovieService
-from ..db_models.users import User
+from ..schemas.movies import (
+    BulkRatingCreate,
+    BulkRatingResponse,
+    Movie,
+    MoviePage,
+    RatingCreate,
+    RatingResponse,
+    RatingsQueued,
+    Recommendations,
+)
+from ..services.movies import MovieService, model_manager
+from ..services.auth import AuthenticatedUser
 from ..services.user import get_current_user
 
 router = APIRouter(prefix="/movies", tags=["movies and ratings"], dependencies=[Depends(get_current_user)])
 
 
-@router.get("/", response_model=List[Movie], status_code=status.HTTP_200_OK)
-def get_all_movies(db: Session = Depends(get_db)):
-    movies = MovieService(db).list_all()
-    return movies
+@router.get(
+    "/",
+    response_model=List[Movie] | MoviePage,
+    status_code=status.HTTP_200_OK,
+    description="Without `limit` or `after`, the whole catalog as a JSON list (as before pagination); "
+                "with either, one `MoviePage`.",
+)
+async def get_all_movies(
+    limit: Optional[int] = Query(None, ge=1, le=settings.MOVIES_PAGE_MAX, description="Page size; when streaming, max rows (default: all)"),
+    after: Optional[int] = Query(None, description="`next_after` of the previous page"),
+    stream: bool = Query(False, description="Stream the catalog as NDJSON instead of one JSON page"),
+    db: AsyncSession = Depends(get_db),
+):
+    if stream:
+        return StreamingResponse(MovieService.stream_ndjson(after, limit), media_type="application/x-ndjson")
+    if limit is None and after is None:
+        # existing clients expect the bare list; stream it rather than building it in memory
+        return StreamingResponse(MovieService.stream_json(), media_type="application/json")
+    return await MovieService(db).list_page(limit or settings.MOVIES_PAGE_SIZE, after)
 
-@router.get("/top", response_model=List[Movie], status_code=status.HTTP_200_OK)
-def get_top_movies(
-    limit: int = 20,
-    db: Session = Depends(get_db),
+@router.get(
+    "/top",
+    response_model=List[Movie],
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "`If-None-Match` matches the current list"}},
+)
+async def get_top_movies(
+    response: Response,
+    limit: int = Query(20, ge=1, le=settings.TOP_MOVIES_CACHE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
-    movies = MovieService(db).list_top(limit)
-    return  movies
+    service = MovieService(db)
+    # the list only changes when the training scripts rewrite top_movies
+    etag = f'"{await service.top_version()}-{limit}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return await service.list_top(limit)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110 §13.1.2): W/ prefixes are ignored
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
  
-@router.post("/ratings", response_model=RatingResponse, status_code=status.HTTP_201_CREATED)
-def rate_movie(
+# RATINGS_WRITE_BEHIND: ratings are queued and stored in batches shortly after
+_QUEUED = {status.HTTP_202_ACCEPTED: {"model": RatingsQueued, "description": "Queued (write-behind mode)"}}
+
+
+@router.post("/ratings", response_model=RatingResponse, status_code=status.HTTP_201_CREATED, responses=_QUEUED)
+async def rate_movie(
     payload: RatingCreate,
-    current_user: User = Depends(get_current_user),  # 🔒
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),  # 🔒
+    db: AsyncSession = Depends(get_db),
 ):
-    return MovieService(db).add_rating(user_id=current_user.id, data=payload)
+    if settings.RATINGS_WRITE_BEHIND:
+        return _accepted(await MovieService(db).queue_ratings(user_id=current_user.id, ratings=[payload]))
+    return await MovieService(db).add_rating(user_id=current_user.id, data=payload)
+
+
+@router.post("/ratings/bulk", response_model=BulkRatingResponse, status_code=status.HTTP_201_CREATED, responses=_QUEUED)
+async def rate_movies(
+    payload: BulkRatingCreate,
+    current_user: AuthenticatedUser = Depends(get_current_user),  # 🔒
+    db: AsyncSession = Depends(get_db),
+):
+    """Rate many movies in one statement (onboarding); re-rating a movie replaces the old rating."""
+    if settings.RATINGS_WRITE_BEHIND:
+        return _accepted(await MovieService(db).queue_ratings(user_id=current_user.id, ratings=payload.ratings))
+    return await MovieService(db).add_ratings(user_id=current_user.id, ratings=payload.ratings)
+
+
+def _accepted(queued: RatingsQueued) -> JSONResponse:
+    return JSONResponse(queued.model_dump(), status_code=status.HTTP_202_ACCEPTED)
 
 
 @router.get("/recommendations", response_model=Recommendations, status_code=status.HTTP_200_OK)
-def my_recommendations(
+async def my_recommendations(
     n: int = 5,
-    current_user: User = Depends(get_current_user),   # 🔒 protects the route
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),   # 🔒 protects the route
+    db: AsyncSession = Depends(get_db),
 ):
-    movie_ids = MovieService(db).recommend_for_user(current_user.id,  top_n=n)
-    return Recommendations(user_id=current_user.id, movie_ids=movie_ids)
\ No newline at end of file
+    model = model_manager.for_user(current_user.id)  # one snapshot for the whole request, even across a reload
+    movie_ids = await MovieService(db).recommend_for_user(current_user.id,  top_n=n, model=model)
+    return Recommendations(user_id=current_user.id, movie_ids=movie_ids, model_version=model.version)
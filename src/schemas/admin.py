@@ -0,0 +1,16 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ServedModels(BaseModel):
+    version: Optional[str]         # champion
+    challenger: Optional[str] = None
+    challenger_share: float = 0.0  # users ranked by the challenger, by user-id hash
+
+
+class ModelReloadResponse(ServedModels):
+    reloaded: bool                 # false: the files on disk are the models already served
+    previous: Optional[str] = None
+    seconds: Optional[float] = Field(None, description="Load + validation time before the swap")
+    load_peak_bytes: Optional[int] = Field(None, description="Heap high-water mark of the load")
+    max_rss_bytes: Optional[int] = Field(None, description="Worker's peak RSS after the swap")
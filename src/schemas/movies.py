@@ -3,6 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field
 
+from ..core.config import settings
 
 class RatingCreate(BaseModel):          # alias: RatingRequest
     """
@@ -14,7 +15,7 @@ class RatingCreate(BaseModel):          # alias: RatingRequest
 
 # ---------- Response ----------
 class RatingResponse(BaseModel):
-    rating_id: UUID
+    rating_id: int
     movie_id: int
     user_id: UUID
     rating: float
@@ -23,9 +24,29 @@ class RatingResponse(BaseModel):
     class Config:                       # pydantic-v1
         from_attributes = True
 
+class BulkRatingCreate(BaseModel):
+    """Many ratings by the current user at once (e.g. onboarding); a movie listed twice keeps the last rating."""
+    ratings: List[RatingCreate] = Field(..., min_length=1, max_length=settings.RATINGS_BULK_MAX)
+
+class BulkRatingResponse(BaseModel):
+    inserted: int                  # new ratings; the rest replaced an earlier rating
+    ratings: List[RatingResponse]
+
+class RatingsQueued(BaseModel):
+    """Write-behind mode: accepted, stored within ``RATINGS_FLUSH_SECONDS``."""
+    queued: int
+
 class Recommendations(BaseModel):
     user_id: UUID
     movie_ids: List[int]
+    model_version: Optional[str] = Field(None, description="Model the list was ranked with; null before one is loaded")
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[UUID] = Field(..., min_length=1, max_length=settings.RECS_BATCH_MAX_USERS)
+    n: int = Field(5, ge=1, le=100)
+
+class BatchRecommendations(BaseModel):
+    results: List[Recommendations]
 
 class Movie(BaseModel):
     movie_id: int
@@ -40,4 +61,7 @@ class Movie(BaseModel):
     class Config:
         from_attributes = True
 
-     
+
+class MoviePage(BaseModel):
+    items: List[Movie]
+    next_after: Optional[int] = Field(None, description="Pass as `after` to get the next page; null on the last one")
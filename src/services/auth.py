@@ -1,57 +1,116 @@
 from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from uuid import UUID
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from ..core.security import decode_access_token, hash_password, verify_password, create_access_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.session import read_only
+from ..core.security import bcrypt_pool, decode_access_token, create_access_token
+from ..core.cache import TTLCache
 from ..core.config import  settings
 from ..db_models.users import User
 from ..schemas import user as UserSchema
+INACTIVE = "inactive"  # users.is_active value that locks an account out
+
+
+class AuthenticatedUser(NamedTuple):
+    """Immutable copy of the ``users`` row behind a token (no password hash), safe to share between requests."""
+    id: UUID
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    is_active: str
+    created_at: str
+
+    @classmethod
+    def from_row(cls, user: User) -> "AuthenticatedUser":
+        return cls(*(getattr(user, field) for field in cls._fields))
+
+
 class AuthService:
-    def __init__(self, db: Session):
+    # AuthenticatedUser snapshots behind valid tokens, keyed by str(user_id)
+    _user_cache = TTLCache(
+        maxsize=settings.AUTH_USER_CACHE_SIZE,
+        ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    )
+
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def signup(self, data:  UserSchema.UserCreate) -> UserSchema.UserResponse: 
-        self._ensure_unique_user(data.email, data.username)
-        new_user = self._create_user(data)
+    @classmethod
+    def forget_user(cls, user_id) -> None:
+        """Drop a cached user; call after anything that changes who may authenticate."""
+        cls._user_cache.pop(str(user_id))
+
+    async def deactivate(self, user_id: UUID) -> None:
+        """Lock an account out; its tokens stop working on this worker at once, elsewhere within the cache TTL."""
+        user = await self._get_user(user_id)
+        user.is_active = INACTIVE
+        await self.db.commit()
+        self.forget_user(user_id)
+
+    async def change_password(self, user_id: UUID, current_password: str, new_password: str) -> None:
+        user = await self._get_user(user_id)
+        if not await bcrypt_pool.verify(current_password, user.password_hash):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
+        user.password_hash = await bcrypt_pool.hash(new_password)
+        await self.db.commit()
+        self.forget_user(user_id)
+
+    async def signup(self, data:  UserSchema.UserCreate) -> UserSchema.UserResponse: 
+        await self._ensure_unique_user(data.email, data.username)
+        new_user = await self._create_user(data)
         return self._issue_token(new_user)
 
-    def login(self, email: str, password: str) -> UserSchema.LoginResponse:
-        user = self._authenticate_user(email, password)
+    async def login(self, email: str, password: str) -> UserSchema.LoginResponse:
+        user = await self._authenticate_user(email, password)
         return self._issue_token(user)
 
     # ───────── helpers ─────────
-    def _ensure_unique_user(self, email: str, username: str) -> None:
+    async def _get_user(self, user_id: UUID) -> User:
+        # from the primary: the row decode_token loaded into this session may be a replica's
+        user = await self.db.get(User, user_id, populate_existing=True)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        return user
+
+    async def _ensure_unique_user(self, email: str, username: str) -> None:
         # 1. Check if user already exists (by username or email)
-        if self.db.query(User).filter(
-            (User.email == email) | (User.username == username)
-        ).first():
+        if await self.db.scalar(
+            select(User.id).where((User.email == email) | (User.username == username)).limit(1)
+        ) is not None:
             raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already in use",
         )
 
-    def _create_user(self, payload: UserSchema.UserCreate) -> User:
-        
+    async def _create_user(self, payload: UserSchema.UserCreate) -> User:
+        # bcrypt is deliberately slow; it runs in its own bounded process pool
+        password_hash = await bcrypt_pool.hash(payload.password)
         user = User(
             **payload.model_dump(exclude={"password"}),
-            password_hash=hash_password(payload.password),
+            password_hash=password_hash,
             created_at=datetime.now(timezone.utc).isoformat(),   
             is_active="active",
             
         )
          
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
 
         return user
 
-    def _authenticate_user(self, email: str, password: str) -> User:
-        user = self.db.query(User).filter(User.email == email).first()
-        if not user or not verify_password(password, user.password_hash):
+    async def _authenticate_user(self, email: str, password: str) -> User:
+        user = await self.db.scalar(select(User).where(User.email == email))
+        if not user or not await bcrypt_pool.verify(password, user.password_hash):
             raise  HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
             )
+        if user.is_active == INACTIVE:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is deactivated")
         return user
 
     def _issue_token(self, user: User) -> UserSchema.LoginResponse:
@@ -61,7 +120,8 @@ class AuthService:
         )
         return UserSchema.LoginResponse(access_token=token, token_type="bearer", user=user)
 
-    def decode_token(self, token: str) -> User | None:
+    @read_only
+    async def decode_token(self, token: str) -> AuthenticatedUser | None:
         """Return the user represented by this JWT, or None if invalid/inactive."""
         try:
             payload = decode_access_token(token)
@@ -71,7 +131,15 @@ class AuthService:
         except ValueError:
             return None                           # signature/expiry failure
 
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user is None :
-            return None
-        return user
\ No newline at end of file
+        user = AuthService._user_cache.get(str(user_id))
+        if user is None:
+            try:
+                user_uuid = UUID(str(user_id))   # asyncpg binds UUID objects, not strings
+            except ValueError:
+                return None
+            user = await self.db.scalar(select(User).where(User.id == user_uuid))
+            if user is None or user.is_active == INACTIVE:
+                return None
+            user = AuthenticatedUser.from_row(user)
+            AuthService._user_cache.set(str(user_id), user)
+        return user
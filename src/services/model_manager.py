@@ -0,0 +1,339 @@
+"""
+Serving model lifecycle: load, validate, swap.
+
+Everything a recommendation needs from a model load (factors, IVF index,
+version) lives in one immutable :class:`ServingModel`, and the models served
+at a time — a champion and, during an A/B test, a challenger — in one
+:class:`ServingState`. Request handlers pick their model once
+(:meth:`ModelManager.for_user`) and pass that snapshot down, so a reload is
+a single reference assignment: requests already running finish on the model
+they started with, new ones see the new state, and the old arrays are freed
+once the last request holding them returns.
+
+Where models come from, first match wins:
+
+1. the registry (``MODEL_REGISTRY_DIR``, see ``ml/registry.py``): champion,
+   challenger and its traffic share from ``serving.json``
+2. the single exported artifact ``models/svd_factors``
+3. the pickled ``SVD`` in ``models/svd_model.pkl``
+
+A reload — from the watcher (``MODEL_WATCH_SECONDS``), ``POST
+/admin/model/reload`` or ``preload_model`` at start-up — loads and validates
+in a worker thread; a model that fails validation is never swapped in and
+the current state keeps serving. Each reload records how long it took and
+the memory high-water mark of the load.
+"""
+import asyncio
+import hashlib
+import resource
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from ..core.metrics import REGISTRY
+from ..ml.artifacts import artifact_exists, load_artifact, load_resolved, read_manifest
+from ..ml.ivf import IVFIndex
+from ..ml.quantize import QuantizedFactors
+from ..ml.registry import ModelRegistry
+from ..ml.scoring import FactorScorer
+
+MODEL_INFO = REGISTRY.gauge(
+    "recs_model_info", "Served model versions (champion / challenger); value = share of users it ranks", ("version", "role")
+)
+RELOADS = REGISTRY.counter("model_reloads_total", "Model loads by outcome (ok / invalid)", ("result",))
+RELOAD_LATENCY = REGISTRY.histogram(
+    "model_reload_seconds", "Load + validation time of a model before the swap",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+RELOAD_MEMORY = REGISTRY.gauge(
+    "model_reload_memory_bytes",
+    "Last reload: heap high-water mark of the load (load_peak) and peak RSS of the worker (max_rss)",
+    ("stat",),
+)
+
+_VALIDATE_BLOCK = 65_536  # factor rows checked for NaN / inf at a time
+_VALIDATE_OVERSHOOT = 1.0  # raw estimates may leave the rating scale by this many scale widths
+
+
+class ServingModel(NamedTuple):
+    """One loaded model; replaced as a whole, never mutated."""
+    version: str | None
+    scorer: FactorScorer | None      # None: unfitted placeholder, every user gets the fallback list
+    index: IVFIndex | None = None    # optional approximate top-N index
+    model: object | None = None      # the unpickled SVD (legacy pickle path only)
+    source: str | None = None        # artifact directory or pickle file it came from
+    quantized: QuantizedFactors | None = None   # reduced-precision qi for the scan (SCORING_PRECISION)
+
+
+NO_MODEL = ServingModel(version=None, scorer=None)
+
+
+class ServingState(NamedTuple):
+    champion: ServingModel
+    challenger: ServingModel | None = None
+    challenger_share: float = 0.0    # fraction of users (by id hash) ranked by the challenger
+
+    def models(self) -> list[ServingModel]:
+        return [self.champion] + ([self.challenger] if self.challenger is not None else [])
+
+
+class ModelReload(NamedTuple):
+    version: str | None              # champion
+    previous: str | None
+    challenger: str | None
+    challenger_share: float
+    seconds: float
+    load_peak_bytes: int             # heap allocated by the load at its peak (mmapped arrays don't count)
+    max_rss_bytes: int               # worker's peak RSS so far, i.e. including the overlap of both models
+
+
+def challenger_bucket(version: str, user_id) -> float:
+    """Stable position of a user in ``[0, 1)`` for an A/B test of ``version``.
+
+    Salted with the challenger's version, so each test draws its own users.
+    """
+    digest = hashlib.blake2b(f"{version}:{user_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def _assign(state: ServingState, user_id) -> ServingModel:
+    challenger = state.challenger
+    if challenger is not None and challenger_bucket(challenger.version, user_id) < state.challenger_share:
+        return challenger
+    return state.champion
+
+
+class ModelManager:
+    """
+    Owns the models the API serves from.
+
+    Loads are serialised; the swap itself needs no lock because readers
+    never look at ``state`` more than once per request.
+    """
+
+    def __init__(
+        self, registry_dir: str | Path, artifact_dir: str | Path, model_file: str | Path, precision: str = "float32"
+    ):
+        self.registry = ModelRegistry(registry_dir)
+        self.artifact_dir = Path(artifact_dir)
+        self.model_file = Path(model_file)
+        self.precision = precision
+        self.state = ServingState(NO_MODEL)
+        self._seen: str | None = None            # fingerprint of the last load attempt, good or bad
+        self._load_lock = threading.Lock()
+        self._listeners: list[Callable[[ServingState], None]] = []
+
+    @property
+    def current(self) -> ServingModel:
+        """The champion: what every user gets unless an A/B test routes them elsewhere."""
+        return self.state.champion
+
+    def for_user(self, user_id) -> ServingModel:
+        """The model that ranks ``user_id``'s recommendations, deterministic per user."""
+        return _assign(self.state, user_id)
+
+    def split(self, user_ids) -> list[tuple[ServingModel, list]]:
+        """``user_ids`` (deduplicated) grouped by the model that ranks them, from one snapshot."""
+        state = self.state
+        groups: dict[int, tuple[ServingModel, list]] = {}
+        for user_id in dict.fromkeys(user_ids):
+            model = _assign(state, user_id)
+            groups.setdefault(id(model), (model, []))[1].append(user_id)
+        return list(groups.values())
+
+    def live_versions(self) -> set[str | None]:
+        return {model.version for model in self.state.models()}
+
+    def on_swap(self, listener: Callable[[ServingState], None]) -> None:
+        """Call ``listener(new_state)`` right after every swap (in the loading thread)."""
+        self._listeners.append(listener)
+
+    def fingerprint(self) -> str | None:
+        """What is on disk now, without loading it; None if there is nothing to load."""
+        serving = self.registry.serving()
+        if serving["champion"] is not None:
+            return f"registry:{serving['champion']}:{serving['challenger']}:{serving['challenger_share']}"
+        if artifact_exists(self.artifact_dir):
+            try:
+                return read_manifest(self.artifact_dir)["version"]
+            except (OSError, ValueError, KeyError):
+                return None   # replaced while we looked; the next check sees the new one
+        if self.current.source == str(self.artifact_dir):
+            # gone for a moment only while export_model converts an artifact from an
+            # older export into a symlink: don't fall back to the pickle for that
+            return None
+        if self.model_file.exists():
+            stat = self.model_file.stat()
+            return f"pickle-{stat.st_mtime_ns}-{stat.st_size}"
+        return None
+
+    def reload(self, force: bool = False) -> ModelReload | None:
+        """
+        Load, validate and swap in the models on disk (blocking; run it in a thread).
+
+        Returns None when there is nothing new to load (or nothing at all);
+        ``force`` reloads unchanged models. Raises if a model can't be loaded
+        or fails :func:`validate` — ``state`` is untouched and the same files
+        aren't retried until they change.
+        """
+        with self._load_lock:
+            fingerprint = self.fingerprint()
+            if fingerprint is None or (fingerprint == self._seen and not force):
+                return None
+            self._seen = fingerprint
+
+            t0 = time.perf_counter()
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            try:
+                state = self._load(reuse=not force)
+                for model in state.models():
+                    validate(model)
+            except Exception:
+                RELOADS.inc(result="invalid")
+                raise
+            finally:
+                load_peak = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+            seconds = time.perf_counter() - t0
+
+            previous, self.state = self.state, state   # the swap
+            for listener in self._listeners:
+                listener(state)
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024   # KiB on Linux
+        RELOADS.inc(result="ok")
+        RELOAD_LATENCY.observe(seconds)
+        RELOAD_MEMORY.set(load_peak, stat="load_peak")
+        RELOAD_MEMORY.set(max_rss, stat="max_rss")
+        MODEL_INFO.clear()
+        MODEL_INFO.set(1 - state.challenger_share, version=state.champion.version, role="champion")
+        if state.challenger is not None:
+            MODEL_INFO.set(state.challenger_share, version=state.challenger.version, role="challenger")
+        return ModelReload(
+            state.champion.version, previous.champion.version,
+            state.challenger.version if state.challenger is not None else None, state.challenger_share,
+            seconds, load_peak, max_rss,
+        )
+
+    async def watch(self, interval: float) -> None:
+        """Reload whenever the models on disk change; checked every ``interval`` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                reloaded = await asyncio.to_thread(self.reload)
+            except Exception as exc:
+                print(f"⚠️ Model reload failed, still serving {self.current.version}: {exc!r}")
+                continue
+            if reloaded is not None:
+                ab = f", challenger {reloaded.challenger} at {reloaded.challenger_share:.0%}" if reloaded.challenger else ""
+                print(
+                    f"✅  Swapped model {reloaded.previous} → {reloaded.version}{ab} in {reloaded.seconds:.2f}s "
+                    f"(load peak {reloaded.load_peak_bytes / 2**20:.1f} MiB)"
+                )
+
+    # ── internal helpers ──────────────────────────────────
+    def _load(self, reuse: bool) -> ServingState:
+        serving = self.registry.serving()
+        if serving["champion"] is None:
+            return ServingState(self._load_single())
+        # an A/B change usually leaves one of the two models as it was
+        loaded = {model.version: model for model in self.state.models()} if reuse else {}
+
+        def get(version: str) -> ServingModel:
+            return loaded.get(version) or self._load_artifact(self.registry.path(version))
+
+        challenger = serving["challenger"]
+        return ServingState(
+            get(serving["champion"]),
+            get(challenger) if challenger else None,
+            float(serving["challenger_share"]) if challenger else 0.0,
+        )
+
+    def _load_single(self) -> ServingModel:
+        if artifact_exists(self.artifact_dir):
+            return self._load_artifact(self.artifact_dir)
+
+        import pickle  # legacy path; unpickling also pulls in scikit-surprise
+        mtime = self.model_file.stat().st_mtime
+        with self.model_file.open("rb") as f:
+            model = pickle.load(f)
+        # the cold-start placeholder written by train_retrain_model is never fitted
+        scorer = FactorScorer.from_svd(model) if hasattr(model, "trainset") else None
+        print(f"✅  Loaded SVD model from {self.model_file}")
+        return ServingModel(
+            f"pickle-{int(mtime)}", scorer, model=model, source=str(self.model_file),
+            quantized=self._quantized(scorer, None),
+        )
+
+    def _load_artifact(self, path: Path) -> ServingModel:
+        # factors, IVF index and quantized copy from one version, even if an export switches `path` meanwhile
+        model = load_resolved(path, self._load_version)
+        print(f"✅  Mapped SVD factors {model.version} from {path}")
+        return model._replace(source=str(path))
+
+    def _load_version(self, real: Path) -> ServingModel:
+        scorer, manifest = load_artifact(real)
+        return ServingModel(manifest["version"], scorer, IVFIndex.load(real), quantized=self._quantized(scorer, real))
+
+    def _quantized(self, scorer: FactorScorer | None, path: Path | None) -> QuantizedFactors | None:
+        if self.precision == "float32" or scorer is None:
+            return None
+        quantized = QuantizedFactors.load(path, self.precision) if path is not None else None
+        if quantized is None:
+            # exported without it (or the pickle): build a private copy in this worker
+            print(f"⚠️ No {self.precision} item factors exported in {path or self.model_file}, quantizing on load")
+            quantized = QuantizedFactors.quantize(scorer.qi, self.precision)
+        return quantized
+
+
+def validate(model: ServingModel) -> None:
+    """Raise ValueError if ``model`` would serve broken scores."""
+    scorer = model.scorer
+    if scorer is None:
+        return
+    n_users, n_items = scorer.n_users, scorer.n_items
+    k = scorer.qi.shape[1] if scorer.qi.ndim == 2 else -1
+    if n_items == 0 or k <= 0:
+        raise ValueError(f"{model.version}: no item factors")
+    if scorer.qi.shape != (n_items, k) or scorer.bi.shape != (n_items,):
+        raise ValueError(f"{model.version}: item factors {scorer.qi.shape} / biases {scorer.bi.shape} for {n_items} items")
+    if scorer.pu.shape != (n_users, k) or scorer.bu.shape != (n_users,):
+        raise ValueError(f"{model.version}: user factors {scorer.pu.shape} / biases {scorer.bu.shape} for {n_users} users")
+    if np.any(np.diff(scorer.item_ids) <= 0) or np.any(scorer.user_ids[1:] <= scorer.user_ids[:-1]):
+        raise ValueError(f"{model.version}: ids are not sorted and unique")
+    for name in ("qi", "bi", "pu", "bu"):
+        values = getattr(scorer, name)
+        for start in range(0, len(values), _VALIDATE_BLOCK):
+            if not np.isfinite(values[start:start + _VALIDATE_BLOCK]).all():
+                raise ValueError(f"{model.version}: non-finite values in {name}")
+
+    # smoke test: score the catalog for one known user, before clipping hides
+    # blown-up factors (every score pinned to the ends of the scale)
+    pu, bu = (scorer.pu[0], float(scorer.bu[0])) if n_users else (None, 0.0)
+    scores = scorer.score_with(pu, bu, np.arange(min(n_items, 1000)), clip=False)
+    low, high = scorer.rating_scale
+    slack = (high - low) * _VALIDATE_OVERSHOOT
+    if not (np.isfinite(scores).all() and scores.min() >= low - slack and scores.max() <= high + slack):
+        raise ValueError(
+            f"{model.version}: raw scores {scores.min():.3g}..{scores.max():.3g} far outside the rating scale {scorer.rating_scale}"
+        )
+
+    index = model.index
+    if index is not None:
+        if index.centroids.shape[1] != k + 1 or index.offsets[-1] != n_items or len(index.items) != n_items:
+            raise ValueError(f"{model.version}: IVF index doesn't match the factors")
+
+    quantized = model.quantized
+    if quantized is not None:
+        if quantized.codes.shape != scorer.qi.shape or (quantized.scale is not None and quantized.scale.shape != (n_items,)):
+            raise ValueError(f"{model.version}: {quantized.precision} item factors don't match the factors")
+        if quantized.scale is not None and not np.isfinite(quantized.scale).all():
+            raise ValueError(f"{model.version}: non-finite values in the {quantized.precision} scales")
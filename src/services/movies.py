@@ -1,177 +1,781 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-import pickle
-import random
-from typing import List
+import time
+from typing import AsyncIterator, List, NamedTuple
 from uuid import UUID
 
+import numpy as np
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..schemas.movies import Movie, RatingCreate, RatingResponse
+from ..schemas.movies import BulkRatingResponse, Movie, MoviePage, RatingCreate, RatingResponse, RatingsQueued
 from ..db_models.ratings import Ratings
 from ..db_models.top_movies import TopMovies
 from ..db_models.movies import Movies
+from ..db_models.user_recommendations import UserRecommendations
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.metrics import REGISTRY
+from ..core.version_marker import read_version
+from ..database.session import AsyncSessionLocal, async_engine, primary, read_only
+from ..ml.catalog import CatalogIndex
+from ..ml.foldin import fold_in
+from ..ml.quantize import quantized_top_n
+from ..ml.rating_index import RatingIndex
+from ..ml.registry import ModelRegistry
+from ..ml.scoring import top_n as top_n_positions, top_n_rows
+from .model_manager import ModelManager, ServingModel, ServingState
+from .online_updater import OnlineUpdater
+from .rating_buffer import RatingBuffer, RatingRow
 
 # ROOT = Path(__file__).resolve().parents[2]        # movie-recommendation/
 # MODEL_FILE = ROOT / "models" / "svd_model.pkl"
 
 MODEL_FILE = Path("models/svd_model.pkl")
+ARTIFACT_DIR = Path("models/svd_factors")
+REGISTRY_DIR = Path(settings.MODEL_REGISTRY_DIR)
+
+# ── metrics (served by GET /metrics) ──────────────────────
+# per model version, so a challenger can be compared with the champion under the same load
+RECS_SERVED = REGISTRY.counter(
+    "recs_served_total", "Recommendation lists served, by how they were produced", ("path", "version")
+)
+RECS_LATENCY = REGISTRY.histogram(
+    "recs_latency_seconds", "End-to-end recommend_for_user latency", ("path", "version")
+)
+RECS_SCORE = REGISTRY.histogram(
+    "recs_predicted_rating", "Predicted ratings of the movies recommended by the model", ("version",),
+    buckets=tuple(b / 4 for b in range(2, 21)),
+)
+RECS_STAGE = REGISTRY.histogram(
+    "recs_stage_seconds", "Latency of each recommendation stage", ("stage",)
+)
+CANDIDATES_SCORED = REGISTRY.counter(
+    "recs_candidates_scored_total", "Movies scored by the factor model"
+)
+ANN_LOOKUPS = REGISTRY.counter(
+    "recs_ann_lookups_total", "IVF lookups; 'short' fell back to the exact scan", ("result",)
+)
+CACHE_METRIC = REGISTRY.gauge("recs_cache", "In-process cache counters", ("cache", "stat"))
+RATING_INDEX_METRIC = REGISTRY.gauge("recs_rating_index", "In-memory rating index size", ("stat",))
+TOP_MOVIES_RELOADS = REGISTRY.counter("top_movies_reloads_total", "Times the cached top_movies list was re-read")
+
+# NumPy releases the GIL in the matrix products, so threads (sharing the
+# mmapped factors) are enough to keep scoring off the event loop
+_SCORING_POOL = ThreadPoolExecutor(max_workers=settings.SCORING_THREADS, thread_name_prefix="scoring")
+
+
+class TopMovieList(NamedTuple):
+    """``top_movies`` ranked once per content version (see ``TOP_MOVIES_VERSION_FILE``)."""
+    version: str
+    movie_ids: list[int]   # every ranked id, for the cold-start fallback
+    movies: list[Movie]    # the ones present in `movies`, for GET /movies/top
+
+
+def _catalog_query(after: int | None):
+    query = select(Movies.__table__).order_by(Movies.movie_id)
+    return query if after is None else query.where(Movies.movie_id > after)
+
+
+async def _catalog_chunks(after: int | None = None, limit: int | None = None) -> AsyncIterator[list[str]]:
+    """JSON-encoded movies from :func:`_catalog_query`, ``MOVIES_STREAM_CHUNK`` per list, on a session of their own."""
+    query = _catalog_query(after)
+    if limit is not None:
+        query = query.limit(limit)
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
+        result = await db.stream(query.execution_options(yield_per=settings.MOVIES_STREAM_CHUNK))
+        async for rows in result.partitions():
+            yield [Movie.model_validate(row).model_dump_json() for row in rows]
+
+
+def _upsert_ratings(dialect: str, rows: list[dict], returning: bool = True):
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(Ratings).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Ratings.user_id, Ratings.movie_id],
+        set_={"rating": stmt.excluded.rating, "rating_date": stmt.excluded.rating_date},
+    )
+    if not returning:
+        return stmt
+    columns = [Ratings.rating_id, Ratings.movie_id, Ratings.user_id, Ratings.rating, Ratings.rating_date]
+    if dialect == "postgresql":
+        # xmax is 0 only on a freshly inserted row version; SQLite has no
+        # equivalent, so add_ratings reads the existing pairs first there
+        columns.append(literal_column("xmax = 0").label("inserted"))
+    return stmt.returning(*columns)
+
+
+def _foreign_key_violation(exc: IntegrityError) -> bool:
+    # asyncpg reports SQLSTATE 23503; SQLite only says so in the message
+    return getattr(exc.orig, "sqlstate", None) == "23503" or "FOREIGN KEY constraint failed" in str(exc.orig)
+
+
+def _precomputed_query(user_id: UUID, model_version: str, limit: int):
+    return (
+        select(UserRecommendations.movie_id)
+        .where(UserRecommendations.user_id == str(user_id), UserRecommendations.model_version == model_version)
+        .order_by(UserRecommendations.rank)
+        .limit(limit)
+    )
+
+
+def _user_ratings_query(user_id: UUID):
+    return select(Ratings.movie_id, Ratings.rating).where(Ratings.user_id == user_id)
+
+
+def _rated_movies_query(user_id: UUID, movie_ids: List[int]):
+    return select(Ratings.movie_id).where(Ratings.user_id == user_id, Ratings.movie_id.in_(movie_ids))
+
+
+def _existing_movies_query(movie_ids: List[int]):
+    return select(Movies.movie_id).where(Movies.movie_id.in_(movie_ids))
+
+
+def _top_movies_query(query):
+    # movie_id breaks ties so every worker ranks (and ETags) the list the same way
+    return query.order_by(TopMovies.mean_rating.desc(), TopMovies.movie_id)
+
+
+def _top_movie_rows_query():
+    return _top_movies_query(select(Movies).join(TopMovies, Movies.movie_id == TopMovies.movie_id))
+
+
+# ── write-behind batches (see services/rating_buffer.py) ──
+_BATCH_COLUMNS = ("user_id", "movie_id", "rating", "rating_date")
+_STATEMENT_ROWS = 1000  # rows per multi-row INSERT; keeps bind parameters well under driver limits
+_COPY_TABLE = (
+    "CREATE TEMP TABLE ratings_incoming "
+    "(user_id uuid, movie_id integer, rating double precision, rating_date varchar) ON COMMIT DROP"
+)
+# the join drops ratings of movies deleted since they were queued instead of failing the batch
+_MERGE_COPIED = """
+    INSERT INTO ratings (user_id, movie_id, rating, rating_date)
+    SELECT i.user_id, i.movie_id, i.rating, i.rating_date
+    FROM ratings_incoming i JOIN movies m ON m.movie_id = i.movie_id
+    ON CONFLICT (user_id, movie_id)
+    DO UPDATE SET rating = EXCLUDED.rating, rating_date = EXCLUDED.rating_date
+"""
+
+
+async def _write_rating_batch(rows: list[RatingRow]) -> int:
+    """
+    Upsert a write-behind batch in one transaction; returns the rows stored.
+
+    asyncpg: COPY into a temp table, then one INSERT … SELECT … ON CONFLICT.
+    Other drivers: multi-row INSERT … ON CONFLICT of ``_STATEMENT_ROWS`` each.
+    """
+    # one row per (user, movie), the latest: ON CONFLICT can't touch a row twice per statement
+    rows = list({(row[0], row[1]): row for row in rows}.values())
+    async with async_engine.begin() as conn:
+        if conn.dialect.driver == "asyncpg":
+            await conn.execute(text(_COPY_TABLE))
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table("ratings_incoming", records=rows, columns=_BATCH_COLUMNS)
+            written = (await conn.execute(text(_MERGE_COPIED))).rowcount
+        else:
+            written = 0
+            for start in range(0, len(rows), _STATEMENT_ROWS):
+                chunk = rows[start:start + _STATEMENT_ROWS]
+                known = set(await conn.scalars(_existing_movies_query({row[1] for row in chunk})))
+                chunk = [dict(zip(_BATCH_COLUMNS, row)) for row in chunk if row[1] in known]
+                if chunk:
+                    await conn.execute(_upsert_ratings(conn.dialect.name, chunk, returning=False))
+                    written += len(chunk)
+    # lists / fold-ins computed while these were queued didn't see them
+    for user_id in {row[0] for row in rows}:
+        MovieService.forget_user(user_id)
+    return written
+
+
+async def _offload(fn, *args):
+    """Run CPU-bound work on the scoring pool and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(_SCORING_POOL, fn, *args)
+
 
 class MovieService:
     """Business logic for movie recommendations and ratings."""
-    _model = None  # class-level cache
+    # movies table ↔ qi rows, keyed by the version of the served model it was built for
+    _catalogs: dict[str, CatalogIndex] = {}
+    _ratings: RatingIndex | None = None  # user → rated movie ids, seeded from `ratings`
+    _ratings_lock = asyncio.Lock()  # one re-seed at a time
+    _ratings_added: list[tuple[str, int]] | None = None  # indexed while a re-seed reads the table
+    _top: TopMovieList | None = None
+    _top_checked_at = float("-inf")  # monotonic time the version marker was last read
+    _top_lock = asyncio.Lock()
+    # top-N lists keyed by (user_id, model_version, n); grouped per user for invalidation
+    _recs_cache = TTLCache(
+        maxsize=settings.RECS_CACHE_SIZE,
+        ttl=settings.RECS_CACHE_TTL_SECONDS,
+        group=lambda key: key[0],
+    )
+    # (pu, bu) solved on the fly for users newer than the model, keyed by (user_id, model_version)
+    _foldin_cache = TTLCache(
+        maxsize=settings.FOLD_IN_CACHE_SIZE,
+        ttl=settings.RECS_CACHE_TTL_SECONDS,
+        group=lambda key: key[0],
+    )
 
     # ── public API ─────────────────────────────────────────
     @classmethod
     def preload_model(cls) -> None:
-        """Load SVD model into memory once at app start-up."""
-        if MODEL_FILE.exists():
-            with MODEL_FILE.open("rb") as f:
-                cls._model = pickle.load(f)
-            print(f"✅  Loaded SVD model from {MODEL_FILE}")  
+        """Load SVD model into memory at app start-up (blocking).
+
+        Prefers the memory-mapped factor artifact; the pickled ``SVD`` is only
+        read when no artifact has been exported yet. Later models are picked
+        up by ``model_manager`` without a restart.
+        """
+        if model_manager.reload(force=True) is None:
+            print(f"⚠️ No model in {REGISTRY_DIR}, {ARTIFACT_DIR} or {MODEL_FILE} yet; serving the fallback list")
+
+    @classmethod
+    def _model_swapped(cls, state: ServingState) -> None:
+        # cached lists and fold-ins are keyed by version and simply stop matching
+        live = {model.version for model in state.models()}
+        cls._catalogs = {v: c for v, c in cls._catalogs.items() if v in live}
+
+    @classmethod
+    async def preload_ratings(cls, db: AsyncSession) -> None:
+        """(Re-)seed the in-memory rating index from the ratings table; requests use the old one until it's done."""
+        cls._ratings_added = []
+        try:
+            pairs = (await db.execute(select(Ratings.user_id, Ratings.movie_id))).all()
+            index = await _offload(RatingIndex.from_pairs, pairs)
+            # ratings stored by this worker meanwhile, unless the SELECT already saw them
+            for user_id, movie_id in cls._ratings_added:
+                if movie_id not in index.rated(user_id):
+                    index.add(user_id, movie_id)
+            cls._ratings = index
+        finally:
+            cls._ratings_added = None
+        print(
+            f"✅  Indexed {len(index)} ratings for {index.n_users} users "
+            f"({index.nbytes() / 2**20:.1f} MiB of arrays)"
+        )
+
+    @classmethod
+    async def watch_ratings(cls, interval: float, sessions) -> None:
+        """Re-seed the rating index every ``interval`` seconds with a session from ``sessions()``, off the request path."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with cls._ratings_lock, sessions() as db:
+                    await cls.preload_ratings(db)
+            except Exception as exc:
+                print(f"⚠️ Rating index refresh failed, keeping the current one: {exc!r}")
+
+    @classmethod
+    def _index_ratings(cls, user_id, movie_ids) -> None:
+        """Add a user's new ratings to the index (and to the one being re-seeded, if any)."""
+        index = cls._ratings
+        for movie_id in movie_ids:
+            if index is not None:
+                index.add(str(user_id), movie_id)
+            if cls._ratings_added is not None:
+                cls._ratings_added.append((str(user_id), movie_id))
+
+    @classmethod
+    def forget_user(cls, user_id) -> None:
+        """Drop the user's cached lists and fold-in; call after their ratings change."""
+        cls._recs_cache.invalidate_group(str(user_id))
+        cls._foldin_cache.invalidate_group(str(user_id))
+
+    @classmethod
+    def refresh_catalog(cls) -> None:
+        """Forget the catalog mapping; the next recommendation rebuilds it."""
+        cls._catalogs = {}
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """Hit/miss/eviction counters of the recommendation cache."""
+        return cls._recs_cache.stats()
+
+    @classmethod
+    def collect_metrics(cls) -> None:
+        """Copy cache and rating-index figures into their gauges (runs on every scrape)."""
+        for name, cache in (("recs", cls._recs_cache), ("foldin", cls._foldin_cache)):
+            for stat, value in cache.stats().items():
+                CACHE_METRIC.set(value, cache=name, stat=stat)
+        if cls._ratings is not None:
+            RATING_INDEX_METRIC.set(cls._ratings.nbytes(), stat="bytes")
+            RATING_INDEX_METRIC.set(cls._ratings.n_users, stat="users")
+            RATING_INDEX_METRIC.set(len(cls._ratings), stat="ratings")
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
      # ── All movies ───────────────────────────────────────────
-    def list_all(self) -> list[Movie]:
-        rows = self.db.query(Movies).all()
-        # print('Rows Movies', rows)
-        return [Movie.model_validate(row) for row in rows]
-        # return  rows
+    @read_only
+    async def warm_up(self) -> None:
+        """Build what the first requests would otherwise wait for: the top_movies list and catalog mapping."""
+        await self._top_list()
+        model = model_manager.current
+        if model.scorer is not None:
+            await self._catalog_index(model)
+
+    @read_only
+    async def list_page(self, limit: int, after: int | None = None) -> MoviePage:
+        """One keyset page of the catalog ordered by ``movie_id``, starting after ``after``."""
+        # limit + 1 rows tell us whether another page exists without a COUNT
+        rows = (await self.db.execute(_catalog_query(after).limit(limit + 1))).all()
+        items = [Movie.model_validate(row) for row in rows[:limit]]
+        next_after = items[-1].movie_id if len(rows) > limit else None
+        return MoviePage(items=items, next_after=next_after)
+
+    @staticmethod
+    async def stream_ndjson(after: int | None = None, limit: int | None = None) -> AsyncIterator[bytes]:
+        """
+        The catalog as NDJSON, one chunk of ``MOVIES_STREAM_CHUNK`` rows at a time.
+
+        Opens its own session: the request's session is closed before a
+        streaming body is sent. Rows are plain tuples (no ORM identity map),
+        so memory stays at one chunk whatever the catalog size.
+        """
+        async for chunk in _catalog_chunks(after, limit):
+            yield "".join(movie + "\n" for movie in chunk).encode()
+
+    @staticmethod
+    async def stream_json() -> AsyncIterator[bytes]:
+        """The whole catalog as one JSON array (the unpaginated ``GET /movies/``), streamed like :meth:`stream_ndjson`."""
+        separator = "["
+        async for chunk in _catalog_chunks():
+            yield (separator + ",".join(chunk)).encode()
+            separator = ","
+        yield b"[]" if separator == "[" else b"]"
      
 
      # ── Top movies (fallback list) ───────────────────────────
-    def list_top(self, limit: int = 20) -> list[Movies]:
+    @read_only
+    async def list_top(self, limit: int = 20) -> list[Movie]:
         """
         Returns movies sorted by `mean_rating` (TopMovies table).
-        If you don’t have a 'top_movies' table, compute an AVG join instead.
+        Served from the in-process list; at most ``TOP_MOVIES_CACHE_SIZE`` rows.
+        """
+        return (await self._top_list()).movies[:limit]
+
+    @read_only
+    async def top_version(self) -> str:
+        """Content version of the list ``list_top`` slices (for ETags)."""
+        return (await self._top_list()).version
+    
+    async def add_rating(self, *, user_id: UUID, data: RatingCreate) -> RatingResponse:
+        """Insert or replace the user's rating of one movie."""
+        return (await self.add_ratings(user_id=user_id, ratings=[data])).ratings[0]
+
+    async def add_ratings(self, *, user_id: UUID, ratings: List[RatingCreate]) -> BulkRatingResponse:
+        """
+        Upsert many ratings by one user with a single INSERT … ON CONFLICT … RETURNING.
+
+        The unique (user_id, movie_id) constraint turns a repeat into an
+        update and the movies foreign key rejects unknown movies, so there
+        is no check-then-insert to race.
         """
-        rows = (
-            self.db.query(Movies)
-            .join(TopMovies, Movies.movie_id == TopMovies.movie_id)
-            .order_by(TopMovies.mean_rating.desc())
-            .limit(limit)
-            .all()
+        now = datetime.now(timezone.utc).isoformat()
+        # one row per movie (last wins): ON CONFLICT can't touch a row twice per statement
+        latest = {r.movie_id: r.rating for r in ratings}
+        rows = [
+            {"user_id": user_id, "movie_id": movie_id, "rating": rating, "rating_date": now}
+            for movie_id, rating in latest.items()
+        ]
+        dialect = self.db.get_bind().dialect.name
+        try:
+            # same transaction as the upsert, which can't report inserts itself outside Postgres
+            rated = None if dialect == "postgresql" else set(
+                await self.db.scalars(_rated_movies_query(user_id, list(latest)))
+            )
+            returned = (await self.db.execute(_upsert_ratings(dialect, rows))).all()
+            await self.db.commit()
+        except IntegrityError as exc:
+            await self.db.rollback()
+            if _foreign_key_violation(exc):
+                existing = set(await self.db.scalars(_existing_movies_query(list(latest))))
+                if len(existing) < len(latest):
+                    raise HTTPException(status_code=404, detail="Movie does not exist")
+            raise
+        if rated is None:
+            inserted = [row.movie_id for row in returned if row.inserted]
+        else:
+            inserted = [row.movie_id for row in returned if row.movie_id not in rated]
+
+        # write-through: the user's cached lists may now include these movies
+        MovieService._index_ratings(user_id, inserted)
+        MovieService.forget_user(user_id)
+        return BulkRatingResponse(
+            inserted=len(inserted),
+            ratings=[RatingResponse.model_validate(row) for row in returned],
         )
-        return [Movie.model_validate(row) for row in rows]
     
-    def add_rating(self, *, user_id: UUID, data: RatingCreate) -> RatingResponse:
-        # 1. Movie must exist
-        if not self.db.query(Movies).filter(Movies.movie_id == data.movie_id).first():
+    async def queue_ratings(self, *, user_id: UUID, ratings: List[RatingCreate]) -> RatingsQueued:
+        """
+        Write-behind ``add_ratings`` (``RATINGS_WRITE_BEHIND``): validate, queue, return.
+
+        The rows reach the table within ``RATINGS_FLUSH_SECONDS``; the rating
+        index and caches are updated now, so exclusion and cold-start checks
+        see the ratings straight away.
+        """
+        latest = {r.movie_id: r.rating for r in ratings}
+        if len(await self._existing_movies(list(latest))) < len(latest):
             raise HTTPException(status_code=404, detail="Movie does not exist")
+        now = datetime.now(timezone.utc).isoformat()
+        await rating_buffer.put([(user_id, movie_id, rating, now) for movie_id, rating in latest.items()])
+
+        index = MovieService._ratings
+        if index is not None:
+            new = np.setdiff1d(np.fromiter(latest, dtype=np.int64), index.rated(str(user_id)))
+            MovieService._index_ratings(user_id, new.tolist())
+        MovieService.forget_user(user_id)
+        return RatingsQueued(queued=len(latest))
 
+    @read_only
+    async def recommend_for_user(self, user_id: UUID, top_n: int = 5, model: ServingModel | None = None) -> List[int]:
+        """Return a list of movie IDs, ordered by preference.
 
-        # 2. Prevent duplicate rating
-        if self.db.query(Ratings).filter(
-            Ratings.user_id == user_id,
-            Ratings.movie_id == data.movie_id,
-        ).first():
-            raise HTTPException(status_code=409, detail="User already rated this movie")
+        ``model`` is the snapshot to rank with (default: the user's, see
+        ``ModelManager.for_user``); the whole request uses it even if a
+        reload swaps models meanwhile.
+        """
+        t0 = time.perf_counter()
+        model = model or model_manager.for_user(user_id)
+        cache_key = (str(user_id), model.version, top_n)
+        cached = MovieService._recs_cache.get(cache_key)
+        if cached is not None:
+            self._observe("cache", t0, model)
+            return list(cached)
 
+        # 0 Lists materialised offline for the loaded model
+        with RECS_STAGE.time(stage="precomputed"):
+            movie_ids = await self._precomputed(model, user_id, top_n)
+        if movie_ids is not None:
+            MovieService._recs_cache.set(cache_key, tuple(movie_ids))
+            self._observe("precomputed", t0, model)
+            return movie_ids
 
-        # 3. Insert
-        rating_row = Ratings(
-            user_id=user_id,
-            movie_id=data.movie_id,
-            rating=data.rating,
-            rating_date=datetime.now(timezone.utc).isoformat(),
-        )
-        self.db.add(rating_row)
-        self.db.commit()
-        self.db.refresh(rating_row)
-        return RatingResponse.model_validate(rating_row)
-    
-    def recommend_for_user(self, user_id: UUID, top_n: int = 5) -> List[int]:
-        """Return a list of movie IDs, ordered by preference."""
         # 1 Cold-start check
-        rating_count = (
-            self.db.query(Ratings)
-            .filter(Ratings.user_id == user_id)
-            .count()
-        )
-        print('DEBUG rating_count', rating_count)
+        with RECS_STAGE.time(stage="cold_start"):
+            rating_count = (await self._rating_index()).count(str(user_id))
         if rating_count < 5:
-            return self._fallback(top_n)
+            path = "fallback"
+            movie_ids = await self._fallback(top_n)
+        else:
+            # 2 Personalised SVD predictions
+            path = "personalised"
+            movie_ids = await self._personalised(model, user_id, top_n)
+
+        MovieService._recs_cache.set(cache_key, tuple(movie_ids))
+        self._observe(path, t0, model)
+        return movie_ids
+
+    @read_only
+    async def recommend_for_users(
+        self, user_ids: List[UUID], top_n: int = 5, model: ServingModel | None = None
+    ) -> dict[UUID, List[int]]:
+        """
+        Top-N for many users at once.
+
+        Cache hits are served as-is, cold-start users share one fallback
+        query, and everyone else is scored together with a single
+        (users × factors) · (factors × catalog) product. Without ``model``,
+        users are split between champion and challenger as in
+        :meth:`recommend_for_user`.
+        """
+        if model is None:
+            results = {}
+            for assigned, group in model_manager.split(user_ids):
+                results.update(await self.recommend_for_users(group, top_n, model=assigned))
+            return {user_id: results[user_id] for user_id in dict.fromkeys(user_ids)}
+
+        results: dict[UUID, List[int]] = {}
+        pending: list[UUID] = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = MovieService._recs_cache.get((str(user_id), model.version, top_n))
+            if cached is not None:
+                results[user_id] = list(cached)
+            else:
+                pending.append(user_id)
+
+        ratings = await self._rating_index()
+        cold = [u for u in pending if ratings.count(str(u)) < 5]
+        warm = [u for u in pending if ratings.count(str(u)) >= 5]
+        if model.scorer is None:
+            cold, warm = cold + warm, []
+
+        if cold:
+            fallback = await self._fallback(top_n)
+            for user_id in cold:
+                results[user_id] = list(fallback)
+
+        if warm:
+            results.update(await self._personalised_block(model, warm, top_n))
 
-        # 2 Personalised SVD predictions
-        return self._personalised(user_id, top_n)
+        for user_id in pending:
+            MovieService._recs_cache.set((str(user_id), model.version, top_n), tuple(results[user_id]))
+        version = model.version or "none"
+        RECS_SERVED.inc(len(results) - len(pending), path="cache", version=version)
+        RECS_SERVED.inc(len(cold), path="fallback", version=version)
+        RECS_SERVED.inc(len(warm), path="personalised", version=version)
+        return {user_id: results[user_id] for user_id in dict.fromkeys(user_ids)}
      
    
 
 
     # ── internal helpers ──────────────────────────────────
-    def _fallback(self, top_n: int) -> List[int]:
-        rows = (
-            self.db.query(TopMovies)
-            .order_by(TopMovies.mean_rating.desc())
-            .limit(top_n)
-            .all()
-        )
-        return [row.movie_id for row in rows]
+    @staticmethod
+    def _observe(path: str, t0: float, model: ServingModel) -> None:
+        version = model.version or "none"
+        RECS_SERVED.inc(path=path, version=version)
+        RECS_LATENCY.observe(time.perf_counter() - t0, path=path, version=version)
+
+    async def _precomputed(self, model: ServingModel, user_id: UUID, top_n: int) -> List[int] | None:
+        """Top-N written by scripts/batch_recommend.py for ``model``, if complete."""
+        scorer = model.scorer
+        if not settings.SERVE_PRECOMPUTED_RECS or scorer is None or scorer.user_index(str(user_id)) is None:
+            return None
+        rated = (await self._rating_index()).rated(str(user_id))
+        rows = await self.db.scalars(_precomputed_query(user_id, model.version, top_n + len(rated)))
+        ranked = np.fromiter(rows, dtype=np.int64)
+        ranked = ranked[~np.isin(ranked, rated)]   # rated since the batch ran
+        return ranked[:top_n].tolist() if len(ranked) >= top_n else None
+
+    async def _fallback(self, top_n: int) -> List[int]:
+        with RECS_STAGE.time(stage="fallback"):
+            movie_ids = (await self._top_list()).movie_ids
+            if top_n <= len(movie_ids) or len(movie_ids) < settings.TOP_MOVIES_CACHE_SIZE:
+                return movie_ids[:top_n]
+            # longer than the cached prefix: rare enough to go to the table
+            rows = await self.db.scalars(_top_movies_query(select(TopMovies.movie_id)).limit(top_n))
+            return list(rows)
+
+    @read_only
+    async def _existing_movies(self, movie_ids: List[int]) -> set[int]:
+        return set(await self.db.scalars(_existing_movies_query(movie_ids)))
+
+    async def _top_list(self) -> TopMovieList:
+        top = MovieService._top
+        now = time.monotonic()
+        if top is not None and now - MovieService._top_checked_at < settings.TOP_MOVIES_CHECK_SECONDS:
+            return top
+        # written by the training scripts right after they refill top_movies
+        version = read_version(settings.TOP_MOVIES_VERSION_FILE) or "unversioned"
+        MovieService._top_checked_at = now
+        if top is not None and top.version == version:
+            return top
+        async with MovieService._top_lock:
+            if MovieService._top is None or MovieService._top.version != version:
+                MovieService._top = await self._load_top(version)
+                TOP_MOVIES_RELOADS.inc()
+        return MovieService._top
+
+    async def _load_top(self, version: str) -> TopMovieList:
+        limit = settings.TOP_MOVIES_CACHE_SIZE
+        movie_ids = (await self.db.scalars(_top_movies_query(select(TopMovies.movie_id)).limit(limit))).all()
+        rows = (await self.db.scalars(_top_movie_rows_query().limit(limit))).all()
+        return TopMovieList(version, list(movie_ids), [Movie.model_validate(row) for row in rows])
 
     
     
     
-    def _personalised(self, user_id: UUID, top_n: int) -> List[UUID]:
-        # Get movies user HASN'T rated
-        rated_query = self.db.query(Ratings.movie_id).filter(
-            Ratings.user_id == user_id
-        )
-        # Debug 1: Log rated movies
-        rated_movies = [r[0] for r in rated_query.all()]
-        print(f"DEBUG: User {user_id} has rated {len(rated_movies)} movies: {rated_movies}")
-
-        # candidate_movies = (
-        # self.db.query(Movies)
-        # .filter(
-        #     Movies.movielens_id.isnot(None),
-        #     ~Movies.movie_id.in_(rated_query)
-        # )
-        # .all()
-        # )
-
-        candidate_movies = self.db.query(Movies).filter(
-        ~Movies.movie_id.in_(rated_query)
-        ).all()
-
-         # Debug 2: Log candidate movies
-        print(f"DEBUG: Found {len(candidate_movies)} candidate movies with movielens_id")
-        if candidate_movies:
-            print(f"DEBUG: First candidate movie: ID={candidate_movies[0].movie_id}, movielens={candidate_movies[0].movielens_id}")
-        else:
-            print("DEBUG: No candidate movies found")
-        
-        results = []
-        user_str = str(user_id)
+    async def _personalised(self, model: ServingModel, user_id: UUID, top_n: int) -> List[int]:
+        if model.scorer is None:
+            return await self._fallback(top_n)
 
-        # Debug 3: Log user string format
-        print(f"DEBUG: Prediction user_id format: '{user_str}'")
-        
-        for movie in candidate_movies:
-            try:
-                # Debug 4: Log before prediction
-                print(f"DEBUG: Predicting for movie {movie.movie_id} (movielens={movie.movie_id})")
-                # Predict using movielens_id
-                pred = MovieService._model.predict(
-                    user_str, 
-                    str(movie.movie_id)
-                )
-                # Debug 5: Log successful prediction
-                print(f"DEBUG: Prediction success! User: {user_str}, Movie: {movie.movie_id}, Score: {pred.est}")
+        # Get movies user HAS rated
+        with RECS_STAGE.time(stage="rated_fetch"):
+            rated = (await self._rating_index()).rated(str(user_id))
+        with RECS_STAGE.time(stage="user_vector"):
+            pu, bu = await self._user_vector(model, user_id, len(rated))
+        catalog = await self._catalog_index(model)
+        return await _offload(self._rank, model, catalog, pu, bu, rated, top_n)
+
+    @staticmethod
+    def _rank(
+        model: ServingModel, catalog: CatalogIndex, pu: np.ndarray | None, bu: float, rated: np.ndarray, top_n: int
+    ) -> List[int]:
+        """Score the catalog for one user and keep the best ``top_n`` (runs on the scoring pool)."""
+        scorer = model.scorer
+        if pu is not None and model.index is not None and settings.ANN_NPROBE > 0:
+            with RECS_STAGE.time(stage="ann_search"):
+                movie_ids = MovieService._approximate(model, catalog, pu, bu, rated, top_n)
+            ANN_LOOKUPS.inc(result="short" if movie_ids is None else "hit")
+            if movie_ids is not None:
+                return movie_ids
+
+        with RECS_STAGE.time(stage="candidates"):
+            candidate_ids, candidate_rows = catalog.candidates(rated, settings.UNKNOWN_ITEM_POLICY)
+        if candidate_ids.size == 0:
+            return []
+
+        CANDIDATES_SCORED.inc(len(candidate_rows))
+        if pu is not None and model.quantized is not None:
+            # scan the float16 / int8 copy, re-rank the shortlist in float32
+            with RECS_STAGE.time(stage="quantized_scoring"):
+                best = quantized_top_n(scorer, model.quantized, pu, candidate_rows, top_n, settings.QUANTIZED_RERANK)
+            RECS_SCORE.observe_many(scorer.score_with(pu, bu, candidate_rows[best]).tolist(), version=model.version)
+            return candidate_ids[best].tolist()
 
-                results.append((movie.movie_id, pred.est))
-            except Exception as e:
-                print(f"Prediction error for movie {movie.movie_id}: {str(e)}")
+        # One matrix-vector product over all candidates instead of a predict() per movie;
+        # ranked unclipped like the IVF and quantized paths, only the reported scores are clipped
+        with RECS_STAGE.time(stage="scoring"):
+            scores = scorer.score_with(pu, bu, candidate_rows, clip=False)
+        with RECS_STAGE.time(stage="top_n"):
+            best = top_n_positions(scores, top_n)
+        RECS_SCORE.observe_many(np.clip(scores[best], *scorer.rating_scale).tolist(), version=model.version)
+        return candidate_ids[best].tolist()
+
+    async def _personalised_block(self, model: ServingModel, user_ids: List[UUID], top_n: int) -> dict[UUID, List[int]]:
+        catalog = await self._catalog_index(model)
+        ratings = await self._rating_index()
+        results: dict[UUID, List[int]] = {}
+        vectors, biases, rated_items, block_users = [], [], [], []
+        for user_id in user_ids:
+            rated = ratings.rated(str(user_id))
+            pu, bu = await self._user_vector(model, user_id, len(rated))
+            if pu is None:
+                results[user_id] = await self._personalised(model, user_id, top_n)
                 continue
+            vectors.append(pu)
+            biases.append(bu)
+            rated_items.append(rated)
+            block_users.append(user_id)
 
-        print(f"DEBUG: Unsorted results: {results}")
-        results.sort(key=lambda x: x[1], reverse=True)
+        if block_users:
+            ranked = await _offload(self._rank_block, model, catalog, vectors, biases, rated_items, top_n)
+            results.update(zip(block_users, ranked))
+        return results
 
-        # Debug 7: Log final results
-        print(f"DEBUG: Top {top_n} results: {results[:top_n]}")
-    
-        return [m_id for m_id, _ in results[:top_n]]
+    @staticmethod
+    def _rank_block(
+        model: ServingModel,
+        catalog: CatalogIndex,
+        vectors: list[np.ndarray],
+        biases: list[float],
+        rated_items: list[np.ndarray],
+        top_n: int,
+    ) -> list[List[int]]:
+        """Top-N per user, one (users × k) · (k × catalog) product per block of RECS_BATCH_BLOCK users."""
+        scorer = model.scorer
+        candidate_ids, candidate_rows = catalog.candidates(np.empty(0, dtype=np.int64), settings.UNKNOWN_ITEM_POLICY)
+        if candidate_ids.size == 0:
+            return [[] for _ in vectors]
+
+        rated_cols = []
+        for rated in rated_items:
+            cols = np.searchsorted(candidate_ids, rated)
+            found = cols < len(candidate_ids)
+            found[found] = candidate_ids[cols[found]] == rated[found]
+            rated_cols.append(cols[found])
+
+        results = []
+        step = settings.RECS_BATCH_BLOCK
+        for start in range(0, len(vectors), step):
+            stop = min(start + step, len(vectors))
+            with RECS_STAGE.time(stage="block_scoring"):
+                scores = scorer.score_block(
+                    np.stack(vectors[start:stop]), np.array(biases[start:stop]), candidate_rows, clip=False
+                )
+            CANDIDATES_SCORED.inc(scores.size)
+            for i in range(stop - start):
+                scores[i, rated_cols[start + i]] = -np.inf
+            with RECS_STAGE.time(stage="block_top_n"):
+                ranked = top_n_rows(scores, top_n)
+            for i, cols in enumerate(ranked):
+                cols = cols[np.isfinite(scores[i, cols])]
+                RECS_SCORE.observe_many(np.clip(scores[i, cols], *scorer.rating_scale).tolist(), version=model.version)
+                results.append(candidate_ids[cols].tolist())
+        return results
+
+    @staticmethod
+    def _approximate(
+        model: ServingModel, catalog: CatalogIndex, pu: np.ndarray, bu: float, rated: np.ndarray, top_n: int
+    ) -> List[int] | None:
+        """Top-N from the IVF index, or None when it can't fill ``top_n`` slots."""
+        # over-fetch so that dropping rated / uncatalogued movies still leaves top_n
+        k = 2 * (top_n + len(rated))
+        scorer = model.scorer
+        rows = model.index.search(scorer, pu, k, settings.ANN_NPROBE)
+        ranked = scorer.item_ids[rows]
+        keep = catalog.contains(ranked) & ~np.isin(ranked, rated)
+        if keep.sum() < top_n:
+            return None
+        rows = rows[keep][:top_n]
+        RECS_SCORE.observe_many(scorer.score_with(pu, bu, rows).tolist(), version=model.version)
+        return scorer.item_ids[rows].tolist()
+
+    async def _user_vector(self, model: ServingModel, user_id: UUID, n_rated: int) -> tuple[np.ndarray | None, float]:
+        scorer = model.scorer
+        user = scorer.user_index(str(user_id))
+        if user is not None:
+            return scorer.pu[user], scorer.bu[user]
+        # signed up after the last training run: fold them in from their ratings
+        return await self._folded_user(model, user_id, n_rated)
+
+    @primary  # rate_movie drops the cached fold-in; refill it from the rows just written
+    async def _folded_user(self, model: ServingModel, user_id: UUID, n_rated: int) -> tuple[np.ndarray | None, float]:
+        """``(pu, bu)`` for a user the model doesn't know, or ``(None, 0.0)`` if too few ratings."""
+        if n_rated < settings.FOLD_IN_MIN_RATINGS:
+            return None, 0.0
+        scorer = model.scorer
+        key = (str(user_id), model.version)
+        folded = MovieService._foldin_cache.get(key)
+        if folded is None:
+            rows = (await self.db.execute(_user_ratings_query(user_id))).all()
+            movie_ids = np.array([row[0] for row in rows], dtype=np.int64)
+            ratings = np.array([row[1] for row in rows], dtype=np.float64)
+            with RECS_STAGE.time(stage="fold_in"):
+                folded = await _offload(fold_in, scorer, scorer.item_index(movie_ids), ratings, settings.FOLD_IN_REG)
+            MovieService._foldin_cache.set(key, folded)
+        return folded
+
+    @primary  # a lagging replica would drop ratings this worker has already indexed
+    async def _rating_index(self) -> RatingIndex:
+        # seeded at start-up and re-seeded in the background (watch_ratings) to pick up other
+        # workers' writes; only a request that comes before the first seed waits for it
+        index = MovieService._ratings
+        if index is None:
+            async with MovieService._ratings_lock:
+                if MovieService._ratings is None:
+                    await MovieService.preload_ratings(self.db)
+            index = MovieService._ratings
+        return index
+
+    async def _catalog_index(self, model: ServingModel) -> CatalogIndex:
+        catalog = MovieService._catalogs.get(model.version)
+        if catalog is None or catalog.age() > settings.CATALOG_REFRESH_SECONDS:
+            movie_ids = (await self.db.scalars(select(Movies.movie_id))).all()
+            catalog = await _offload(CatalogIndex.build, movie_ids, model.scorer)
+            # a request still on a swapped-out model uses its mapping without keeping it
+            live = model_manager.live_versions()
+            if model.version in live:
+                MovieService._catalogs = {
+                    **{v: c for v, c in MovieService._catalogs.items() if v in live}, model.version: catalog,
+                }
+        return catalog
+
+
+# the model recommendations are ranked with; swapped in place by reloads
+model_manager = ModelManager(REGISTRY_DIR, ARTIFACT_DIR, MODEL_FILE, precision=settings.SCORING_PRECISION)
+model_manager.on_swap(MovieService._model_swapped)
+
+# new ratings → new champion between full retrains; run by main when ONLINE_UPDATE_SECONDS > 0
+online_updater = OnlineUpdater(
+    ModelRegistry(REGISTRY_DIR),
+    min_ratings=settings.ONLINE_MIN_RATINGS,
+    max_ratings=settings.ONLINE_MAX_RATINGS,
+    n_epochs=settings.ONLINE_EPOCHS,
+    lr=settings.ONLINE_LR,
+    reg=settings.ONLINE_REG,
+    holdout=settings.ONLINE_HOLDOUT,
+    tolerance=settings.ONLINE_DRIFT_TOLERANCE,
+)
 
-     
\ No newline at end of file
+# accepted-but-unwritten ratings in write-behind mode; started and stopped by main
+rating_buffer = RatingBuffer(
+    _write_rating_batch,
+    max_rows=settings.RATINGS_BUFFER_MAX,
+    flush_rows=settings.RATINGS_FLUSH_ROWS,
+    flush_seconds=settings.RATINGS_FLUSH_SECONDS,
+    log_dir=settings.RATINGS_LOG_DIR,
+)
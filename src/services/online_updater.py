@@ -0,0 +1,232 @@
+"""
+Incremental model updates from the ratings submitted since the champion was trained.
+
+Every registry version records a watermark: the highest ``ratings.rating_id``
+it has learned from (``training.data.watermark``, set by
+``train_retrain_model.py``). :meth:`OnlineUpdater.update` reads the ratings
+above the champion's watermark, applies them with
+:func:`~..ml.online.incremental_update`, publishes the result as a new
+version carrying the new watermark and promotes it; API workers swap it in
+through the model watcher like any other promotion.
+
+Before promoting, a share of the new ratings (``holdout``) is set aside: the
+update is repeated without them and scored on them against the champion
+and, with ``guard=True``, against a full retrain on every rating up to the
+new watermark except the holdout. An update worse than either by more than
+``tolerance`` RMSE is published but not promoted; that is the signal for a
+full retrain. The published version itself always learns from all the new
+ratings, and no further update is made from that champion until a full
+retrain (or a manual promotion) replaces it.
+
+Ratings are picked up by id, so a re-rating (an upsert keeps the row's
+rating_id) and a rating whose transaction commits after a run has already
+read higher ids wait for the next full retrain.
+
+Only one process updates a registry at a time (a lock file next to
+``serving.json``); the others skip the run.
+"""
+import asyncio
+import fcntl
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.metrics import REGISTRY
+from ..db_models.ratings import Ratings
+from ..ml.artifacts import load_artifact, read_manifest
+from ..ml.quantize import PRECISIONS
+from ..ml.registry import ModelRegistry, update_record
+
+LOCK = ".online-update.lock"
+# the full retrain the drift guard compares with: train_retrain_model.py's parameters, native SGD
+RETRAIN_PARAMS = {"n_factors": 100, "reg_all": 0.05, "lr_all": 0.007, "random_state": 42, "solver": "sgd"}
+
+ONLINE_UPDATES = REGISTRY.counter(
+    "online_updates_total", "Incremental model updates published, by whether they were promoted", ("result",)
+)
+ONLINE_UPDATE = REGISTRY.gauge(
+    "online_update", "Last incremental update: ratings applied, milliseconds per 1000 ratings, holdout RMSE", ("stat",)
+)
+
+
+class OnlineUpdate(NamedTuple):
+    version: str
+    base: str
+    n_ratings: int
+    watermark: int
+    ms_per_1k: float            # incremental_update latency per 1000 ratings
+    rmse: float | None          # holdout RMSE of the update (None: no holdout)
+    base_rmse: float | None     # ... of the champion it started from
+    retrain_rmse: float | None  # ... of a full retrain (guard only)
+    promoted: bool
+
+
+class _Ratings(NamedTuple):
+    ids: np.ndarray
+    users: np.ndarray
+    items: np.ndarray
+    ratings: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> "_Ratings":
+        return cls(
+            np.array([row[0] for row in rows], dtype=np.int64),
+            np.array([str(row[1]) for row in rows]),
+            np.array([row[2] for row in rows], dtype=np.int64),
+            np.array([row[3] for row in rows], dtype=np.float32),
+        )
+
+    def take(self, mask: np.ndarray) -> "_Ratings":
+        return _Ratings(*(column[mask] for column in self))
+
+
+def _ratings_query(after: int | None = None, through: int | None = None, limit: int | None = None):
+    query = select(Ratings.rating_id, Ratings.user_id, Ratings.movie_id, Ratings.rating).order_by(Ratings.rating_id)
+    if after is not None:
+        query = query.where(Ratings.rating_id > after)
+    if through is not None:
+        query = query.where(Ratings.rating_id <= through)
+    return query.limit(limit)
+
+
+class OnlineUpdater:
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        *,
+        min_ratings: int = 100,
+        max_ratings: int = 100_000,
+        n_epochs: int = 5,
+        lr: float = 0.007,
+        reg: float = 0.05,
+        holdout: float = 0.1,
+        tolerance: float = 0.01,
+    ):
+        self.registry = registry
+        self.min_ratings = min_ratings
+        self.max_ratings = max_ratings
+        self.params = {"n_epochs": n_epochs, "lr": lr, "reg": reg}
+        self.holdout = holdout
+        self.tolerance = tolerance
+
+    async def update(self, db: AsyncSession, guard: bool = False) -> OnlineUpdate | None:
+        """
+        Publish (and, if it passes the checks, promote) the champion plus the ratings since its watermark.
+
+        Returns None when fewer than ``min_ratings`` are new or another process
+        is updating; raises ValueError when there is no champion to update or
+        it has no watermark.
+        """
+        with self._locked() as locked:
+            if not locked:
+                return None
+            base = self._champion()
+            watermark = base["training"]["data"]["watermark"]
+            new = _Ratings.from_rows((await db.execute(_ratings_query(after=watermark, limit=self.max_ratings))).all())
+            if len(new.ids) < self.min_ratings:
+                return None
+            history = None
+            if guard:
+                rows = (await db.execute(_ratings_query(through=int(new.ids[-1])))).all()
+                history = _Ratings.from_rows(rows)
+            return await asyncio.to_thread(self._update, base, new, history)
+
+    async def watch(self, interval: float, sessions) -> None:
+        """Run :meth:`update` every ``interval`` seconds with a session from ``sessions()``."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with sessions() as db:
+                    done = await self.update(db)
+            except Exception as exc:
+                print(f"⚠️ Incremental model update failed: {exc!r}")
+                continue
+            if done is not None:
+                print(describe(done))
+
+    # ── internal helpers ──────────────────────────────────
+    def _champion(self) -> dict:
+        champion = self.registry.serving()["champion"]
+        if champion is None:
+            raise ValueError(f"No champion in {self.registry.root} to update; publish and promote a full retrain first")
+        manifest = read_manifest(self.registry.path(champion))
+        if manifest.get("training", {}).get("data", {}).get("watermark") is None:
+            raise ValueError(f"Champion {champion} records no rating watermark; retrain with scripts/train_retrain_model.py")
+        latest = self.registry.versions()[-1]
+        if latest["version"] != champion and latest.get("training", {}).get("base") == champion:
+            # don't pile up drifted versions until someone retrains or promotes
+            raise ValueError(f"Update {latest['version']} of {champion} was held back for drift; run a full retrain")
+        return manifest
+
+    def _update(self, base: dict, new: _Ratings, history: _Ratings | None) -> OnlineUpdate:
+        # the trainer (and scipy) stays out of the API's import time
+        from ..ml.mf import MatrixFactorization, rmse
+        from ..ml.online import incremental_update, timed_update
+
+        scorer, _ = load_artifact(self.registry.path(base["version"]))
+        watermark = int(new.ids[-1])
+        params = {**self.params, "random_state": watermark}
+
+        # ── holdout check ──
+        held = np.random.default_rng(watermark).random(len(new.ids)) < self.holdout
+        score = base_score = retrain_score = None
+        if held.any():
+            train, test = new.take(~held), new.take(held)
+            candidate = incremental_update(scorer, train.users, train.items, train.ratings, **params)
+            score = rmse(candidate, test.users, test.items, test.ratings)
+            base_score = rmse(scorer, test.users, test.items, test.ratings)
+            if history is not None:
+                trained = history.take(~np.isin(history.ids, test.ids))
+                retrain = MatrixFactorization(**RETRAIN_PARAMS).fit(trained.users, trained.items, trained.ratings)
+                retrain_score = rmse(retrain, test.users, test.items, test.ratings)
+        promoted = score is None or all(
+            reference is None or score <= reference + self.tolerance for reference in (base_score, retrain_score)
+        )
+
+        updated, ms_per_1k = timed_update(scorer, new.users, new.items, new.ratings, **params)
+        check = {"holdout": int(held.sum()), "rmse": score, "base_rmse": base_score, "retrain_rmse": retrain_score,
+                 "ms_per_1k_ratings": ms_per_1k}
+        training = update_record(base, updated, params, check, len(new.ids), watermark)
+        manifest = self.registry.publish(updated, training=training, quantize=PRECISIONS)
+        if promoted:
+            self.registry.promote(manifest["version"])
+
+        ONLINE_UPDATES.inc(result="promoted" if promoted else "held_back")
+        ONLINE_UPDATE.set(len(new.ids), stat="ratings")
+        ONLINE_UPDATE.set(ms_per_1k, stat="ms_per_1k")
+        if score is not None:
+            ONLINE_UPDATE.set(score, stat="holdout_rmse")
+        return OnlineUpdate(
+            manifest["version"], base["version"], len(new.ids), watermark, ms_per_1k,
+            score, base_score, retrain_score, promoted,
+        )
+
+    @contextmanager
+    def _locked(self):
+        self.registry.root.mkdir(parents=True, exist_ok=True)
+        with open(self.registry.root / LOCK, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def describe(done: OnlineUpdate) -> str:
+    """One log line for an update."""
+    def fmt(value: float | None) -> str:
+        return "-" if value is None else f"{value:.4f}"
+
+    scores = f"holdout RMSE {fmt(done.rmse)} (champion {fmt(done.base_rmse)}, full retrain {fmt(done.retrain_rmse)})"
+    summary = (f"{done.base} + {done.n_ratings} ratings (through #{done.watermark}) → {done.version} "
+               f"in {done.ms_per_1k:.1f} ms per 1000 ratings; {scores}")
+    if done.promoted:
+        return f"✅  Promoted incremental update {summary}"
+    return f"⚠️ Incremental update drifted, published but not promoted (run a full retrain): {summary}"
@@ -0,0 +1,256 @@
+"""
+Write-behind buffer for rating writes (``RATINGS_WRITE_BEHIND``).
+
+With the buffer on, ``POST /movies/ratings`` answers 202 as soon as the
+rating is queued here, and a background task hands the queue to ``write``
+in one batch once it holds ``flush_rows`` ratings, or ``flush_seconds``
+after the first one arrived. One commit then covers hundreds of requests.
+
+Durability: with a ``log_dir``, every accepted rating is appended to a
+per-process log and fsync'd before the request is answered. A flush first
+rotates the log and deletes the rotated segment only after its batch is
+committed, so the log always holds exactly the ratings that may not be in
+the database yet. On start-up, logs that no live process holds (flock) are
+replayed and removed. Without a log, ratings still queued when the process
+dies are lost; a graceful shutdown flushes them.
+"""
+import asyncio
+import fcntl
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, IO
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+
+from ..core.metrics import REGISTRY
+
+# (user_id, movie_id, rating, rating_date)
+RatingRow = tuple[UUID, int, float, str]
+
+BUFFERED = REGISTRY.gauge("ratings_buffered", "Ratings accepted and not yet written")
+FLUSHED = REGISTRY.counter("ratings_flushed_total", "Ratings written by write-behind flushes")
+REJECTED = REGISTRY.counter("ratings_buffer_rejected_total", "Ratings refused with 503 because the buffer was full")
+FLUSH_ERRORS = REGISTRY.counter("ratings_flush_errors_total", "Failed flushes; their batch is retried")
+FLUSH_LATENCY = REGISTRY.histogram("ratings_flush_seconds", "Time to write one batch")
+
+
+class _AppendLog:
+    """fsync'd JSON-lines log of queued ratings, one active segment per process."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # one thread: appends and rotations happen in submission order
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ratings-log")
+        self._active = self._open_segment()
+
+    def append(self, rows: list[RatingRow]) -> asyncio.Future:
+        """Submit an fsync'd append now; await the result to know it is on disk."""
+        return asyncio.get_running_loop().run_in_executor(self._io, self._write, rows)
+
+    async def rotate(self) -> IO:
+        """Start a new segment; the returned one holds everything appended so far."""
+        return await asyncio.get_running_loop().run_in_executor(self._io, self._rotate)
+
+    async def release(self, segments: list[IO]) -> None:
+        """Delete segments whose ratings are committed."""
+        await asyncio.get_running_loop().run_in_executor(self._io, self._delete, segments)
+
+    def close(self, pending: list[IO] = ()) -> None:
+        """Stop logging; ``pending`` segments (and a non-empty active one) stay for replay."""
+        self._io.shutdown(wait=True)
+        if os.fstat(self._active.fileno()).st_size == 0:
+            self._delete([self._active])
+        for f in [*pending, self._active]:
+            f.close()
+
+    @classmethod
+    def orphans(cls, directory: Path) -> list[IO]:
+        """Segments left by processes that are gone, locked by us from now on."""
+        found = []
+        for path in sorted(directory.glob("ratings-*.log")):
+            f = path.open("r+")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()      # a live worker's segment
+                continue
+            found.append(f)
+        return found
+
+    @staticmethod
+    def read(segment: IO) -> list[RatingRow]:
+        rows = []
+        segment.seek(0)
+        for line in segment:
+            try:
+                user_id, movie_id, rating, rating_date = json.loads(line)
+            except ValueError:
+                continue       # torn last line of a crashed append
+            rows.append((UUID(user_id), movie_id, rating, rating_date))
+        return rows
+
+    @staticmethod
+    def _delete(segments: list[IO]) -> None:
+        for f in segments:
+            # unlink while still holding the lock, so no replayer can pick it up
+            os.unlink(f.name)
+            f.close()
+
+    def _open_segment(self) -> IO:
+        f = (self.directory / f"ratings-{os.getpid()}-{uuid4().hex[:8]}.log").open("a+")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def _write(self, rows: list[RatingRow]) -> None:
+        self._active.write("".join(json.dumps([str(u), m, r, d]) + "\n" for u, m, r, d in rows))
+        self._active.flush()
+        os.fsync(self._active.fileno())
+
+    def _rotate(self) -> IO:
+        segment, self._active = self._active, self._open_segment()
+        return segment
+
+
+class RatingBuffer:
+    """
+    Bounded in-process queue of validated ratings, written in batches.
+
+    ``write`` receives a batch (oldest first) and returns how many rows it
+    stored. A full buffer answers 503 + ``Retry-After`` rather than growing.
+    A failed flush puts its batch back in front of newer ratings and is
+    retried after ``flush_seconds``.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[RatingRow]], Awaitable[int]],
+        max_rows: int,
+        flush_rows: int,
+        flush_seconds: float,
+        log_dir: str | None = None,
+    ):
+        self.write = write
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.log_dir = Path(log_dir) if log_dir else None
+        self._rows: list[RatingRow] = []
+        self._log: _AppendLog | None = None
+        self._unreleased: list[IO] = []   # rotated segments whose batch isn't committed yet
+        self._task: asyncio.Task | None = None
+        self._pending = asyncio.Event()   # the buffer went from empty to non-empty
+        self._full = asyncio.Event()      # it reached flush_rows
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def start(self) -> None:
+        """Replay orphaned logs, open this process's log and start the flusher."""
+        if self.log_dir is not None:
+            await self._replay()
+            self._log = _AppendLog(self.log_dir)
+        self._task = asyncio.create_task(self._run(), name="rating-buffer")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as exc:
+            print(f"❌ {len(self._rows)} queued ratings not written on shutdown: {exc!r}")
+        if self._log is not None:
+            self._log.close(self._unreleased)
+            self._log = None
+            self._unreleased = []
+
+    async def put(self, rows: list[RatingRow]) -> None:
+        """Queue ratings; returns once they are logged (when a log is configured)."""
+        if self._task is None:
+            raise RuntimeError("RatingBuffer.start() has not run")
+        if len(self._rows) + len(rows) > self.max_rows:
+            REJECTED.inc(len(rows))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Rating writes are backed up, retry shortly",
+                headers={"Retry-After": str(max(1, math.ceil(self.flush_seconds)))},
+            )
+        # queue and submit the log append before yielding: a rotation can only
+        # come after it, so a segment never outlives rows it holds
+        logged = self._log.append(rows) if self._log is not None else None
+        if not self._rows:
+            self._pending.set()
+        self._rows.extend(rows)
+        BUFFERED.set(len(self._rows))
+        if len(self._rows) >= self.flush_rows:
+            self._full.set()
+        if logged is not None:
+            await logged
+
+    async def flush(self) -> int:
+        """Write everything queued now; returns the rows stored."""
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            batch, self._rows = self._rows, []
+            self._full.clear()
+            if self._log is not None:
+                self._unreleased.append(await self._log.rotate())
+            try:
+                with FLUSH_LATENCY.time():
+                    written = await self.write(batch)
+            except BaseException:
+                FLUSH_ERRORS.inc()
+                self._rows[:0] = batch
+                raise
+            finally:
+                BUFFERED.set(len(self._rows))
+            FLUSHED.inc(written)
+            if self._unreleased:
+                await self._log.release(self._unreleased)
+                self._unreleased = []
+            return written
+
+    # ── internal helpers ──────────────────────────────────
+    async def _run(self) -> None:
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+            if len(self._rows) < self.flush_rows:
+                # give the batch flush_seconds to fill up, unless it fills first
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self.flush()
+            except Exception as exc:
+                print(f"⚠️ Rating flush failed ({exc!r}); retrying in {self.flush_seconds}s")
+                await asyncio.sleep(self.flush_seconds)
+            if self._rows:
+                self._pending.set()
+
+    async def _replay(self) -> None:
+        segments = _AppendLog.orphans(self.log_dir)
+        rows = [row for segment in segments for row in _AppendLog.read(segment)]
+        for start in range(0, len(rows), self.max_rows):
+            await self.write(rows[start:start + self.max_rows])
+        _AppendLog._delete(segments)
+        if rows:
+            print(f"✅ Replayed {len(rows)} logged ratings from {len(segments)} segment(s) in {self.log_dir}")
@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db_models.users import User
 
@@ -11,11 +12,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = AuthService(db).decode_token(token)   # implement inside AuthService
+    user = await AuthService(db).decode_token(token)   # implement inside AuthService
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,8 +25,8 @@ def get_current_user(
         )
     return user
 
-def get_users_service(db: Session):
-    return db.query(User).all()
+async def get_users_service(db: AsyncSession):
+    return (await db.scalars(select(User))).all()
 
  
 
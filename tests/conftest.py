@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings and the engines are read at import: point them at two SQLite files
+# standing in for the primary and its read replica before anything imports src
+_DATA = Path(tempfile.mkdtemp(prefix="movie-recs-tests-"))
+os.environ.update(
+    DATABASE_URI=f"sqlite:///{_DATA / 'primary.sqlite'}",
+    READ_REPLICA_URI=f"sqlite:///{_DATA / 'replica.sqlite'}",
+    JWT_SECRET_KEY="test-secret",
+    TMDB_API_KEY="test",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from src.services.movies import MovieService  # noqa: E402
+from support import TABLES, USER, USERS_DDL  # noqa: E402
+
+
+@pytest.fixture
+def databases():
+    """Sync engines on the primary and the replica, with empty movies / ratings / top_movies tables and USER."""
+    engines = {
+        "primary": create_engine(os.environ["DATABASE_URI"]),
+        "replica": create_engine(os.environ["READ_REPLICA_URI"]),
+    }
+    for engine in engines.values():
+        with engine.begin() as conn:
+            for table in reversed(TABLES):
+                table.drop(conn, checkfirst=True)
+            conn.execute(text("DROP TABLE IF EXISTS users"))
+            conn.execute(text(USERS_DDL))
+            conn.execute(text("INSERT INTO users (id) VALUES (:id)"), {"id": USER.hex})
+            for table in TABLES:
+                table.create(conn)
+    MovieService._ratings = MovieService._top = None
+    MovieService.forget_user(USER)
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
@@ -0,0 +1,43 @@
+"""Helpers shared by the tests; the fixtures are in conftest.py."""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from src.database.session import dispose_engines
+from src.db_models.movies import Movies
+from src.db_models.ratings import Ratings
+from src.db_models.top_movies import TopMovies
+from src.db_models.users import User  # registered for the ratings.user_id foreign key
+
+TABLES = [Movies.__table__, Ratings.__table__, TopMovies.__table__]
+USER = uuid.uuid4()
+# the users table's uuid_generate_v4() default is Postgres-only; ratings only need the key
+USERS_DDL = "CREATE TABLE users (id CHAR(32) PRIMARY KEY)"
+
+
+def run(coro):
+    """Run ``coro`` on a fresh event loop; the async pools are closed with it."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await dispose_engines()
+
+    return asyncio.run(main())
+
+
+def movie(movie_id: int, title: str = "") -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    return {"movie_id": movie_id, "title": title or str(movie_id), "created_at": now, "average_rating": 3.0}
+
+
+def seed(engine, *movies: dict) -> None:
+    with engine.begin() as conn:
+        conn.execute(Movies.__table__.insert(), list(movies))
+
+
+def ratings_in(engine) -> list[tuple]:
+    with engine.connect() as conn:
+        return conn.execute(select(Ratings.movie_id, Ratings.rating).order_by(Ratings.movie_id)).all()
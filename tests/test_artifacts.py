@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+
+from src.ml.artifacts import load_artifact, read_manifest, save_artifact
+from src.ml.scoring import FactorScorer
+
+
+def make_scorer(seed: int, n_items: int = 20) -> FactorScorer:
+    rng = np.random.default_rng(seed)
+    return FactorScorer(
+        global_mean=3.5,
+        pu=rng.normal(size=(4, 3)).astype(np.float32),
+        qi=rng.normal(size=(n_items, 3)).astype(np.float32),
+        bu=np.zeros(4, dtype=np.float32),
+        bi=np.zeros(n_items, dtype=np.float32),
+        user_ids=np.array(["a", "b", "c", "d"]),
+        item_ids=np.arange(n_items, dtype=np.int64),
+    )
+
+
+def test_reexport_swaps_the_whole_artifact(tmp_path):
+    path = tmp_path / "svd_factors"
+    save_artifact(make_scorer(0), path, ivf_lists=0)
+    old, _ = load_artifact(path)
+    old_qi = np.array(old.qi)
+
+    for seed in (1, 2):
+        manifest = save_artifact(make_scorer(seed, n_items=20 + seed), path, ivf_lists=0)
+    assert path.is_symlink()
+    # the version being served and the one before it (for loads that resolved the old link)
+    assert len(os.listdir(tmp_path / ".svd_factors.versions")) == 2
+    assert path.resolve().name in os.listdir(tmp_path / ".svd_factors.versions")
+
+    new, _ = load_artifact(path)
+    assert read_manifest(path)["version"] == manifest["version"]
+    assert new.qi.shape == new.item_ids.shape + (3,) == (22, 3)
+    np.testing.assert_array_equal(old.qi, old_qi)   # memory maps of a deleted version stay readable
+
+
+def test_load_reads_one_version(tmp_path, monkeypatch):
+    path = tmp_path / "svd_factors"
+    save_artifact(make_scorer(0), path, ivf_lists=0)
+    save_artifact(make_scorer(1, n_items=21), path, ivf_lists=0)
+
+    # an export finishing halfway through the load
+    real_load, calls = np.load, []
+
+    def load(file, *args, **kwargs):
+        calls.append(file)
+        if len(calls) == 3:
+            save_artifact(make_scorer(2, n_items=22), path, ivf_lists=0)
+        return real_load(file, *args, **kwargs)
+
+    monkeypatch.setattr(np, "load", load)
+    scorer, manifest = load_artifact(path)
+    assert scorer.qi.shape == (21, 3) and scorer.item_ids.shape == (21,) and manifest["n_items"] == 21
@@ -0,0 +1,37 @@
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+from src.core.config import settings
+from src.routers import admin
+from support import USER, movie, run, seed
+
+
+def post(path: str, json: dict, headers: dict) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(admin.router)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(path, json=json, headers=headers)
+
+    return run(main())
+
+
+def test_batch_needs_only_the_admin_token(databases, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    seed(databases["replica"], movie(7))
+    with databases["replica"].begin() as conn:
+        conn.exec_driver_sql("INSERT INTO top_movies (movie_id, mean_rating, rating_count) VALUES (7, 4.5, 10)")
+    other = uuid.uuid4()
+    payload = {"user_ids": [str(USER), str(other), str(USER)], "n": 3}
+
+    assert post("/admin/recommendations/batch", payload, {}).status_code == 403
+    assert post("/admin/recommendations/batch", payload, {"X-Admin-Token": "wrong"}).status_code == 403
+
+    response = post("/admin/recommendations/batch", payload, {"X-Admin-Token": "secret"})   # no user JWT
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["user_id"] for r in results] == [str(USER), str(other)]
+    assert all(r["movie_ids"] == [7] for r in results)   # no model loaded: the fallback list
@@ -0,0 +1,62 @@
+from src.core.cache import TTLCache
+from src.database.session import AsyncSessionLocal
+from src.schemas.movies import RatingCreate
+from src.services.movies import MovieService
+from support import USER, movie, run, seed
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1   # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.stats()["expirations"] == 1
+
+
+def test_invalidate_group_drops_every_key_of_the_group():
+    cache = TTLCache(maxsize=10, ttl=60, group=lambda key: key[0])
+    for key in [("u1", "v1", 5), ("u1", "v2", 10), ("u2", "v1", 5)]:
+        cache.set(key, key)
+    cache.invalidate_group("u1")
+    assert cache.get(("u1", "v1", 5)) is None and cache.get(("u1", "v2", 10)) is None
+    assert cache.get(("u2", "v1", 5)) == ("u2", "v1", 5)
+
+
+def test_rating_invalidates_the_users_lists(databases):
+    seed(databases["primary"], movie(1))
+    other = "someone else"
+    MovieService._recs_cache.set((str(USER), "v1", 5), (1, 2, 3))
+    MovieService._foldin_cache.set((str(USER), "v1"), (None, 0.0))
+    MovieService._recs_cache.set((other, "v1", 5), (4, 5, 6))
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            await MovieService(db).add_rating(user_id=USER, data=RatingCreate(movie_id=1, rating=4.0))
+
+    run(main())
+    assert MovieService._recs_cache.get((str(USER), "v1", 5)) is None
+    assert MovieService._foldin_cache.get((str(USER), "v1")) is None
+    assert MovieService._recs_cache.get((other, "v1", 5)) == (4, 5, 6)
+    MovieService.forget_user(other)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.ml.catalog import CatalogIndex
+from src.ml.scoring import FactorScorer
+from src.services.model_manager import ServingModel, ServingState
+from src.services.movies import MovieService
+
+
+@pytest.fixture
+def scorer():
+    item_ids = np.array([10, 20, 30, 40], dtype=np.int64)
+    return FactorScorer(
+        global_mean=3.0,
+        pu=np.ones((1, 2), dtype=np.float32),
+        qi=np.ones((4, 2), dtype=np.float32),
+        bu=np.zeros(1, dtype=np.float32),
+        bi=np.zeros(4, dtype=np.float32),
+        user_ids=np.array(["u"]),
+        item_ids=item_ids,
+    )
+
+
+def test_rows_follow_the_model(scorer):
+    catalog = CatalogIndex.build([40, 10, 99, 10, 30], scorer)
+    assert catalog.movie_ids.tolist() == [10, 30, 40, 99]   # sorted, duplicates dropped
+    assert catalog.rows.tolist() == [0, 2, 3, -1]           # 99 isn't in the model
+    assert catalog.n_known == 3
+
+
+def test_candidates_exclude_rated_movies(scorer):
+    catalog = CatalogIndex.build([10, 20, 30, 99], scorer)
+    ids, rows = catalog.candidates(np.array([20]), "skip")
+    assert ids.tolist() == [10, 30] and rows.tolist() == [0, 2]
+    ids, rows = catalog.candidates(np.array([20]), "bias")
+    assert ids.tolist() == [10, 30, 99] and rows.tolist() == [0, 2, -1]
+    with pytest.raises(ValueError):
+        catalog.candidates(np.array([]), "drop")
+
+
+def test_swap_forgets_mappings_of_retired_models(scorer):
+    catalog = CatalogIndex.build([10], scorer)
+    MovieService._catalogs = {"old": catalog, "live": catalog}
+    MovieService._model_swapped(ServingState(ServingModel("live", scorer)))
+    assert list(MovieService._catalogs) == ["live"]
+    MovieService.refresh_catalog()
@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.database.session import AsyncSessionLocal
+from src.ml.foldin import fold_in
+from src.ml.scoring import FactorScorer
+from src.schemas.movies import RatingCreate
+from src.services.model_manager import ServingModel
+from src.services.movies import MovieService
+from support import USER, movie, run, seed
+
+
+def make_scorer(n_items: int = 50, k: int = 4, seed: int = 0) -> FactorScorer:
+    rng = np.random.default_rng(seed)
+    return FactorScorer(
+        global_mean=3.5,
+        pu=rng.normal(size=(1, k)),
+        qi=rng.normal(size=(n_items, k)),
+        bu=np.zeros(1),
+        bi=rng.normal(scale=0.3, size=n_items),
+        user_ids=np.array(["trained"]),
+        item_ids=np.arange(1, n_items + 1, dtype=np.int64),
+    )
+
+
+def test_recovers_a_planted_user():
+    scorer = make_scorer()
+    pu, bu = np.array([0.5, -0.2, 0.1, 0.3]), 0.4
+    items = np.arange(30)
+    ratings = scorer.global_mean + scorer.bi[items] + bu + scorer.qi[items] @ pu
+    got_pu, got_bu = fold_in(scorer, items, ratings, reg=1e-9)
+    np.testing.assert_allclose(got_pu, pu, atol=1e-6)
+    assert abs(got_bu - bu) < 1e-6
+
+
+def test_unknown_items_are_ignored():
+    scorer = make_scorer()
+    with_unknown = fold_in(scorer, [0, -1, 1, 2, -1], [4.0, 1.0, 3.0, 5.0, 1.0])
+    without = fold_in(scorer, [0, 1, 2], [4.0, 3.0, 5.0])
+    np.testing.assert_allclose(with_unknown[0], without[0])
+    pu, bu = fold_in(scorer, [-1], [5.0])
+    assert not pu.any() and bu == 0.0
+
+
+def test_new_user_is_folded_in_from_their_ratings(databases):
+    scorer = make_scorer()
+    model = ServingModel("v1", scorer)
+    rated = {1: 5.0, 2: 4.5, 3: 1.0, 4: 2.0, 5: 3.5}
+    seed(databases["primary"], *(movie(m) for m in scorer.item_ids.tolist()))
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            service = MovieService(db)
+            too_few = await service._folded_user(model, USER, n_rated=2)
+            await service.add_ratings(user_id=USER, ratings=[RatingCreate(movie_id=m, rating=r) for m, r in rated.items()])
+            folded = await service._folded_user(model, USER, n_rated=len(rated))
+            cached = MovieService._foldin_cache.get((str(USER), "v1"))
+            return too_few, folded, cached
+
+    too_few, (pu, bu), cached = run(main())
+    assert too_few == (None, 0.0)
+    want_pu, want_bu = fold_in(scorer, scorer.item_index(list(rated)), list(rated.values()))
+    np.testing.assert_allclose(pu, want_pu)
+    assert bu == want_bu and cached[1] == bu
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from src.ml.mf import MatrixFactorization, rmse
+
+NOISE = 0.1
+
+
+@pytest.fixture(scope="module")
+def ratings():
+    """60% of a rank-3 biased 80 × 50 matrix plus noise, split 80 / 20 into train and test."""
+    rng = np.random.default_rng(0)
+    p, q = rng.normal(scale=0.6, size=(80, 3)), rng.normal(scale=0.6, size=(50, 3))
+    full = 3.0 + rng.normal(scale=0.3, size=(80, 1)) + rng.normal(scale=0.3, size=(1, 50)) + p @ q.T
+    users, items = np.nonzero(rng.random(full.shape) < 0.6)
+    r = np.clip(full[users, items] + rng.normal(scale=NOISE, size=len(users)), 0.5, 5.0)
+    test = rng.random(len(r)) < 0.2
+    return (users[~test], items[~test], r[~test]), (users[test], items[test], r[test])
+
+
+@pytest.mark.parametrize("solver, params", [
+    ("sgd", {"n_epochs": 40, "lr_all": 0.02, "batch_size": 128}),
+    ("als", {"n_epochs": 15}),
+])
+def test_solver_recovers_a_low_rank_matrix(ratings, solver, params):
+    train, test = ratings
+    baseline = np.sqrt(np.mean((test[2] - train[2].mean()) ** 2))   # predicting the global mean: ~0.72
+    model = MatrixFactorization(n_factors=3, solver=solver, random_state=0, **params).fit(*train)
+    assert rmse(model, *train) < 1.5 * NOISE
+    assert rmse(model, *test) < 2 * NOISE < baseline / 3
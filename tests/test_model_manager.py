@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.ml.scoring import FactorScorer
+from src.services.model_manager import ServingModel, validate
+
+
+def make_model(factor_scale: float) -> ServingModel:
+    rng = np.random.default_rng(0)
+    scorer = FactorScorer(
+        global_mean=3.5,
+        pu=rng.normal(scale=0.3, size=(2, 4)).astype(np.float32),
+        qi=rng.normal(scale=factor_scale, size=(50, 4)).astype(np.float32),
+        bu=np.zeros(2, dtype=np.float32),
+        bi=np.zeros(50, dtype=np.float32),
+        user_ids=np.array(["a", "b"]),
+        item_ids=np.arange(50, dtype=np.int64),
+    )
+    return ServingModel("v1", scorer)
+
+
+def test_validate_passes_a_sane_model():
+    validate(make_model(0.3))
+
+
+def test_validate_rejects_blown_up_factors():
+    model = make_model(1e3)
+    # clipping would keep every served score inside the scale
+    clipped = model.scorer.score(0, np.arange(50))
+    assert clipped.min() >= 0.5 and clipped.max() <= 5.0
+    with pytest.raises(ValueError, match="far outside the rating scale"):
+        validate(model)
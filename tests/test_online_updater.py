@@ -0,0 +1,76 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from src.database.session import AsyncSessionLocal
+from src.db_models.ratings import Ratings
+from src.ml.registry import ModelRegistry
+from src.ml.scoring import FactorScorer
+from src.services.online_updater import OnlineUpdater
+from support import movie, run, seed
+
+USERS = sorted(str(uuid.uuid4()) for _ in range(5))
+MOVIES = list(range(1, 31))
+WATERMARK = 40
+
+
+@pytest.fixture
+def registry(databases, tmp_path):
+    """A champion trained through rating #40 of 100 stored ratings."""
+    seed(databases["primary"], *(movie(m) for m in MOVIES))
+    rng = np.random.default_rng(0)
+    pairs = [(u, m) for u in USERS for m in MOVIES]
+    rows = [
+        {"rating_id": n, "user_id": uuid.UUID(u), "movie_id": m, "rating": float(rng.integers(1, 11)) / 2, "rating_date": ""}
+        for n, (u, m) in enumerate((pairs[p] for p in rng.permutation(len(pairs))[:100]), start=1)
+    ]
+    with databases["primary"].begin() as conn:
+        conn.execute(Ratings.__table__.insert(), rows)
+
+    scorer = FactorScorer(
+        global_mean=3.0,
+        pu=rng.normal(scale=0.1, size=(len(USERS), 4)).astype(np.float32),
+        qi=rng.normal(scale=0.1, size=(len(MOVIES), 4)).astype(np.float32),
+        bu=np.zeros(len(USERS), dtype=np.float32),
+        bi=np.zeros(len(MOVIES), dtype=np.float32),
+        user_ids=np.array(USERS),
+        item_ids=np.array(MOVIES, dtype=np.int64),
+    )
+    registry = ModelRegistry(tmp_path)
+    champion = registry.publish(scorer, training={"data": {"watermark": WATERMARK}}, ivf_lists=0)
+    registry.promote(champion["version"])
+    return registry
+
+
+def update(updater: OnlineUpdater, guard: bool = False):
+    async def main():
+        async with AsyncSessionLocal() as db:
+            return await updater.update(db, guard=guard)
+
+    return run(main())
+
+
+def test_update_continues_from_the_watermark(registry):
+    champion = registry.serving()["champion"]
+    done = update(OnlineUpdater(registry, min_ratings=10, n_epochs=1, holdout=0.0))
+
+    assert done.promoted and done.base == champion
+    assert (done.n_ratings, done.watermark) == (100 - WATERMARK, 100)   # ratings #41..#100 only
+    assert registry.serving()["champion"] == done.version
+    assert registry.versions()[-1]["training"]["data"]["watermark"] == 100
+    assert update(OnlineUpdater(registry, min_ratings=1)) is None       # nothing above #100
+
+
+def test_drifted_update_is_held_back(registry):
+    champion = registry.serving()["champion"]
+    # every holdout score counts as drifted
+    updater = OnlineUpdater(registry, min_ratings=10, n_epochs=1, holdout=0.5, tolerance=-np.inf)
+    done = update(updater, guard=True)
+
+    assert not done.promoted
+    assert done.rmse is not None and done.base_rmse is not None and done.retrain_rmse is not None
+    assert registry.serving()["champion"] == champion
+    assert registry.versions()[-1]["version"] == done.version   # published all the same
+    with pytest.raises(ValueError, match="held back for drift"):
+        update(updater)
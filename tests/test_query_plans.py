@@ -0,0 +1,41 @@
+"""
+Query-plan regressions (scripts/check_query_plans.py) on a real Postgres.
+
+Skipped unless ``TEST_POSTGRES_URI`` points at a scratch database migrated
+with ``alembic upgrade head``; the seeded rows are rolled back.
+"""
+import os
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+
+from scripts.check_query_plans import checks, explain, nodes, problems, seed
+
+POSTGRES_URI = os.environ.get("TEST_POSTGRES_URI")
+pytestmark = pytest.mark.skipif(not POSTGRES_URI, reason="TEST_POSTGRES_URI is not set")
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    engine = create_engine(POSTGRES_URI)
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            # the script's default sizes, which the budgets are set for
+            user_id, email = seed(conn, movies=50_000, users=20_000, ratings_per_user=100, recs_per_user=50)
+            yield conn, {check.name: check for check in checks(user_id, email)}
+        finally:
+            trans.rollback()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", [check.name for check in checks(uuid4(), "")])
+def test_query_plan(seeded, name):
+    conn, by_name = seeded
+    check = by_name[name]
+    plan = explain(conn, check.statement)
+    found = problems(check, plan, check.budget)
+    assert not found, "; ".join(found) + "\n" + "\n".join(
+        f"{node['Node Type']} {node.get('Relation Name', '')} {node.get('Index Name', '')}" for node in nodes(plan)
+    )
@@ -0,0 +1,38 @@
+import asyncio
+from pathlib import Path
+
+from src.services.rating_buffer import RatingBuffer, _AppendLog
+from support import USER
+
+NOW = "2026-10-18T12:00:00+00:00"
+
+
+def test_orphaned_log_is_replayed(tmp_path):
+    # a worker logged two ratings and died before flushing them, mid-append
+    crashed = _AppendLog(tmp_path)
+    rows = [(USER, 1, 4.0, NOW), (USER, 2, 3.5, NOW)]
+    crashed._write(rows)
+    crashed._active.write('["torn')
+    crashed._active.close()   # the process exit drops its lock
+    orphan = Path(crashed._active.name)
+
+    # a live worker's segment is left alone
+    live = _AppendLog(tmp_path)
+    live._write([(USER, 3, 5.0, NOW)])
+
+    batches = []
+
+    async def write(batch):
+        batches.append(batch)
+        return len(batch)
+
+    async def main():
+        buffer = RatingBuffer(write, max_rows=1, flush_rows=10, flush_seconds=60, log_dir=str(tmp_path))
+        await buffer.start()
+        await buffer.stop()
+
+    asyncio.run(main())
+    assert batches == [[rows[0]], [rows[1]]]   # replayed before serving, max_rows at a time
+    assert not orphan.exists()
+    assert list(tmp_path.iterdir()) == [Path(live._active.name)]
+    live.close()
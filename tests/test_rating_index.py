@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+
+from src.database.session import AsyncSessionLocal
+from src.ml.rating_index import RatingIndex
+from src.schemas.movies import RatingCreate
+from src.services.movies import MovieService
+from support import USER, movie, run, seed
+
+
+def test_from_pairs_builds_csr():
+    index = RatingIndex.from_pairs([("a", 10), ("b", 20), ("a", 30), ("c", 40), ("a", 50)])
+    assert index._indptr.tolist() == [0, 3, 4, 5]
+    assert index._indices.tolist() == [10, 30, 50, 20, 40]
+    assert [index.count(u) for u in "abcd"] == [3, 1, 1, 0]
+    assert sorted(index.rated("a").tolist()) == [10, 30, 50]
+    assert len(index) == 5 and index.n_users == 3
+
+
+def test_compaction_merges_the_append_buffer():
+    index = RatingIndex.from_pairs([("a", 1), ("b", 2)], compact_every=3)
+    index.add("b", 3)
+    index.add("c", 4)
+    assert index._n_pending == 2 and sorted(index.rated("b").tolist()) == [2, 3]
+    index.add("a", 5)   # third write: merged into the CSR arrays
+    assert index._n_pending == 0
+    assert index._indptr.tolist() == [0, 2, 4, 5]
+    assert {u: sorted(index.rated(u).tolist()) for u in "abc"} == {"a": [1, 5], "b": [2, 3], "c": [4]}
+    assert [index.count(u) for u in "abc"] == [2, 2, 1] and len(index) == 5
+
+
+def test_reseed_runs_in_the_background(databases):
+    seed(databases["primary"], *(movie(m) for m in range(1, 4)))
+    MovieService._ratings = RatingIndex.from_pairs([])
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            await MovieService(db).add_rating(user_id=USER, data=RatingCreate(movie_id=1, rating=4.0))
+        with databases["primary"].begin() as conn:   # another worker's rating
+            conn.exec_driver_sql(
+                "INSERT INTO ratings (movie_id, user_id, rating, rating_date) VALUES (2, ?, 3.0, 'now')", (USER.hex,)
+            )
+        stale = MovieService._ratings
+        async with AsyncSessionLocal() as db:
+            assert await MovieService(db)._rating_index() is stale   # requests never wait for a re-seed
+        watcher = asyncio.create_task(MovieService.watch_ratings(0.01, AsyncSessionLocal))
+        while MovieService._ratings is stale:
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+        return MovieService._ratings
+
+    index = run(main())
+    assert sorted(index.rated(USER).tolist()) == [1, 2]
+
+
+def test_ratings_stored_during_a_reseed_are_kept(databases, monkeypatch):
+    seed(databases["primary"], *(movie(m) for m in range(1, 4)))
+    build = RatingIndex.from_pairs.__func__
+
+    def from_pairs(cls, pairs):
+        MovieService._index_ratings(USER, [3])   # stored while the table was being read
+        return build(cls, pairs)
+
+    monkeypatch.setattr(RatingIndex, "from_pairs", classmethod(from_pairs))
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            await MovieService.preload_ratings(db)
+
+    run(main())
+    assert MovieService._ratings.rated(USER).tolist() == [3]
+    assert MovieService._ratings_added is None
+    np.testing.assert_array_equal(MovieService._ratings.rated("nobody"), [])
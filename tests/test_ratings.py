@@ -0,0 +1,34 @@
+import httpx
+from fastapi import FastAPI
+
+from src.routers import movies
+from src.services.auth import AuthenticatedUser
+from src.services.user import get_current_user
+from support import USER, movie, ratings_in, run, seed
+
+
+def post(path: str, json: dict) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(movies.router)
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(
+        USER, "user", "user@example.com", "A", "User", "true", ""
+    )
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(path, json=json)
+
+    return run(main())
+
+
+def test_rating_an_unknown_movie_is_a_404(databases):
+    seed(databases["primary"], movie(1))
+
+    assert post("/movies/ratings", {"movie_id": 2, "rating": 4.0}).status_code == 404
+    bulk = {"ratings": [{"movie_id": 1, "rating": 4.0}, {"movie_id": 2, "rating": 3.0}]}
+    assert post("/movies/ratings/bulk", bulk).status_code == 404
+    assert ratings_in(databases["primary"]) == []   # the known movie isn't stored either
+
+    response = post("/movies/ratings", {"movie_id": 1, "rating": 4.0})
+    assert response.status_code == 201
+    assert ratings_in(databases["primary"]) == [(1, 4.0)]
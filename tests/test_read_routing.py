@@ -0,0 +1,81 @@
+import numpy as np
+
+from src.database.session import AsyncSessionLocal, read_only
+from src.ml.scoring import FactorScorer
+from src.schemas.movies import RatingCreate
+from src.services.model_manager import ServingModel
+from src.services.movies import MovieService
+from support import USER, movie, ratings_in, run, seed
+
+
+class Reader:
+    """A service method marked @read_only that calls into the ones that must not be."""
+
+    def __init__(self, db):
+        self.db = db
+        self.service = MovieService(db)
+
+    @read_only
+    async def rating_count(self) -> int:
+        return (await self.service._rating_index()).count(str(USER))
+
+    @read_only
+    async def folded(self, model: ServingModel):
+        return await self.service._folded_user(model, USER, n_rated=5)
+
+
+def test_read_only_methods_read_the_replica(databases):
+    seed(databases["primary"], movie(1, "on the primary"))
+    seed(databases["replica"], movie(1, "on the replica"))
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            return await MovieService(db).list_page(10)
+
+    page = run(main())
+    assert [m.title for m in page.items] == ["on the replica"]
+
+
+def test_writes_go_to_the_primary(databases):
+    for engine in databases.values():
+        seed(engine, movie(1, "a"), movie(2, "b"))
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            ratings = [RatingCreate(movie_id=1, rating=4.0), RatingCreate(movie_id=2, rating=2.5)]
+            return await MovieService(db).add_ratings(user_id=USER, ratings=ratings)
+
+    run(main())
+    assert ratings_in(databases["primary"]) == [(1, 4.0), (2, 2.5)]
+    assert ratings_in(databases["replica"]) == []
+
+
+def test_own_ratings_are_read_from_the_primary(databases):
+    # the replica hasn't caught up with any of the user's ratings yet
+    movie_ids = list(range(1, 6))
+    for engine in databases.values():
+        seed(engine, *(movie(m, str(m)) for m in movie_ids))
+    rng = np.random.default_rng(0)
+    scorer = FactorScorer(
+        global_mean=3.5,
+        pu=np.zeros((1, 3), dtype=np.float32),
+        qi=rng.normal(size=(5, 3)).astype(np.float32),
+        bu=np.zeros(1, dtype=np.float32),
+        bi=np.zeros(5, dtype=np.float32),
+        user_ids=np.array(["someone else"]),
+        item_ids=np.array(movie_ids, dtype=np.int64),
+    )
+    model = ServingModel(version="v1", scorer=scorer)
+
+    async def main():
+        async with AsyncSessionLocal() as db:
+            ratings = [RatingCreate(movie_id=m, rating=5.0) for m in movie_ids]
+            await MovieService(db).add_ratings(user_id=USER, ratings=ratings)
+        MovieService._ratings = None   # as before the start-up seed
+        async with AsyncSessionLocal() as db:
+            reader = Reader(db)
+            return await reader.rating_count(), await reader.folded(model)
+
+    count, (pu, _) = run(main())
+    assert count == 5
+    assert pu is not None
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.ml import artifacts
+from src.ml.registry import ModelRegistry
+from src.ml.scoring import FactorScorer
+
+
+class FrozenClock(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def make_scorer(seed: int) -> FactorScorer:
+    rng = np.random.default_rng(seed)
+    return FactorScorer(
+        global_mean=3.5,
+        pu=rng.normal(size=(2, 3)).astype(np.float32),
+        qi=rng.normal(size=(10, 3)).astype(np.float32),
+        bu=np.zeros(2, dtype=np.float32),
+        bi=np.zeros(10, dtype=np.float32),
+        user_ids=np.array(["a", "b"]),
+        item_ids=np.arange(10, dtype=np.int64),
+    )
+
+
+def test_same_model_published_twice_in_one_second(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "datetime", FrozenClock)
+    registry = ModelRegistry(tmp_path)
+    first = registry.publish(make_scorer(0), ivf_lists=0)
+    again = registry.publish(make_scorer(0), ivf_lists=0)
+    other = registry.publish(make_scorer(1), ivf_lists=0)
+
+    assert again == first
+    assert other["version"] != first["version"]
+    assert [m["version"] for m in registry.versions()] == sorted([first["version"], other["version"]])
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first["version"], other["version"]])   # no .incoming-*
+
+    exported = tmp_path / "exported"
+    artifacts.save_artifact(make_scorer(0), exported, ivf_lists=0)
+    assert registry.add_artifact(exported) == first
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.artifacts import export_model, load_artifact
+from src.ml.catalog import CatalogIndex
+from src.ml.scoring import top_n
+from src.services.model_manager import ServingModel
+from src.services.movies import MovieService
+
+surprise = pytest.importorskip("surprise")
+
+
+@pytest.fixture(scope="module")
+def svd():
+    """A small SVD on synthetic ratings that stay inside the rating scale."""
+    rng = np.random.default_rng(7)
+    users, items = rng.integers(0, 30, 600), rng.integers(1, 41, 600)
+    ratings = np.round(rng.uniform(1.5, 4.5, 600) * 2) / 2
+    df = pd.DataFrame({"user": users.astype(str), "item": items.astype(str), "rating": ratings})
+    df = df.drop_duplicates(["user", "item"])
+    data = surprise.Dataset.load_from_df(df, surprise.Reader(rating_scale=(0.5, 5.0)))
+    model = surprise.SVD(n_factors=8, n_epochs=10, random_state=0)
+    model.fit(data.build_full_trainset())
+    return model
+
+
+@pytest.fixture(scope="module")
+def scorer(svd, tmp_path_factory):
+    path = tmp_path_factory.mktemp("artifact") / "svd_factors"
+    export_model(svd, path, ivf_lists=0)
+    return load_artifact(path)[0]
+
+
+def test_scores_match_predict(svd, scorer):
+    movie_ids = np.arange(1, 45)   # 41..44 were never rated: bias-only estimates
+    rows = scorer.item_index(movie_ids)
+    for uid in ["0", "5", "29", "unknown user"]:
+        expected = np.array([svd.predict(uid, str(m)).est for m in movie_ids])
+        np.testing.assert_allclose(scorer.score(scorer.user_index(uid), rows), expected, rtol=0, atol=1e-5)
+
+
+def test_ranking_matches_predict(svd, scorer):
+    catalog = CatalogIndex.build(scorer.item_ids, scorer)
+    model = ServingModel("test", scorer)
+    rated = np.array([1, 2, 3], dtype=np.int64)
+    for uid in ["0", "5", "29"]:
+        candidates = [m for m in scorer.item_ids.tolist() if m not in rated]
+        expected = np.array([svd.predict(uid, str(m)).est for m in candidates])
+        assert expected.max() < 5.0   # no clipped ties, so the order is well defined
+        want = [candidates[i] for i in top_n(expected, 10)]
+
+        user = scorer.user_index(uid)
+        got = MovieService._rank(model, catalog, scorer.pu[user], scorer.bu[user], rated, 10)
+        assert got == want